@@ -0,0 +1,101 @@
+"""Measures the cost of hovering, selecting, paging and theme switching on a Table.
+
+Run from the repository root (a display is required):
+
+    python -m benchmarks.bench_table_redraw
+
+Besides wall-clock time, the benchmark reports how many canvas items were allocated,
+which is what recycling row slots is meant to bring down to zero.
+"""
+import time
+import tkinter as tk
+
+import customtkinter as ctk
+import pandas as pd
+
+from src.bootstraptable import Table, FitCriterion
+
+
+ROWS = 2000
+PAGINATION_SIZE = 50
+HOVER_SWEEPS = 20
+
+
+class Event:
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def next_item_id(canvas):
+    # canvas item ids are allocated sequentially: the id of a throwaway item tells how many were created
+    item = canvas.create_line(0, 0, 0, 0)
+    canvas.delete(item)
+    return item
+
+
+def measure(root, table, name, action):
+    first_id = next_item_id(table.table_canvas)
+    start = time.perf_counter()
+    action()
+    root.update()
+    elapsed = time.perf_counter() - start
+    allocated_items = next_item_id(table.table_canvas) - first_id - 1
+    print("{0:<24}{1:>10.1f} ms{2:>12} items".format(name, elapsed * 1000, allocated_items))
+
+
+def hover_sweeps(table):
+    row_pitch = table.row_height + table.row_separator_width
+    for _ in range(HOVER_SWEEPS):
+        for y in range(0, PAGINATION_SIZE * row_pitch, 3):
+            table.on_hover(Event(10, y))
+    table.on_leave(None)
+
+
+def click_rows(table):
+    row_pitch = table.row_height + table.row_separator_width
+    for row in range(PAGINATION_SIZE):
+        table.on_left_click(Event(10, row * row_pitch + row_pitch // 2))
+
+
+def flip_pages(table):
+    for _ in range(ROWS // PAGINATION_SIZE):
+        table.next_page()
+    for _ in range(ROWS // PAGINATION_SIZE):
+        table.previous_page()
+
+
+def switch_themes(table):
+    for _ in range(10):
+        table.switch_theme("dark")
+        table.switch_theme("light")
+
+
+def main():
+    root = ctk.CTk()
+    data_frame = pd.DataFrame(data={
+        "Nome": ["Mario"] * ROWS,
+        "Cognome": ["Rossi"] * ROWS,
+        "Prestazioni": ["7253|7724|4455|6442|8353"] * ROWS,
+        "Anestesia": ["true"] * ROWS,
+        "Infezioni": ["false"] * ROWS,
+    })
+    table = Table(master=root,
+                  data_frame=data_frame,
+                  fit_criterion=FitCriterion.FIT_HEADER_AND_COL_MAX_LENGTH,
+                  width=1000,
+                  pagination_size=PAGINATION_SIZE)
+    table.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    root.update()
+
+    measure(root, table, "hover sweeps", lambda: hover_sweeps(table))
+    measure(root, table, "row selection", lambda: click_rows(table))
+    measure(root, table, "paging", lambda: flip_pages(table))
+    measure(root, table, "theme switches", lambda: switch_themes(table))
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
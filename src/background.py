@@ -0,0 +1,107 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class BackgroundTask:
+    # Runs a function on a pooled worker thread. Progress and results travel back through a queue
+    # which the Tk main loop drains with after(), so that widgets are only ever touched by the main thread.
+
+    POLL_INTERVAL = 50  # ms
+
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background-task")
+
+    def __init__(self, widget, work, on_progress=None, on_done=None, on_error=None, on_cancel=None):
+        """Prepares a task; nothing runs until start() is called.
+
+        Args:
+            widget: Any Tk widget living as long as the application, used to schedule polling.
+            work (callable): Runs on the worker thread and receives the task itself, in order to
+                report progress and check for cancellation. Its return value is the task's result.
+            on_progress (callable, optional): Called on the main thread with the latest reported progress.
+            on_done (callable, optional): Called on the main thread with the result of work.
+            on_error (callable, optional): Called on the main thread with the exception raised by work.
+            on_cancel (callable, optional): Called on the main thread once the cancelled work has stopped.
+        """
+        self.widget = widget
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+
+        self.events = queue.SimpleQueue()
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.finished = False
+
+    def start(self):
+        self.future = BackgroundTask.executor.submit(self.run)
+        self.widget.after(self.POLL_INTERVAL, self.poll)
+        return self
+
+    # worker thread side
+
+    def run(self):
+        try:
+            result = self.work(self)
+        except TaskCancelled:
+            self.events.put(("cancelled", None))
+        except Exception as exception:
+            self.events.put(("error", exception))
+        else:
+            self.events.put(("done", result))
+
+    def report_progress(self, *progress):
+        self.events.put(("progress", progress))
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise TaskCancelled("Task cancelled")
+
+    # main thread side
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def poll(self):
+        latest_progress = None
+        outcome = None
+
+        while outcome is None:
+            try:
+                event, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event == "progress":
+                # only the most recent progress is worth displaying
+                latest_progress = payload
+            else:
+                outcome = (event, payload)
+
+        if latest_progress is not None and self.on_progress is not None and outcome is None:
+            self.on_progress(*latest_progress)
+
+        if outcome is None:
+            self.widget.after(self.POLL_INTERVAL, self.poll)
+            return
+
+        self.finished = True
+        event, payload = outcome
+        if event == "cancelled" or self.cancelled:
+            if self.on_cancel is not None:
+                self.on_cancel()
+        elif event == "error":
+            if self.on_error is not None:
+                self.on_error(payload)
+        elif self.on_done is not None:
+            self.on_done(payload)
@@ -1,4 +1,7 @@
+import bisect
 import ctypes
+import itertools
+import numpy as np
 from PIL import Image
 import tkinter as tk
 import customtkinter as ctk
@@ -6,6 +9,7 @@ import tkinter.font as tkFont
 import pandas as pd
 import enum
 from math import ceil, floor
+from src.text_metrics import GlyphWidthCache, TextTruncator
 
 
 class FitCriterion(enum.Enum):
@@ -21,11 +25,105 @@ class Background(enum.Enum):
     HOVER = 2
 
 
+def sort_permutation(values, ascending=True) -> np.ndarray:
+    # rows of a column in sorted order, texts regardless of case; ties keep the order of the rows
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        values = values.astype(str).str.casefold()
+    values = values.to_numpy()
+    if ascending:
+        return np.argsort(values, kind="stable")
+    # sorted from the last row backwards, so that ties are not reversed
+    return len(values) - 1 - np.argsort(values[::-1], kind="stable")[::-1]
+
+
+def compose_view(permutation, filtered_rows, size):
+    # the rows passing the filter, in the order of the permutation, with a single pass over it;
+    # None stands for all rows in both the arguments and the result
+    if permutation is None:
+        return filtered_rows
+    if filtered_rows is None:
+        return permutation
+    passing = np.zeros(size, dtype=np.bool_)
+    passing[filtered_rows] = True
+    return permutation[passing[permutation]]
+
+
+class CellLocator:
+    # Hit-testing of the table canvas: rows share the same pitch, so the row under a point is an integer division,
+    # while the column is found by bisecting the right edges of the columns, computed once as widths are fixed.
+
+    def __init__(self, row_pitch, column_widths):
+        self.row_pitch = row_pitch
+        self.column_edges = list(itertools.accumulate(column_widths))
+
+    def row_at(self, y):
+        # y in canvas coordinates, i.e. scrolling included
+        return max(int(y // self.row_pitch), 0)
+
+    def column_at(self, x):
+        # None outside of the columns
+        column = bisect.bisect_right(self.column_edges, x)
+        return column if x >= 0 and column < len(self.column_edges) else None
+
+    def locate(self, x, y):
+        return self.row_at(y), self.column_at(x)
+
+
+class EventCoalescer:
+    # Collapses a burst of events into a single call with the last of them, at most once per interval:
+    # the first event of a burst schedules the call, the following ones only replace the event it will get.
+
+    def __init__(self, widget, callback, interval):
+        self.widget = widget
+        self.callback = callback
+        self.interval = interval  # ms
+        self.event = None
+        self.job = None
+
+    def __call__(self, event):
+        self.event = event
+        if self.job is None:
+            self.job = self.widget.after(self.interval, self.flush)
+
+    def flush(self):
+        self.job = None
+        event, self.event = self.event, None
+        self.callback(event)
+
+    def cancel(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+        self.event = None
+
+
+class RowSlot:
+    # canvas items able to display any row: slots are created once and recycled for hovering, selection,
+    # paging, theme changes and, in virtualized mode, scrolling, instead of creating items for every redraw
+
+    def __init__(self, separator, background, texts):
+        self.row = None  # absolute row currently displayed, None when hidden
+        self.separator = separator
+        self.background = background
+        self.texts = texts
+
+
 class Table(ctk.CTkFrame):
 
-    ROW_TAG_PREFIX = "row_"
-    EMPTY_SPACE_TAG_PREFIX = "empty_"
-    FOOTER_SEPARATOR_TAG_PREFIX = "footer_"
+    ROW_SLOT_TAG = "slot_"
+    SORT_INDICATORS = {True: " ▲", False: " ▼"}
+
+    # motion and resize events are handled at most once per interval, with the last event received
+    HOVER_INTERVAL = 16  # ms, a frame at 60 Hz
+    RESIZE_INTERVAL = 100  # ms
+
+    # fitting columns to their content: only the FIT_TOP_K values estimated widest are measured exactly,
+    # out of at most FIT_SAMPLE_SIZE distinct values per column (None for all of them)
+    FIT_TOP_K = 16
+    FIT_SAMPLE_SIZE = None
+
+    # char advance widths are shared by all tables, per font
+    glyph_widths = GlyphWidthCache()
 
     def __init__(self,
                  master,
@@ -39,6 +137,8 @@ class Table(ctk.CTkFrame):
                  row_separator_width=1,
                  column_separator_width=0,
                  pagination_size=5,
+                 virtualized=False,
+                 viewport_rows=10,
                  row_hover_colors=("#E3F5FF", "#565766"),
                  selected_row_colors=("#E3FFE6", "#287CFA"),
                  header_colors=("#FFFFFF", "#212529"),
@@ -50,7 +150,8 @@ class Table(ctk.CTkFrame):
                  header_text_colors=("#000000", "#FFFFFF"),
                  table_text_colors=("#000000", "#FFFFFF"),
                  page_number_label_text_colors=("#000000", "#FFFFFF"),
-                 theme="light"):
+                 theme="light",
+                 ellipsis="…"):
         """Constructs a Table for displaying data.
 
         Args:
@@ -62,6 +163,11 @@ class Table(ctk.CTkFrame):
             fit_header_labels (bool, optional): Columns are created wide enough to fit their respective label. Defaults to False.
             row_separator_width (int, optional): Width of row separators. Defaults to 1.
             column_separator_width (int, optional): Width of column separators. Defaults to 1.
+            pagination_size (int, optional): Rows per page, None for a single page holding every row. Defaults to 5.
+            virtualized (bool, optional): Only rows intersecting the visible part of the page get canvas items,
+                which are recycled while scrolling. Defaults to False.
+            viewport_rows (int, optional): Rows visible at once when virtualized. Defaults to 10.
+            ellipsis (str, optional): Appended to truncated texts, None to just cut them. Defaults to "…".
         """
         super().__init__(master=master, width=width)
 
@@ -75,6 +181,7 @@ class Table(ctk.CTkFrame):
         self.font = tkFont.Font(family="Source Sans Pro", size=12)
         self.page_label_font = ("Source Sans Pro", 10)
         self.cell_text_left_offset = 6  # px
+        self.text_truncator = TextTruncator(ellipsis=ellipsis)
 
         self.row_hover_colors = row_hover_colors
         self.selected_row_colors = selected_row_colors
@@ -122,10 +229,27 @@ class Table(ctk.CTkFrame):
 
         self.hover_row = None
         self.selected_row = None
-
+        self.hover_events = EventCoalescer(self, self.on_hover, self.HOVER_INTERVAL)
+        self.resize_events = EventCoalescer(self, self.on_resize, self.RESIZE_INTERVAL)
+
+        # rows of the data frame shown, in order, None for all of them: filtering and sorting never copy or reorder
+        # the data frame, and rows are numbered by their position in the view everywhere but in data_row()
+        self.view = None
+        self.filtered_rows = None  # rows passing the filter, None for all of them
+        self.sort_column = None
+        self.sort_ascending = True
+        self.sort_permutations = {}  # (column, ascending) -> argsort of the column
         self.rows = data_frame.shape[0]
         self.columns = data_frame.shape[1]
-        self.pagination_size = pagination_size
+        self.paginated = pagination_size is not None
+        self.pagination_size = pagination_size if self.paginated else max(self.rows, 1)
+        self.virtualized = virtualized
+        self.viewport_rows = viewport_rows
+        self.row_slots = []
+        self.header_items = []
+        self.header_texts = []
+        self.empty_space_item = None
+        self.footer_separator_item = None
         self.current_page = 0
         self.current_page_label_var = tk.IntVar()
         self.current_page_label_var.initialize(1)
@@ -133,6 +257,8 @@ class Table(ctk.CTkFrame):
         self.row_height = row_height
         self.fit_criterion = fit_criterion
         self.default_column_width = 250
+        # widths are fixed once the table is built: the table does not grow with the window, and new data frames
+        # keep the columns of the first one
         self.column_widths = self.compute_column_widths()
         self.footer_separator_width = footer_separator_width
         self.footer_height = footer_height
@@ -142,6 +268,7 @@ class Table(ctk.CTkFrame):
 
         self.table_canvas_width = sum(self.column_widths)
         self.table_canvas_height = self.compute_canvas_height()
+        self.cell_locator = CellLocator(self.row_height + self.row_separator_width, self.column_widths)
 
         self.header_canvas = tk.Canvas(master=self,
                                        xscrollcommand=self.horizontal_scrollbar.set,
@@ -154,7 +281,8 @@ class Table(ctk.CTkFrame):
 
         self.table_canvas = tk.Canvas(master=self,
                                       xscrollcommand=self.horizontal_scrollbar.set,
-                                      yscrollcommand=self.vertical_scrollbar.set,
+                                      yscrollcommand=self.on_vertical_view_change,
+                                      yscrollincrement=self.row_height + self.row_separator_width,
                                       width=self.table_canvas_width,
                                       height=self.table_canvas_height,
                                       scrollregion=(0, 0, self.table_canvas_width, self.table_canvas_height),
@@ -271,20 +399,41 @@ class Table(ctk.CTkFrame):
         self.page_number_label_text_color = self.page_number_label_text_colors[theme]
 
     def do_bindings(self):
+        self.header_canvas.bind("<Button-1>", func=self.on_header_click)
         self.table_canvas.bind("<Button-1>", func=self.on_left_click)
-        self.table_canvas.bind("<Motion>", func=self.on_hover)
+        self.table_canvas.bind("<Motion>", func=self.hover_events)
         self.table_canvas.bind("<Leave>", func=self.on_leave)
 
-        self.bind("<Configure>", command=self.on_resize)
+        if self.virtualized:
+            self.table_canvas.bind("<MouseWheel>", func=self.on_mouse_wheel)
+            self.table_canvas.bind("<Button-4>", func=self.on_mouse_wheel)
+            self.table_canvas.bind("<Button-5>", func=self.on_mouse_wheel)
+
+        self.bind("<Configure>", command=self.resize_events)
 
     def on_resize(self, event):
         self.update_idletasks()
         self.pack_vertical_scrollbar()
         self.pack_horizontal_scrollbar()
 
+    def on_vertical_view_change(self, first, last):
+        self.vertical_scrollbar.set(first, last)
+
+        # rows scrolled into view get their slots, whatever moved the view
+        if self.virtualized:
+            self.draw_viewport()
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4:
+            units = -1
+        elif event.num == 5:
+            units = 1
+        else:
+            units = -1 if event.delta > 0 else 1
+        self.table_canvas.yview_scroll(units, "units")
+
     def pack_vertical_scrollbar(self):
-        df_rows = self.get_current_page_rows()
-        actual_entries = len(df_rows) * (self.row_height + self.row_separator_width)
+        actual_entries = self.count_current_page_rows() * (self.row_height + self.row_separator_width)
 
         self.table_canvas.configure(scrollregion=(0, 0, self.table_canvas_width, actual_entries))
 
@@ -307,48 +456,102 @@ class Table(ctk.CTkFrame):
                                            fill=tk.X,
                                            before=self.footer)
 
-    def first_page(self):
-        self.current_page = 0
+    def change_page(self, page):
+        self.current_page = page
         self.current_page_label_var.set(self.current_page + 1)
-        self.table_canvas.delete("all")
         self.selected_row = None
         self.hover_row = None
+
+        # pages may differ in length and a new page is shown from its top
+        if self.virtualized:
+            self.pack_vertical_scrollbar()
+            self.table_canvas.yview_moveto(0)
         self.draw_table()
 
+    def set_data_frame(self, data_frame, filtered_rows=None):
+        # rows may be added, removed or changed, while columns stay the same
+        self.data_frame = data_frame
+        self.sort_permutations.clear()
+        self.set_rows(filtered_rows)
+
+        self.change_page(min(self.current_page, self.compute_last_page_index()))
+        self.pack_vertical_scrollbar()
+
+    def filter_rows(self, filtered_rows):
+        # a new view is shown from its first page
+        self.set_rows(filtered_rows)
+
+        self.change_page(0)
+        self.pack_vertical_scrollbar()
+
+    def sort_by(self, column, ascending=True):
+        # None restores the order of the data frame
+        self.sort_column = column
+        self.sort_ascending = ascending
+        self.set_rows(self.filtered_rows)
+
+        self.draw_header_text()
+        self.change_page(0)
+
+    def get_sort_permutation(self):
+        if self.sort_column is None:
+            return None
+
+        key = (self.sort_column, self.sort_ascending)
+        permutation = self.sort_permutations.get(key)
+        if permutation is None:
+            permutation = sort_permutation(self.data_frame.iloc[:, self.sort_column], self.sort_ascending)
+            self.sort_permutations[key] = permutation
+        return permutation
+
+    def set_rows(self, filtered_rows):
+        self.filtered_rows = None if filtered_rows is None else np.asarray(filtered_rows, dtype=np.int64)
+        self.view = compose_view(self.get_sort_permutation(), self.filtered_rows, self.data_frame.shape[0])
+        self.rows = self.data_frame.shape[0] if self.view is None else len(self.view)
+
+        if not self.paginated:
+            self.pagination_size = max(self.rows, 1)
+            self.table_canvas_height = self.compute_canvas_height()
+            self.table_canvas.configure(height=self.table_canvas_height)
+
+    def data_row(self, row):
+        # position in the data frame of a row of the view
+        return row if self.view is None else int(self.view[row])
+
+    @property
+    def selected_data_row(self):
+        return None if self.selected_row is None else self.data_row(self.selected_row)
+
+    def first_page(self):
+        self.change_page(0)
+
     def last_page(self):
-        self.current_page = self.compute_last_page_index()
-        self.current_page_label_var.set(self.current_page + 1)
-        self.table_canvas.delete("all")
-        self.selected_row = None
-        self.hover_row = None
-        self.draw_table()
+        self.change_page(self.compute_last_page_index())
 
     def compute_last_page_index(self):
-        return ceil(self.rows / self.pagination_size) - 1
+        return max(ceil(self.rows / self.pagination_size) - 1, 0)
 
     def next_page(self):
         if self.current_page == self.compute_last_page_index():
             return
-        self.current_page += 1
-        self.current_page_label_var.set(self.current_page + 1)
-        self.table_canvas.delete("all")
-        self.selected_row = None
-        self.hover_row = None
-        self.draw_table()
+        self.change_page(self.current_page + 1)
 
     def previous_page(self):
         if self.current_page == 0:
             return
-        self.current_page -= 1
-        self.current_page_label_var.set(self.current_page + 1)
-        self.table_canvas.delete("all")
-        self.selected_row = None
-        self.hover_row = None
-        self.draw_table()
+        self.change_page(self.current_page - 1)
 
     def compute_canvas_height(self):
+        if self.virtualized:
+            return self.viewport_rows * (self.row_height + self.row_separator_width)
         return self.pagination_size * (self.row_height + self.row_separator_width)
 
+    # rows whose background the page spans: the whole page, or at least the viewport when virtualized
+    def compute_page_extent(self):
+        if self.virtualized:
+            return max(self.count_current_page_rows(), self.viewport_rows)
+        return self.pagination_size
+
     def compute_column_widths(self):
         column_widths = []
 
@@ -400,156 +603,249 @@ class Table(ctk.CTkFrame):
 
         for label in columns_labels:
             column_values = self.data_frame[label].values
-            column_values_pixels = map(lambda e: self.font.measure(
-                e) + self.cell_text_left_offset, column_values)
-            column_widths.append(max(column_values_pixels))
+            max_text_width = self.glyph_widths.max_width(self.font,
+                                                         column_values,
+                                                         top_k=self.FIT_TOP_K,
+                                                         sample_size=self.FIT_SAMPLE_SIZE)
+            column_widths.append(max_text_width + self.cell_text_left_offset)
 
         return column_widths
 
+    @staticmethod
+    def draw_rectangle(canvas, item, coords, fill, **kwargs):
+        # existing items are updated in place, so that redraws do not allocate new canvas items
+        if item is None:
+            return canvas.create_rectangle(*coords, width=0, fill=fill, **kwargs)
+
+        canvas.coords(item, *coords)
+        canvas.itemconfigure(item, fill=fill, **kwargs)
+        return item
+
     def draw_header(self):
-        self.header_canvas.create_rectangle(0, 0,
-                                            self.table_canvas.winfo_reqwidth(), self.row_separator_width,
-                                            width=0, fill=self.separator_line_color)
+        width = self.table_canvas.winfo_reqwidth()
+        if len(self.header_items) == 0:
+            self.header_items = [None, None, None]
+
+        self.header_items[0] = self.draw_rectangle(self.header_canvas, self.header_items[0],
+                                                   (0, 0, width, self.row_separator_width),
+                                                   fill=self.separator_line_color)
 
         y = self.row_separator_width
-        self.header_canvas.create_rectangle(0, y,
-                                            self.table_canvas.winfo_reqwidth(), y + self.header_height,
-                                            fill=self.header_color,
-                                            width=0)
+        self.header_items[1] = self.draw_rectangle(self.header_canvas, self.header_items[1],
+                                                   (0, y, width, y + self.header_height),
+                                                   fill=self.header_color)
 
         y += self.header_height
-        self.header_canvas.create_rectangle(0, y,
-                                            self.table_canvas.winfo_reqwidth(), y + self.row_separator_width,
-                                            width=0, fill=self.separator_line_color)
+        self.header_items[2] = self.draw_rectangle(self.header_canvas, self.header_items[2],
+                                                   (0, y, width, y + self.row_separator_width),
+                                                   fill=self.separator_line_color)
 
     def draw_header_text(self):
+        if len(self.header_texts) == 0:
+            self.header_texts = [self.header_canvas.create_text((0, 0),
+                                                                text="",
+                                                                font=self.header_font,
+                                                                anchor=tk.W)
+                                 for _ in range(self.columns)]
+
         y = self.row_separator_width + self.header_height / 2
         x = self.cell_text_left_offset
         for column in range(0, self.columns):
             text = self.data_frame.columns.values[column]
+            if column == self.sort_column:
+                text += self.SORT_INDICATORS[self.sort_ascending]
             max_displayable_text = self.compute_max_displayable(
                 text, column, header=True)
-            self.header_canvas.create_text((x, y),
-                                           text=max_displayable_text,
-                                           font=self.header_font,
-                                           anchor=tk.W,
-                                           fill=self.header_text_color)
+            self.header_canvas.coords(self.header_texts[column], x, y)
+            self.header_canvas.itemconfigure(self.header_texts[column],
+                                             text=max_displayable_text,
+                                             fill=self.header_text_color)
             x = x + self.column_widths[column]
 
     def get_current_page_rows(self):
         first_row = self.current_page * self.pagination_size
         last_row = self.pagination_size * (self.current_page + 1)
 
-        return self.data_frame[first_row:last_row].values
+        if self.view is None:
+            return self.data_frame[first_row:last_row].values
+        return self.data_frame.iloc[self.view[first_row:last_row]].values
+
+    def count_current_page_rows(self):
+        first_row = self.current_page * self.pagination_size
+        return max(min(self.pagination_size, self.rows - first_row), 0)
 
     def draw_table(self):
-        df_rows = self.get_current_page_rows()
-        for absolute_row in range(self.current_page * self.pagination_size, self.current_page * self.pagination_size + len(df_rows)):
-            self.draw_row(absolute_row)
+        page_rows = self.count_current_page_rows()
 
-        # fill empty space with default background
-        if len(df_rows) < self.pagination_size:
-            self.fill_empty_space(len(df_rows))
+        if len(self.row_slots) < self.count_needed_row_slots():
+            self.create_row_slots()
+        self.draw_viewport(refresh=True)
 
+        # fill empty space with default background
+        self.fill_empty_space(page_rows)
         self.draw_footer_separator()
 
-    def draw_footer_separator(self):
-        footer_separator_tag = self.FOOTER_SEPARATOR_TAG_PREFIX
-        self.table_canvas.delete(footer_separator_tag)
-
-        y = (self.row_separator_width + self.row_height) * self.pagination_size
-        y_bottom = (self.row_separator_width + self.row_height) * \
-            self.pagination_size + self.footer_separator_width
-
-        self.table_canvas.create_rectangle(0, y,
-                                           self.table_canvas.winfo_reqwidth(), y + y_bottom,
-                                           width=0,
-                                           fill=self.separator_line_color,
-                                           tags=footer_separator_tag)
+    def count_needed_row_slots(self):
+        if not self.virtualized:
+            return self.pagination_size
+
+        # one more slot than visible rows, as a partially scrolled view shows two half rows
+        visible_rows = ceil(max(self.table_canvas.winfo_height(), self.table_canvas_height) /
+                            (self.row_height + self.row_separator_width))
+        return visible_rows + 1
+
+    def create_row_slots(self):
+        self.table_canvas.delete(self.ROW_SLOT_TAG)
+        self.row_slots = []
+
+        for _ in range(self.count_needed_row_slots()):
+            separator = self.table_canvas.create_rectangle(0, 0, 0, 0,
+                                                           width=0,
+                                                           state=tk.HIDDEN,
+                                                           tags=self.ROW_SLOT_TAG)
+            background = self.table_canvas.create_rectangle(0, 0, 0, 0,
+                                                            width=0,
+                                                            state=tk.HIDDEN,
+                                                            tags=self.ROW_SLOT_TAG)
+            texts = [self.table_canvas.create_text((0, 0),
+                                                   text="",
+                                                   font=self.font,
+                                                   anchor=tk.W,
+                                                   state=tk.HIDDEN,
+                                                   tags=self.ROW_SLOT_TAG)
+                     for _ in range(self.columns)]
+            self.row_slots.append(RowSlot(separator, background, texts))
+
+    def compute_visible_rows(self):
+        first_page_row = self.current_page * self.pagination_size
+        if not self.virtualized:
+            return range(first_page_row, first_page_row + self.count_current_page_rows())
+
+        # absolute rows intersecting the visible part of the canvas
+        row_pitch = self.row_height + self.row_separator_width
+        top = self.table_canvas.canvasy(0)
+        bottom = top + max(self.table_canvas.winfo_height(), self.table_canvas_height)
+
+        first_row = first_page_row + max(floor(top / row_pitch), 0)
+        last_row = first_page_row + min(ceil(bottom / row_pitch), self.count_current_page_rows())
+
+        return range(first_row, last_row)
+
+    def draw_viewport(self, refresh=False):
+        if len(self.row_slots) == 0:
+            return
 
-    def fill_empty_space(self, last_page_rows):
-        empty_space_tag = self.EMPTY_SPACE_TAG_PREFIX
-        self.table_canvas.delete(empty_space_tag)
+        visible_rows = self.compute_visible_rows()
+        if len(visible_rows) > len(self.row_slots):  # the canvas grew taller
+            self.create_row_slots()
+
+        for slot in self.row_slots:
+            if slot.row is not None and slot.row not in visible_rows:
+                self.hide_row_slot(slot)
+
+        # slots already showing their row are left untouched, unless everything has to be redrawn
+        for absolute_row in visible_rows:
+            slot = self.row_slots[absolute_row % len(self.row_slots)]
+            if refresh or slot.row != absolute_row:
+                self.show_row_slot(slot, absolute_row)
+
+    def get_row_slot(self, absolute_row):
+        if len(self.row_slots) == 0:
+            return None
+        slot = self.row_slots[absolute_row % len(self.row_slots)]
+        return slot if slot.row == absolute_row else None
+
+    def hide_row_slot(self, slot):
+        slot.row = None
+        self.table_canvas.itemconfigure(slot.separator, state=tk.HIDDEN)
+        self.table_canvas.itemconfigure(slot.background, state=tk.HIDDEN)
+        for text in slot.texts:
+            self.table_canvas.itemconfigure(text, state=tk.HIDDEN)
+
+    def show_row_slot(self, slot, absolute_row):
+        # the slot's items are moved and reconfigured in place: no item is created or deleted
+        slot.row = absolute_row
+        relative_row = absolute_row % self.pagination_size
+        width = self.table_canvas.winfo_reqwidth()
+        y = relative_row * (self.row_height + self.row_separator_width)
 
-        y = (self.row_separator_width + self.row_height) * last_page_rows
-        y_bottom = (self.row_separator_width + self.row_height) * \
-            self.pagination_size
+        self.table_canvas.coords(slot.separator, 0, y, width, y + self.row_separator_width)
+        self.table_canvas.itemconfigure(slot.separator, fill=self.separator_line_color, state=tk.NORMAL)
 
-        self.table_canvas.create_rectangle(0, y,
-                                           self.table_canvas.winfo_reqwidth(), y + y_bottom,
-                                           width=0,
-                                           fill=self.header_color,
-                                           tags=empty_space_tag)
+        y += self.row_separator_width
+        self.table_canvas.coords(slot.background, 0, y, width, y + self.row_height)
+        self.table_canvas.itemconfigure(slot.background,
+                                        fill=self.get_row_color(absolute_row, self.get_background_type(absolute_row)),
+                                        state=tk.NORMAL)
 
-    def draw_row(self, absolute_row, background_type=Background.DEFAULT):
-        # delete by tag all objects associated to row, if they exist
-        # this prevents Tkinter from having to keep track of too many useless objects for the same row
-        row_tag = self.ROW_TAG_PREFIX + str(absolute_row)
-        self.table_canvas.delete(row_tag)
+        y += self.row_height / 2
+        x = self.cell_text_left_offset
+        row_elements = self.data_frame.iloc[self.data_row(absolute_row)].values
+        for column in range(0, self.columns):
+            self.table_canvas.coords(slot.texts[column], x, y)
+            self.table_canvas.itemconfigure(slot.texts[column],
+                                            text=self.compute_max_displayable(row_elements[column], column),
+                                            fill=self.table_text_color,
+                                            state=tk.NORMAL)
+            x = x + self.column_widths[column]
 
-        self.draw_row_background(absolute_row, background_type)
-        self.draw_row_text(absolute_row)
+    def get_background_type(self, absolute_row):
+        if absolute_row == self.selected_row:
+            return Background.SELECT
+        if absolute_row == self.hover_row:
+            return Background.HOVER
+        return Background.DEFAULT
 
-    def draw_row_background(self, absolute_row, background_type):
-        row_tag = self.ROW_TAG_PREFIX + str(absolute_row)
+    def get_row_color(self, absolute_row, background_type):
         relative_row = absolute_row % self.pagination_size
-        y = relative_row * (self.row_height + self.row_separator_width)
-        self.table_canvas.create_rectangle(0, y,
-                                           self.table_canvas.winfo_reqwidth(), y + self.row_separator_width,
-                                           width=0,
-                                           fill=self.separator_line_color,
-                                           tags=row_tag)
-
-        y += self.row_separator_width
-
         if background_type == Background.HOVER:
-            color = self.hover_row_color
+            return self.hover_row_color
         elif background_type == Background.SELECT:
-            color = self.selected_row_color
+            return self.selected_row_color
         elif relative_row % 2 == 0:
-            color = self.even_row_col
+            return self.even_row_col
         else:
-            color = self.odd_row_col
+            return self.odd_row_col
 
-        self.table_canvas.create_rectangle(0, y,
-                                           self.table_canvas.winfo_reqwidth(), y + self.row_height,
-                                           fill=color,
-                                           width=0,
-                                           tags=row_tag)
+    def draw_footer_separator(self):
+        y = (self.row_separator_width + self.row_height) * self.compute_page_extent()
+        y_bottom = (self.row_separator_width + self.row_height) * \
+            self.compute_page_extent() + self.footer_separator_width
 
-    def draw_row_text(self, absolute_row):
-        row_tag = self.ROW_TAG_PREFIX + str(absolute_row)
-        relative_row = absolute_row % self.pagination_size
+        self.footer_separator_item = self.draw_rectangle(self.table_canvas, self.footer_separator_item,
+                                                         (0, y, self.table_canvas.winfo_reqwidth(), y + y_bottom),
+                                                         fill=self.separator_line_color)
 
-        y = (self.row_separator_width + self.row_height / 2) + \
-            (self.row_height + self.row_separator_width) * relative_row
-        x = self.cell_text_left_offset
-        row_elements = self.data_frame.iloc[absolute_row].values
-        for column in range(0, self.columns):
-            text = row_elements[column]
-            max_displayable_text = self.compute_max_displayable(text, column)
-            self.table_canvas.create_text((x, y),
-                                          text=max_displayable_text,
-                                          font=self.font,
-                                          anchor=tk.W,
-                                          tags=row_tag,
-                                          fill=self.table_text_color)
-            x = x + self.column_widths[column]
+    def fill_empty_space(self, last_page_rows):
+        y = (self.row_separator_width + self.row_height) * last_page_rows
+        y_bottom = (self.row_separator_width + self.row_height) * \
+            self.compute_page_extent()
+
+        # a full page leaves no empty space to fill
+        state = tk.NORMAL if last_page_rows < self.compute_page_extent() else tk.HIDDEN
+        self.empty_space_item = self.draw_rectangle(self.table_canvas, self.empty_space_item,
+                                                    (0, y, self.table_canvas.winfo_reqwidth(), y + y_bottom),
+                                                    fill=self.header_color,
+                                                    state=state)
+
+    def draw_row(self, absolute_row, background_type=Background.DEFAULT):
+        # rows are only recolored: their slot already holds the separator, background and texts
+        slot = self.get_row_slot(absolute_row)
+        if slot is not None:
+            self.table_canvas.itemconfigure(slot.background,
+                                            fill=self.get_row_color(absolute_row, background_type))
 
     def compute_max_displayable(self, text, column, header=False):
         if header:
             font = self.header_font
         else:
             font = self.font
-        text_width = font.measure(text)
-        text_height = self.font.metrics("linespace")
-
-        while text_width > self.column_widths[column] - self.cell_text_left_offset:
-            text = text[:-1]  # remove last char
-            text_width = font.measure(text)
-        return text
+        return self.text_truncator.truncate(text, font, self.column_widths[column] - self.cell_text_left_offset)
 
     def on_leave(self, event):
+        # a motion still pending would hover a row again
+        self.hover_events.cancel()
+
         if self.hover_row == self.selected_row:
             self.hover_row = None
             return
@@ -563,7 +859,7 @@ class Table(ctk.CTkFrame):
         previously_hovered_row = self.hover_row
 
         # when on last page we do not want to hover on a non-existing line (empty space)
-        if hover_row >= self.data_frame.shape[0]:
+        if hover_row >= self.rows:
             return
 
         if hover_row == previously_hovered_row:
@@ -583,12 +879,24 @@ class Table(ctk.CTkFrame):
 
         self.hover_row = hover_row
 
+    def on_header_click(self, event):
+        # ascending, then descending, then unsorted
+        column = self.cell_locator.column_at(self.header_canvas.canvasx(event.x))
+        if column is None:
+            return
+        if column != self.sort_column:
+            self.sort_by(column, ascending=True)
+        elif self.sort_ascending:
+            self.sort_by(column, ascending=False)
+        else:
+            self.sort_by(None)
+
     def on_left_click(self, event):
         new_selected_row = self.get_cell(
             event)[0] + self.current_page * self.pagination_size
 
         # when on last page we do not want to select a non-existing line (empty space)
-        if new_selected_row >= self.data_frame.shape[0]:
+        if new_selected_row >= self.rows:
             return
 
         if self.selected_row is None:
@@ -605,25 +913,13 @@ class Table(ctk.CTkFrame):
             self.selected_row = None
 
     def get_cell(self, event):
-        row = 0
-        column = 0
-
-        vertical_scrollbar_offset = self.table_canvas.winfo_reqheight() * \
-            self.vertical_scrollbar.get()[0]
-        horizontal_scrollbar_offset = self.table_canvas.winfo_reqwidth() * \
-            self.horizontal_scrollbar.get()[0]
-
-        y = self.row_height + self.row_separator_width
-        x = self.column_widths[column]
-
-        while y < event.y + vertical_scrollbar_offset:
-            y += self.row_height + self.row_separator_width
-            row += 1
-        while x < event.x + horizontal_scrollbar_offset:
-            x += self.column_widths[column]
-            column += 1
+        # canvasx and canvasy account for the current scrolling, whatever the size of the page
+        return self.cell_locator.locate(self.table_canvas.canvasx(event.x), self.table_canvas.canvasy(event.y))
 
-        return (row, column)
+    def destroy(self):
+        self.hover_events.cancel()
+        self.resize_events.cancel()
+        super().destroy()
 
     # both the header and the table must scroll simultaneously along the x-axis
     def horizontal_scroll(self, *args):
@@ -0,0 +1,296 @@
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.heuristics import GreedyScheduler
+from src.planning import UNSCHEDULED_PENALTY_DAYS, Plan, PlanningInstance, Resources
+from src.solver import BranchAndBound, SolverResult, SolverStatus, relative_gap
+
+
+def split_weeks(days, days_per_week) -> list:
+    # (first day, days) of each week of the horizon, the last one possibly shorter
+    return [(first_day, min(days_per_week, days - first_day)) for first_day in range(0, days, days_per_week)]
+
+
+def assign_weeks(instance, weeks, initial_plan=None, fixed=None) -> np.ndarray:
+    """Buckets patients into the weeks of the horizon, oldest list insertion first.
+
+    Fixed patients belong to the week of their session. Every other patient goes into the first week with
+    minutes and, if needed, anesthesia slots left for it, once the fixed patients are taken into account;
+    patients fitting no week are left out with -1. Buckets only bound the total load of each week:
+    packing patients into sessions is left to the week sub-problems.
+
+    Args:
+        instance (PlanningInstance): Patients and resources to plan.
+        weeks (list): Weeks of the horizon, as returned by split_weeks().
+        initial_plan (Plan, optional): Plan holding the sessions of the fixed patients. Defaults to None.
+        fixed (np.ndarray, optional): Mask of the patients keeping their session of initial_plan. Defaults to None.
+
+    Returns:
+        np.ndarray: The week of each patient, -1 for none.
+    """
+    resources = instance.resources
+    week_of_day = np.repeat(np.arange(len(weeks)), [days for first_day, days in weeks])
+    minutes_left = np.array([days * resources.rooms * resources.session_duration for first_day, days in weeks])
+    anesthesia_left = np.array([days * resources.rooms * resources.max_anesthesia_patients
+                                for first_day, days in weeks])
+
+    patient_weeks = np.full(len(instance), -1, dtype=np.int64)
+    if fixed is not None:
+        scheduled = fixed & initial_plan.scheduled
+        patient_weeks[scheduled] = week_of_day[initial_plan.day[scheduled]]
+        minutes_left -= np.bincount(patient_weeks[scheduled],
+                                    weights=instance.durations[scheduled],
+                                    minlength=len(weeks)).astype(np.int64)
+        anesthesia_left -= np.bincount(patient_weeks[scheduled],
+                                       weights=instance.anesthesia[scheduled],
+                                       minlength=len(weeks)).astype(np.int64)
+
+    order = GreedyScheduler(instance).priority_order()
+    order = order[instance.schedulable[order]]
+    if fixed is not None:
+        order = order[~fixed[order]]
+
+    durations = instance.durations.tolist()
+    anesthesia = instance.anesthesia.tolist()
+    minutes_left = minutes_left.tolist()
+    anesthesia_left = anesthesia_left.tolist()
+    first_open_week = 0  # weeks before it have no minutes left for anybody
+    for patient in order.tolist():
+        for week in range(first_open_week, len(weeks)):
+            if durations[patient] <= minutes_left[week] and anesthesia[patient] <= anesthesia_left[week]:
+                patient_weeks[patient] = week
+                minutes_left[week] -= durations[patient]
+                anesthesia_left[week] -= anesthesia[patient]
+                break
+        while first_open_week < len(weeks) and minutes_left[first_open_week] <= 0:
+            first_open_week += 1
+
+    return patient_weeks
+
+
+def week_instance(instance, patients, first_day, days) -> PlanningInstance:
+    # the patients of a week, over its days only. Priorities are kept and leaving a patient out costs as many days
+    # as on the whole horizon, counted from the first day of the week: costs are those of the horizon less
+    # first_day times the sum of the priorities, whichever patients are scheduled
+    resources = instance.resources
+    week = PlanningInstance(instance.durations[patients],
+                            instance.anesthesia[patients],
+                            instance.infectious[patients],
+                            instance.waiting_days[patients],
+                            Resources(rooms=resources.rooms,
+                                      days=days,
+                                      session_duration=resources.session_duration,
+                                      max_anesthesia_patients=resources.max_anesthesia_patients,
+                                      start_date=resources.day_date(first_day)))
+    week.unscheduled_day = resources.days + UNSCHEDULED_PENALTY_DAYS - first_day
+    return week
+
+
+def solve_week(instance, gap, timeout, initial_plan, fixed) -> SolverResult:
+    # module level, so that pool processes can unpickle it
+    initial_plan = GreedyScheduler(instance).schedule(initial_plan)
+    return BranchAndBound(instance, gap=gap, timeout=timeout, initial_plan=initial_plan, fixed=fixed).solve()
+
+
+class WeekQueue:
+    # Week sub-problems shared by the process running a RollingHorizonPlanner with sibling solver processes,
+    # which cannot be pooled from it when it is a daemon. The planner queues the weeks of its first pass and solves
+    # them along with the siblings, then releases them to their own search.
+
+    POLL_INTERVAL = 0.1  # s
+
+    def __init__(self, context, helpers):
+        """Creates the queues of a run.
+
+        Args:
+            context: Multiprocessing context of the processes sharing the queue.
+            helpers (int): Sibling processes serving the queue, each released once the weeks are solved.
+        """
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.helpers = helpers
+
+    def solve(self, problems) -> list:
+        # planner side: the results of the problems, in their order
+        try:
+            for index, problem in enumerate(problems):
+                self.tasks.put((index, problem))
+
+            results = [None] * len(problems)
+            solved = 0
+            while solved < len(problems):
+                # the planner solves weeks too, as long as some are left
+                try:
+                    index, problem = self.tasks.get_nowait()
+                    result = solve_week(*problem)
+                except queue.Empty:
+                    try:
+                        index, result = self.results.get(timeout=self.POLL_INTERVAL)
+                    except queue.Empty:
+                        continue
+                results[index] = result
+                solved += 1
+            return results
+        finally:
+            for _ in range(self.helpers):
+                self.tasks.put(None)
+
+    def serve(self, should_stop):
+        # sibling side: solves weeks until released, or stopped
+        while not should_stop():
+            try:
+                task = self.tasks.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if task is None:
+                return
+            index, problem = task
+            self.results.put((index, solve_week(*problem)))
+
+
+class RollingHorizonPlanner:
+    # Plans a long horizon week by week. Patients are bucketed into weeks by list insertion date and the weeks
+    # are solved as independent sub-problems, in parallel by a pool of workers or by the siblings of a WeekQueue.
+    # Then, walking the horizon forward, each week is fixed in turn; patients its sessions could not hold are
+    # carried over to the next week, which is solved again with them, warm-started from its first solution.
+    # Carried patients keep their priority, so the longest waits still go first. Minutes left over at the end are
+    # filled greedily. Sub-problems have a week of sessions each, hence the time grows linearly with the horizon.
+
+    DAYS_PER_WEEK = 5
+    WEEK_TIMEOUT = 1.0  # s, at most per sub-problem
+
+    def __init__(self, instance, gap=0.01, timeout=None, callback=None, should_stop=None, initial_plan=None,
+                 fixed=None, workers=1, week_queue=None):
+        """Prepares the planning; nothing runs until solve() is called.
+
+        Args:
+            instance (PlanningInstance): Patients and resources to plan.
+            gap (float, optional): Relative gap at which each week sub-problem stops. Defaults to 0.01.
+            timeout (float, optional): Seconds shared among the sub-problems, each one taking WEEK_TIMEOUT
+                at most. Defaults to None.
+            callback (callable, optional): Called like the callback of BranchAndBound, every time a week is fixed.
+            should_stop (callable, optional): Polled between weeks; weeks left are not planned once it returns True.
+            initial_plan (Plan, optional): Plan holding the sessions of the fixed patients. Defaults to None.
+            fixed (np.ndarray, optional): Mask of the patients keeping their session of initial_plan. Defaults to None.
+            workers (int, optional): Processes pooled to solve the weeks of the first pass in parallel. Defaults to 1.
+            week_queue (WeekQueue, optional): Queue sharing the weeks of the first pass with sibling processes
+                instead of a pool. Defaults to None.
+        """
+        self.instance = instance
+        self.gap = gap
+        self.callback = callback
+        self.should_stop = should_stop
+        self.initial_plan = initial_plan
+        self.fixed = fixed
+        self.workers = workers
+        self.week_queue = week_queue
+
+        resources = instance.resources
+        self.weeks = split_weeks(resources.days, self.DAYS_PER_WEEK)
+        # every week may be solved twice: once on its own and once with the patients carried over
+        self.week_timeout = self.WEEK_TIMEOUT
+        if timeout is not None:
+            self.week_timeout = min(self.WEEK_TIMEOUT, timeout / max(2 * len(self.weeks), 1))
+
+        self.bound = BranchAndBound(instance, initial_plan=initial_plan, fixed=fixed).lower_bound()
+        self.plan = Plan.empty(len(instance))
+        if fixed is not None:
+            self.plan.day[fixed] = initial_plan.day[fixed]
+            self.plan.room[fixed] = initial_plan.room[fixed]
+
+        self.nodes = 0
+        self.start_time = None
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def notify(self, event, cost):
+        if self.callback is None:
+            return
+        self.callback(event, {
+            "cost": cost,
+            "bound": self.bound,
+            "gap": relative_gap(cost, self.bound),
+            "elapsed": self.elapsed(),
+            "nodes": self.nodes,
+        })
+
+    def week_problem(self, week, patients, previous_plan=None):
+        # sub-problem of the given patients in the given week; previous_plan, if given, holds a plan of the week
+        # for its first patients, which the others are added to
+        first_day, days = self.weeks[week]
+        instance = week_instance(self.instance, patients, first_day, days)
+
+        initial_plan = Plan.empty(len(patients))
+        fixed = np.zeros(len(patients), dtype=np.bool_)
+        if self.fixed is not None:
+            fixed = self.fixed[patients]
+            initial_plan.day[fixed] = self.plan.day[patients[fixed]] - first_day
+            initial_plan.room[fixed] = self.plan.room[patients[fixed]]
+        if previous_plan is not None:
+            initial_plan.day[:len(previous_plan)] = previous_plan.day
+            initial_plan.room[:len(previous_plan)] = previous_plan.room
+
+        return instance, self.gap, self.week_timeout, initial_plan, fixed
+
+    def solve_weeks(self, problems) -> list:
+        if self.week_queue is not None:
+            return self.week_queue.solve(problems)
+        if self.workers <= 1 or len(problems) <= 1:
+            return [solve_week(*problem) for problem in problems]
+
+        # spawned like the solver processes, which are never forked from the Tk process
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(problems)),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(solve_week, *zip(*problems)))
+
+    def solve(self) -> SolverResult:
+        self.start_time = time.monotonic()
+        self.notify("incumbent", self.instance.cost(self.plan))
+
+        patient_weeks = assign_weeks(self.instance, self.weeks, self.initial_plan, self.fixed)
+        week_patients = [np.flatnonzero(patient_weeks == week) for week in range(len(self.weeks))]
+
+        # the weeks are independent as long as nothing is carried over
+        results = self.solve_weeks([self.week_problem(week, patients) for week, patients in enumerate(week_patients)])
+        self.nodes = sum(result.nodes for result in results)
+
+        status = None
+        carried = np.zeros(0, dtype=np.int64)
+        for week, (first_day, days) in enumerate(self.weeks):
+            if self.should_stop is not None and self.should_stop():
+                status = SolverStatus.STOPPED
+                break
+
+            patients = week_patients[week]
+            plan = results[week].plan
+            if len(carried) > 0:
+                patients = np.concatenate((patients, carried))
+                result = solve_week(*self.week_problem(week, patients, previous_plan=plan))
+                self.nodes += result.nodes
+                plan = result.plan
+
+            scheduled = plan.scheduled
+            self.plan.day[patients[scheduled]] = plan.day[scheduled] + first_day
+            self.plan.room[patients[scheduled]] = plan.room[scheduled]
+            carried = patients[~scheduled]
+            if self.fixed is not None:
+                carried = carried[~self.fixed[carried]]
+
+            self.notify("incumbent", self.instance.cost(self.plan))
+
+        # minutes left by packing, at week ends or anywhere, go to the patients no week could hold
+        plan = GreedyScheduler(self.instance).schedule(self.plan)
+        cost = self.instance.cost(plan)
+        gap = relative_gap(cost, self.bound)
+        if status is None:
+            if gap <= self.gap:
+                status = SolverStatus.OPTIMAL if gap == 0 else SolverStatus.GAP_REACHED
+            else:
+                status = SolverStatus.TIMEOUT
+
+        return SolverResult(plan, cost, self.bound, status, self.nodes, self.elapsed())
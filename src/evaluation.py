@@ -0,0 +1,174 @@
+import numpy as np
+
+from src.planning import Plan
+
+
+class PlanEvaluation:
+    # Objective and constraint violations of a plan, or of each plan of a batch, as numbers or arrays:
+    # cost is the waiting penalty, overtime the minutes booked beyond the sessions' duration,
+    # anesthesia_excess the patients needing anesthesia beyond the limit of their sessions and
+    # infectious_violations the patients treated after an infectious patient of their session.
+
+    def __init__(self, cost, overtime, anesthesia_excess, infectious_violations, unscheduled):
+        self.cost = cost
+        self.overtime = overtime
+        self.anesthesia_excess = anesthesia_excess
+        self.infectious_violations = infectious_violations
+        self.unscheduled = unscheduled
+
+    @property
+    def feasible(self):
+        # infectious patients treated early only cost a sanitization more, they are no infeasibility
+        return (self.overtime == 0) & (self.anesthesia_excess == 0)
+
+
+class PlanEvaluator:
+    # Evaluates whole plans with a few passes over columnar arrays, never looping over patients.
+    # A batch of k plans is a k x n array of days and rooms: the sessions of plan i are numbered from i * sessions,
+    # so that a single bincount loads the sessions of all plans at once.
+
+    def __init__(self, instance):
+        self.instance = instance
+        resources = instance.resources
+        self.rooms = resources.rooms
+        self.sessions = resources.sessions
+        self.session_duration = resources.session_duration
+        self.max_anesthesia_patients = resources.max_anesthesia_patients
+
+    def evaluate(self, plan) -> PlanEvaluation:
+        evaluation = self.evaluate_batch(plan.day[np.newaxis], plan.room[np.newaxis], plan.order[np.newaxis])
+        return PlanEvaluation(int(evaluation.cost[0]),
+                              int(evaluation.overtime[0]),
+                              int(evaluation.anesthesia_excess[0]),
+                              int(evaluation.infectious_violations[0]),
+                              int(evaluation.unscheduled[0]))
+
+    def evaluate_batch(self, days, rooms, orders=None) -> PlanEvaluation:
+        """Evaluates k plans of the instance at once.
+
+        Args:
+            days (np.ndarray): k x n days of the patients, -1 when unscheduled.
+            rooms (np.ndarray): k x n rooms of the patients.
+            orders (np.ndarray, optional): k x n positions inside the sessions; None skips the infectious
+                ordering check. Defaults to None.
+
+        Returns:
+            PlanEvaluation: Arrays of k values each.
+        """
+        instance = self.instance
+        days = np.asarray(days, dtype=np.int64)
+        rooms = np.asarray(rooms, dtype=np.int64)
+        plans = days.shape[0]
+
+        scheduled = days >= 0
+        cost = np.where(scheduled, days, instance.unscheduled_day) @ instance.priorities
+
+        # sessions of all plans, numbered plan after plan
+        sessions = (np.arange(plans)[:, np.newaxis] * self.sessions + days * self.rooms + rooms)[scheduled]
+        patients = np.broadcast_to(np.arange(days.shape[1]), days.shape)[scheduled]
+        minutes = np.bincount(sessions, weights=instance.durations[patients], minlength=plans * self.sessions)
+        anesthesia_patients = np.bincount(sessions, weights=instance.anesthesia[patients],
+                                          minlength=plans * self.sessions)
+        overtime = np.maximum(minutes - self.session_duration, 0).reshape(plans, self.sessions).sum(axis=1)
+        anesthesia_excess = np.maximum(anesthesia_patients - self.max_anesthesia_patients, 0).reshape(
+            plans, self.sessions).sum(axis=1)
+
+        infectious_violations = np.zeros(plans, dtype=np.int64)
+        if orders is not None:
+            orders = np.asarray(orders, dtype=np.int64)[scheduled]
+            infectious = instance.infectious[patients]
+            # a patient treated after the first infectious patient of its session, while not infectious itself
+            first_infectious = np.full(plans * self.sessions, np.iinfo(np.int64).max)
+            np.minimum.at(first_infectious, sessions[infectious], orders[infectious])
+            late = ~infectious & (orders > first_infectious[sessions])
+            infectious_violations = np.bincount(sessions[late] // self.sessions, minlength=plans)
+
+        return PlanEvaluation(cost.astype(np.int64),
+                              overtime.astype(np.int64),
+                              anesthesia_excess.astype(np.int64),
+                              infectious_violations,
+                              (~scheduled).sum(axis=1))
+
+    def incremental(self, plan) -> "IncrementalPlan":
+        return IncrementalPlan(self.instance, plan.sessions(self.instance.resources), self.instance.cost(plan))
+
+
+class IncrementalPlan:
+    # A plan held as the session of each patient along with the minutes and anesthesia slots left in every
+    # session, so that moving or swapping patients is priced and applied in O(1) by delta evaluation.
+
+    def __init__(self, instance, sessions, cost):
+        resources = instance.resources
+        self.instance = instance
+        self.rooms = resources.rooms
+        self.session_days = np.repeat(np.arange(resources.days), resources.rooms)
+        self.durations = instance.durations.astype(np.int64)
+        self.anesthesia = instance.anesthesia.astype(np.int64)
+        self.priorities = instance.priorities
+
+        self.session = np.asarray(sessions, dtype=np.int64).copy()
+        scheduled = self.session >= 0
+        minutes = np.bincount(self.session[scheduled],
+                              weights=self.durations[scheduled],
+                              minlength=len(self.session_days))
+        anesthesia_patients = np.bincount(self.session[scheduled],
+                                          weights=self.anesthesia[scheduled],
+                                          minlength=len(self.session_days))
+        self.residual = resources.session_duration - minutes.astype(np.int64)
+        self.anesthesia_left = resources.max_anesthesia_patients - anesthesia_patients.astype(np.int64)
+        self.cost = cost
+
+    def copy(self):
+        copied = object.__new__(IncrementalPlan)
+        copied.__dict__.update(self.__dict__)
+        copied.session = self.session.copy()
+        copied.residual = self.residual.copy()
+        copied.anesthesia_left = self.anesthesia_left.copy()
+        return copied
+
+    def patient_cost(self, patient, session):
+        day = self.session_days[session] if session >= 0 else self.instance.unscheduled_day
+        return self.priorities[patient] * day
+
+    def move_delta(self, patient, session):
+        return self.patient_cost(patient, session) - self.patient_cost(patient, self.session[patient])
+
+    def swap_delta(self, first, second):
+        first_session, second_session = self.session[first], self.session[second]
+        return (self.patient_cost(first, second_session) + self.patient_cost(second, first_session)
+                - self.patient_cost(first, first_session) - self.patient_cost(second, second_session))
+
+    def fits(self, patient, session, leaving=None):
+        # whether the patient fits the session, once the leaving patient is out of it
+        if session < 0:
+            return True
+        residual = self.residual[session]
+        anesthesia_left = self.anesthesia_left[session]
+        if leaving is not None:
+            residual += self.durations[leaving]
+            anesthesia_left += self.anesthesia[leaving]
+        return self.durations[patient] <= residual and self.anesthesia[patient] <= anesthesia_left
+
+    def move(self, patient, session):
+        self.cost += self.move_delta(patient, session)
+
+        previous_session = self.session[patient]
+        if previous_session >= 0:
+            self.residual[previous_session] += self.durations[patient]
+            self.anesthesia_left[previous_session] += self.anesthesia[patient]
+        if session >= 0:
+            self.residual[session] -= self.durations[patient]
+            self.anesthesia_left[session] -= self.anesthesia[patient]
+        self.session[patient] = session
+
+    def swap(self, first, second):
+        first_session, second_session = self.session[first], self.session[second]
+        self.move(first, -1)
+        self.move(second, first_session)
+        self.move(first, second_session)
+
+    def plan(self) -> Plan:
+        plan = Plan.empty(len(self.session))
+        scheduled = self.session >= 0
+        plan.day[scheduled], plan.room[scheduled] = np.divmod(self.session[scheduled], self.rooms)
+        return self.instance.sequence(plan)
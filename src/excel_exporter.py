@@ -0,0 +1,100 @@
+import math
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+
+
+class UnsupportedFormat(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class ExcelExporter:
+    PROGRESS_STEP = 1000  # rows
+    MAX_SHEET_TITLE_LENGTH = 31  # imposed by Excel
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def cell_value(value):
+        # missing values become empty cells
+        if value is None or value is pd.NaT:
+            return None
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    @staticmethod
+    def sheet_title(title):
+        for forbidden_char in "[]:*?/\\":
+            title = title.replace(forbidden_char, " ")
+        return title[:ExcelExporter.MAX_SHEET_TITLE_LENGTH]
+
+    @staticmethod
+    def count_rows(sheets) -> int:
+        return sum(data_frame.shape[0] for data_frame in sheets.values())
+
+    def export(self, file_name, sheets, progress=None):
+        """Writes each data frame as a separate sheet of a single workbook.
+
+        Args:
+            file_name (str): Destination file; its extension selects the format (.xlsx or .ods).
+            sheets (dict[str, pd.DataFrame]): Sheet titles and their contents, written in order.
+            progress (callable, optional): Called with the rows written so far and the total rows,
+                every PROGRESS_STEP rows. It may raise in order to abort the export.
+        """
+        if file_name.lower().endswith(".xlsx"):
+            self.write_xlsx(file_name, sheets, progress)
+        elif file_name.lower().endswith(".ods"):
+            self.write_ods(file_name, sheets, progress)
+        else:
+            raise UnsupportedFormat("Unsupported export format: " + file_name)
+
+    def write_xlsx(self, file_name, sheets, progress=None):
+        # write-only workbooks stream rows to disk instead of keeping a cell object for each value,
+        # so time and memory grow linearly with the number of rows
+        total_rows = ExcelExporter.count_rows(sheets)
+        written_rows = 0
+
+        workbook = Workbook(write_only=True)
+        for title, data_frame in sheets.items():
+            worksheet = workbook.create_sheet(ExcelExporter.sheet_title(title))
+            worksheet.append(list(data_frame.columns))
+
+            for row in data_frame.itertuples(index=False, name=None):
+                worksheet.append([ExcelExporter.cell_value(value) for value in row])
+                written_rows += 1
+                if progress is not None and written_rows % ExcelExporter.PROGRESS_STEP == 0:
+                    progress(written_rows, total_rows)
+
+        workbook.save(file_name)
+        if progress is not None:
+            progress(written_rows, total_rows)
+
+    def write_ods(self, file_name, sheets, progress=None):
+        try:
+            import odf  # noqa: F401, needed by pandas' odf engine
+        except ImportError:
+            raise UnsupportedFormat("The odfpy package is required in order to export ODF spreadsheets")
+
+        # the odf engine writes a whole sheet at a time, so progress is reported per sheet
+        total_rows = ExcelExporter.count_rows(sheets)
+        written_rows = 0
+
+        try:
+            with pd.ExcelWriter(file_name, engine="odf") as writer:
+                for title, data_frame in sheets.items():
+                    data_frame.to_excel(writer,
+                                        sheet_name=ExcelExporter.sheet_title(title),
+                                        header=list(data_frame.columns),
+                                        index=False)
+                    written_rows += data_frame.shape[0]
+                    if progress is not None:
+                        progress(written_rows, total_rows)
+        except BaseException:
+            # the writer saves on exit even when aborted: no half-written file is left behind
+            if os.path.exists(file_name):
+                os.remove(file_name)
+            raise
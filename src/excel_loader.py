@@ -1,7 +1,12 @@
+import os
+from collections import OrderedDict
+from collections.abc import Iterator
 from enum import Enum
+
+import numpy as np
 from openpyxl import load_workbook
 
-from src.model import Patient
+from src.model import Patient, PatientTable
 
 
 class MainSheetNotFound(Exception):
@@ -24,6 +29,12 @@ class ExcelIndex(Enum):
 
 
 class ExcelLoader:
+    PROGRESS_STEP = 1000  # rows
+
+    # detected main sheet names, keyed by file fingerprint, for the MAIN_SHEET_CACHE_SIZE files used last
+    MAIN_SHEET_CACHE_SIZE = 64
+    main_sheet_cache = OrderedDict()
+
     def __init__(self):
         pass
 
@@ -36,38 +47,125 @@ class ExcelLoader:
                 or row[ExcelIndex.INFECTIOUS.value] is None
                 or row[ExcelIndex.LIST_INSERTION_DATE.value] is None)
 
+    @staticmethod
+    def parse_text(value) -> str:
+        # a single service code is read as a number, possibly a float when the column has empty cells
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    @staticmethod
+    def parse_flag(value) -> bool:
+        # flags are either real booleans or "true"/"false" text
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        return str(value).strip().lower() == "true"
+
+    @staticmethod
+    def parse_row(row) -> tuple:
+        if ExcelLoader.has_none_fields(row):
+            raise InvalidRow("Row contains at least one None value among its fields.")
+
+        name = ExcelLoader.parse_text(row[ExcelIndex.NAME.value])
+        surname = ExcelLoader.parse_text(row[ExcelIndex.SURNAME.value])
+        services = ExcelLoader.parse_text(row[ExcelIndex.SERVICES.value])
+        anesthesia = ExcelLoader.parse_flag(row[ExcelIndex.ANESTHESIA.value])
+        infectious = ExcelLoader.parse_flag(row[ExcelIndex.INFECTIOUS.value])
+        list_insertion_date = row[ExcelIndex.LIST_INSERTION_DATE.value]
+
+        return name, surname, services, anesthesia, infectious, list_insertion_date
+
+    @staticmethod
+    def file_fingerprint(xlsx_file_name) -> tuple:
+        # a file is considered unchanged as long as its path, size and modification time are
+        stat = os.stat(xlsx_file_name)
+        return os.path.abspath(xlsx_file_name), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def read_header(worksheet):
+        # the header row is the only one pulled from the sheet:
+        # the parser stops as soon as the first row has been read
+        for header in worksheet.iter_rows(min_row=1,
+                                          max_row=1,
+                                          max_col=ExcelIndex.NAME.value + 1,
+                                          values_only=True):
+            return header
+        return None
+
     def find_main_sheet(self, workbook):
-        sheet_names = workbook.sheetnames
-        for sheet_name in sheet_names:
-            workbook.active = workbook[sheet_name]
+        # chartsheets have no cells and are skipped altogether
+        for worksheet in workbook.worksheets:
+            header = ExcelLoader.read_header(worksheet)
             # we check for the right header
-            if list(workbook.active.values)[0][0] == "Nome":
-                return sheet_name
+            if header is not None and header[ExcelIndex.NAME.value] == "Nome":
+                return worksheet.title
         raise MainSheetNotFound("Main sheet not found")
 
-    def load_patients(self, xlsx_file_name) -> list[Patient]:
-        wb = load_workbook(xlsx_file_name)
+    def get_main_sheet(self, workbook, xlsx_file_name):
+        fingerprint = ExcelLoader.file_fingerprint(xlsx_file_name)
+        main_sheet = ExcelLoader.main_sheet_cache.get(fingerprint)
+
+        # re-imports of an unchanged file skip the scan entirely
+        if main_sheet is None or main_sheet not in workbook.sheetnames:
+            main_sheet = self.find_main_sheet(workbook)
+            ExcelLoader.main_sheet_cache[fingerprint] = main_sheet
+            if len(ExcelLoader.main_sheet_cache) > ExcelLoader.MAIN_SHEET_CACHE_SIZE:
+                ExcelLoader.main_sheet_cache.popitem(last=False)  # least recently used
+        else:
+            ExcelLoader.main_sheet_cache.move_to_end(fingerprint)
+
+        return main_sheet
+
+    def count_patients(self, xlsx_file_name):
+        # taken from the dimensions declared by the sheet, without parsing any row:
+        # None when the file does not declare them
+        wb = load_workbook(xlsx_file_name, read_only=True)
+        try:
+            max_row = wb[self.get_main_sheet(wb, xlsx_file_name)].max_row
+        finally:
+            wb.close()
+
+        if max_row is None:
+            return None
+        return max(max_row - 1, 0)  # header excluded
+
+    def iter_patient_fields(self, xlsx_file_name) -> Iterator[tuple]:
+        # read-only mode streams rows straight from the archive,
+        # so memory stays bounded whatever the size of the sheet
+        wb = load_workbook(xlsx_file_name, read_only=True)
         wb.iso_dates = True
-        main_sheet = self.find_main_sheet(wb)
-        active_sheet = wb[main_sheet]
-        patients = []
-        rows = list(active_sheet.values)
-        for row in rows[1:]:  # skip header
-            if ExcelLoader.has_none_fields(row):
-                raise InvalidRow("Row contains at least one None value among its fields.")
-
-            name = row[ExcelIndex.NAME.value].strip()
-            surname = row[ExcelIndex.SURNAME.value].strip()
-            services = row[ExcelIndex.SERVICES.value].strip()
-            anesthesia = row[ExcelIndex.ANESTHESIA.value].lower() == "true"
-            infectious = row[ExcelIndex.INFECTIOUS.value].lower() == "true"
-            list_insertion_date = row[ExcelIndex.LIST_INSERTION_DATE.value]
-
-            patients.append(Patient(name,
-                                    surname,
-                                    services,
-                                    anesthesia,
-                                    infectious,
-                                    list_insertion_date))
-
-        return patients
+        try:
+            main_sheet = self.get_main_sheet(wb, xlsx_file_name)
+            for row in wb[main_sheet].iter_rows(min_row=2,  # skip header
+                                                max_col=len(ExcelIndex),
+                                                values_only=True):
+                yield ExcelLoader.parse_row(row)
+        finally:
+            wb.close()
+
+    def iter_patients(self, xlsx_file_name) -> Iterator[Patient]:
+        for fields in self.iter_patient_fields(xlsx_file_name):
+            yield Patient(*fields)
+
+    def load_patients(self, xlsx_file_name) -> list[Patient]:
+        return list(self.iter_patients(xlsx_file_name))
+
+    def load_patient_table(self, xlsx_file_name, progress=None, catalog=None) -> PatientTable:
+        # rows are written straight into the table's columns, no Patient object is built
+        # service codes are parsed and indexed here, once, while the table is filled
+        # progress, if given, is called with the number of rows loaded so far every PROGRESS_STEP rows
+        # and may raise in order to abort the loading
+        # durations of the services come from catalog, looked up once per row as well
+        table = PatientTable(catalog=catalog)
+        for fields in self.iter_patient_fields(xlsx_file_name):
+            try:
+                table.append(*fields)
+            except ValueError:
+                raise InvalidRow("Row contains at least one invalid service code or date.")
+
+            if progress is not None and len(table) % ExcelLoader.PROGRESS_STEP == 0:
+                progress(len(table))
+
+        if progress is not None:
+            progress(len(table))
+        return table
@@ -1,26 +1,28 @@
+import datetime
+import os
 import sys
 import tkinter as tk
 from PIL import Image
 from tkinter import filedialog
 import pandas
+import numpy as np
 import customtkinter as ctk
-from bootstraptable import Table, FitCriterion
+from src.background import BackgroundTask
+from src.bootstraptable import Table, FitCriterion
+from src.excel_exporter import ExcelExporter
+from src.excel_loader import ExcelLoader
+from src.model import PatientTable, parse_services
+from src.model_cache import ModelCache, PlanningModel, model_fingerprint
+from src.patient_summary import PatientSummary
+from src.planning import Resources
+from src.replanning import PlanningSnapshot, patch_plan
+from src.service_catalog import InvalidCatalog, ServiceCatalog
+from src.telemetry import BatchedWriter, SolverTelemetry
+from src.solver_engine import SolverEngine, SolverSettings
+from src.table_filter import TableIndex
 import pandas as pd
 
 
-class StdoutRedirector(object):
-
-    def __init__(self, text_widget):
-        self.text_space = text_widget
-
-    def write(self, string):
-        self.text_space.insert("end", string)
-        self.text_space.see("end")
-
-    def flush(self):
-        pass
-
-
 class EntryWithLabel(ctk.CTkFrame):
 
     def __init__(self, master, frame_color, label_text, label_color, label_text_color, entry_color, entry_width=200, label_width=10, font=("Source Sans Pro", 14)):
@@ -48,9 +50,179 @@ class EntryWithLabel(ctk.CTkFrame):
         self.entry.pack(side=tk.LEFT)
 
 
+class ProgressFrame(ctk.CTkFrame):
+
+    def __init__(self, master, frame_color, text_color, progress_color, button_color, button_hover_color, cancel_command, font=("Source Sans Pro", 14)):
+        super(ProgressFrame, self).__init__(master=master,
+                                            fg_color=frame_color)
+
+        self.label = ctk.CTkLabel(master=self,
+                                  text="",
+                                  anchor=tk.W,
+                                  text_color=text_color,
+                                  font=font)
+        self.progress_bar = ctk.CTkProgressBar(master=self,
+                                               width=400,
+                                               progress_color=progress_color,
+                                               mode="determinate")
+        self.cancel_button = ctk.CTkButton(master=self,
+                                           text="Annulla",
+                                           command=cancel_command,
+                                           fg_color=button_color,
+                                           hover_color=button_hover_color,
+                                           font=font,
+                                           text_color="#FFFFFF",
+                                           width=100,
+                                           corner_radius=3)
+        self.progress_bar.set(0)
+
+        self.label.pack(side=tk.TOP, anchor=tk.W, pady=(0, 5))
+        self.progress_bar.pack(side=tk.TOP, anchor=tk.W, pady=(0, 10))
+        self.cancel_button.pack(side=tk.TOP, anchor=tk.E)
+
+    def set_progress(self, text, fraction=None):
+        self.label.configure(text=text)
+
+        # an unknown total is shown as an indeterminate bar
+        if fraction is None:
+            if self.progress_bar.cget("mode") != "indeterminate":
+                self.progress_bar.configure(mode="indeterminate")
+                self.progress_bar.start()
+        else:
+            self.progress_bar.set(fraction)
+
+    def destroy(self):
+        # the indeterminate animation must not outlive the bar
+        self.progress_bar.stop()
+        super(ProgressFrame, self).destroy()
+
+
+class FilterBar(ctk.CTkFrame):
+    # Search bar of a table: words looked up among names and surnames, a range of dates and the anesthesia and
+    # infection flags. The table pages over the matching rows; its TableIndex is built by the first search, and
+    # again after its rows change, only while a search is active.
+
+    DATE_FORMAT = "%d/%m/%Y"
+    SEARCH_DELAY = 200  # ms
+    TEXT_COLUMNS = ("Nome", "Cognome")
+    DATE_COLUMNS = ("Data inserimento in lista", "Data")  # patient lists, plans
+    FLAG_COLUMNS = ("Anestesia", "Infezioni")
+
+    def __init__(self, master, table, frame_color, label_color, label_text_color, entry_color, checkboxes_color, checkmarks_color, font=("Source Sans Pro", 14)):
+        super(FilterBar, self).__init__(master=master,
+                                        fg_color=frame_color)
+        self.table = table
+        self.index = None
+        self.search_job = None
+
+        self.text_entry = EntryWithLabel(self,
+                                         label_text="Cerca",
+                                         frame_color=frame_color,
+                                         label_color=label_color,
+                                         label_text_color=label_text_color,
+                                         entry_color=entry_color,
+                                         font=font)
+        self.start_entry = EntryWithLabel(self,
+                                          label_text="Dal",
+                                          frame_color=frame_color,
+                                          label_color=label_color,
+                                          label_text_color=label_text_color,
+                                          entry_color=entry_color,
+                                          entry_width=100,
+                                          font=font)
+        self.end_entry = EntryWithLabel(self,
+                                        label_text="Al",
+                                        frame_color=frame_color,
+                                        label_color=label_color,
+                                        label_text_color=label_text_color,
+                                        entry_color=entry_color,
+                                        entry_width=100,
+                                        font=font)
+
+        self.anesthesia = tk.BooleanVar(value=False)
+        self.infections = tk.BooleanVar(value=False)
+        anesthesia_checkbox = ctk.CTkCheckBox(master=self,
+                                              variable=self.anesthesia,
+                                              command=self.schedule_search,
+                                              border_color="gray90",
+                                              border_width=1,
+                                              hover=False,
+                                              text="Con anestesia",
+                                              text_color=label_text_color,
+                                              font=font,
+                                              checkmark_color=checkmarks_color,
+                                              fg_color=checkboxes_color)
+        infections_checkbox = ctk.CTkCheckBox(master=self,
+                                              variable=self.infections,
+                                              command=self.schedule_search,
+                                              border_color="gray90",
+                                              border_width=1,
+                                              hover=False,
+                                              text="Con infezioni in atto",
+                                              text_color=label_text_color,
+                                              font=font,
+                                              checkmark_color=checkmarks_color,
+                                              fg_color=checkboxes_color)
+
+        # every keystroke reschedules the search: only the last one runs it
+        for entry in (self.text_entry, self.start_entry, self.end_entry):
+            entry.entry_variable.trace_add("write", lambda *args: self.schedule_search())
+
+        self.text_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.start_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.end_entry.pack(side=tk.LEFT, padx=(0, 20))
+        anesthesia_checkbox.pack(side=tk.LEFT, anchor=tk.S, padx=(0, 10))
+        infections_checkbox.pack(side=tk.LEFT, anchor=tk.S)
+
+    def schedule_search(self):
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY, self.search)
+
+    def search(self):
+        self.search_job = None
+        self.table.filter_rows(self.matching_rows(self.table.data_frame))
+
+    def set_data_frame(self, data_frame):
+        # rows changed: the indexes are stale
+        self.index = None
+        self.table.set_data_frame(data_frame, filtered_rows=self.matching_rows(data_frame))
+
+    def parse_date(self, entry):
+        # dates still being typed are ignored
+        try:
+            return datetime.datetime.strptime(entry.entry_variable.get().strip(), self.DATE_FORMAT)
+        except ValueError:
+            return None
+
+    def matching_rows(self, data_frame):
+        text = self.text_entry.entry_variable.get().strip()
+        start = self.parse_date(self.start_entry)
+        end = self.parse_date(self.end_entry)
+        flags = tuple(column for column, variable in zip(self.FLAG_COLUMNS, (self.anesthesia, self.infections))
+                      if variable.get())
+        if not text and start is None and end is None and not flags:
+            return None
+
+        if self.index is None:
+            date_column = next((column for column in self.DATE_COLUMNS if column in data_frame.columns), None)
+            self.index = TableIndex(data_frame, self.TEXT_COLUMNS, date_column, self.FLAG_COLUMNS)
+        return self.index.search(text, start, end, flags)
+
+
 class InsertionDialog():
 
-    def __init__(self, frame_color, section_font, elements_font, labels_color, labels_text_color, entries_color, checkboxes_color, checkmarks_color):
+    DATE_FORMAT = "%d/%m/%Y"
+
+    def __init__(self, frame_color, section_font, elements_font, labels_color, labels_text_color, entries_color, checkboxes_color, checkmarks_color, on_confirm=None, patient=None):
+        """Dialog for inserting a new patient or editing an existing one.
+
+        Args:
+            on_confirm (callable, optional): Called with the patient's row, in the columns order of the input tables,
+                once the user confirms valid data.
+            patient (tuple, optional): Row of the patient being edited, used to fill in the fields. Defaults to None.
+        """
+        self.on_confirm = on_confirm
         self.dialog = ctk.CTkToplevel(fg_color=frame_color)
 
         dialog_frame = ctk.CTkFrame(master=self.dialog,
@@ -75,6 +247,13 @@ class InsertionDialog():
                                        label_text_color=labels_text_color,
                                        entry_color=entries_color)
 
+        services_entry = EntryWithLabel(dialog_frame,
+                                        label_text="Prestazioni",
+                                        frame_color=frame_color,
+                                        label_color=labels_color,
+                                        label_text_color=labels_text_color,
+                                        entry_color=entries_color)
+
         planning_label = ctk.CTkLabel(master=dialog_frame,
                                       text="Pianificazione",
                                       font=section_font,
@@ -89,8 +268,8 @@ class InsertionDialog():
             label_text_color=labels_text_color,
             entry_color=entries_color)
 
-        anesthesia = tk.BooleanVar(False)
-        infections = tk.BooleanVar(False)
+        anesthesia = tk.BooleanVar(value=False)
+        infections = tk.BooleanVar(value=False)
 
         anesthesia_checkbox = ctk.CTkCheckBox(master=dialog_frame,
                                               variable=anesthesia,
@@ -120,7 +299,24 @@ class InsertionDialog():
                                        font=elements_font,
                                        text_color="#FFFFFF",
                                        width=100,
-                                       corner_radius=3)
+                                       corner_radius=3,
+                                       command=self.confirm)
+
+        self.name_entry = name_entry
+        self.surname_entry = surname_entry
+        self.services_entry = services_entry
+        self.waiting_list_date_entry = waiting_list_date_entry
+        self.anesthesia = anesthesia
+        self.infections = infections
+
+        if patient is not None:
+            name, surname, services, anesthesia_flag, infections_flag, list_insertion_date = patient
+            name_entry.entry_variable.set(name)
+            surname_entry.entry_variable.set(surname)
+            services_entry.entry_variable.set(services)
+            waiting_list_date_entry.entry_variable.set(pd.Timestamp(list_insertion_date).strftime(self.DATE_FORMAT))
+            anesthesia.set(str(anesthesia_flag).lower() == "true")
+            infections.set(str(infections_flag).lower() == "true")
 
         dialog_frame.pack()
 
@@ -134,7 +330,11 @@ class InsertionDialog():
         surname_entry.pack(side=tk.TOP,
                            anchor=tk.W,
                            padx=(20, 20),
-                           pady=(0, 20))
+                           pady=(0, 5))
+        services_entry.pack(side=tk.TOP,
+                            anchor=tk.W,
+                            padx=(20, 20),
+                            pady=(0, 20))
 
         planning_label.pack(side=tk.TOP, anchor=tk.W, padx=(20, 0))
         waiting_list_date_entry.pack(side=tk.TOP,
@@ -154,12 +354,48 @@ class InsertionDialog():
                             padx=(0, 20),
                             pady=(0, 20))
 
+    def confirm(self):
+        name = self.name_entry.entry_variable.get().strip()
+        surname = self.surname_entry.entry_variable.get().strip()
+        services = self.services_entry.entry_variable.get().strip()
+        if not name or not surname or not services:
+            print("Name, surname and services are required.")
+            return
+
+        try:
+            parse_services(services)
+            list_insertion_date = datetime.datetime.strptime(self.waiting_list_date_entry.entry_variable.get().strip(),
+                                                             self.DATE_FORMAT)
+        except ValueError as exception:
+            print("Invalid patient data: " + str(exception))
+            return
+
+        row = (name,
+               surname,
+               services,
+               "true" if self.anesthesia.get() else "false",
+               "true" if self.infections.get() else "false",
+               pd.Timestamp(list_insertion_date))
+
+        self.dialog.destroy()
+        if self.on_confirm is not None:
+            self.on_confirm(row)
+
 
 class GUI(object):
 
     # constants
     EXCEL_FILE = "File Excel"
-    ODF_FILE = "ODF Spreadsheet (.odf)"
+    SOLVER_POLL_INTERVAL = 200  # ms
+    SUMMARY_UPDATE_DELAY = 150  # ms
+    SERVICE_CATALOG_FILE = "resources/service_catalog.csv"
+    METHOD_NAMES = {
+        SolverSettings.AUTOMATIC: "automatico",
+        SolverSettings.EXACT: "esatto",
+        SolverSettings.LOCAL_SEARCH: "ricerca locale",
+        SolverSettings.ROLLING_HORIZON: "orizzonte mobile",
+    }
+    ODF_FILE = "ODF Spreadsheet (.ods)"
 
     WHITE = "#FFFFFF"
     BLACK = "#000000"
@@ -204,7 +440,30 @@ class GUI(object):
         self.planning_number = 0
         self.tabs = 0
 
-        self.tables = []
+        # input tables and their search bars, keyed by the name of their tab
+        self.tables = {}
+        self.filter_bars = {}
+
+        # running imports, keyed by the name of the tab they are going to fill
+        self.import_tasks = {}
+
+        # tabs holding a computed planning rather than a patient list
+        self.planning_tabs = set()
+
+        # aggregates of each patient list, shown in the summary panel
+        self.summaries = {}
+        self.summary_update_job = None
+
+        self.resources = Resources()
+        self.solver_settings = SolverSettings()
+        self.solver_engine = SolverEngine()
+        self.model_cache = ModelCache()
+        self.solver_telemetry = SolverTelemetry()
+        self.service_catalog = self.load_service_catalog()
+        self.solver_run = None  # name of the planned tab, its patients and their keys
+
+        # last planning computed for each patient list, patched when the list changes
+        self.last_plans = {}
 
         self.initializeUI()
 
@@ -238,32 +497,57 @@ class GUI(object):
                            padx=(20, right_x_pad),
                            pady=(20, 0))
 
-        total_patients_label = ctk.CTkLabel(master=self.summary_frame,
-                                            fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
-                                            text="Pazienti totali: ",
-                                            font=self.SOURCE_SANS_PRO_SMALL)
-        total_patients_label.pack(side=tk.TOP,
-                                  anchor=tk.W,
-                                  padx=(20, right_x_pad),
-                                  pady=(0, 0))
-
-        total_anesthesia_patients_label = ctk.CTkLabel(master=self.summary_frame,
-                                                       fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
-                                                       text="Pazienti con anestesia: ",
-                                                       font=self.SOURCE_SANS_PRO_SMALL)
-        total_anesthesia_patients_label.pack(side=tk.TOP,
-                                             anchor=tk.W,
-                                             padx=(20, right_x_pad),
-                                             pady=(0, 0))
-
-        total_infectious_patients_label = ctk.CTkLabel(master=self.summary_frame,
-                                                       fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
-                                                       text="Pazienti con infezioni in atto: ",
-                                                       font=self.SOURCE_SANS_PRO_SMALL)
-        total_infectious_patients_label.pack(side=tk.TOP,
-                                             anchor=tk.W,
-                                             padx=(20, right_x_pad),
-                                             pady=(0, 0))
+        self.total_patients_label = ctk.CTkLabel(master=self.summary_frame,
+                                                 fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                 text="Pazienti totali: ",
+                                                 font=self.SOURCE_SANS_PRO_SMALL)
+        self.total_patients_label.pack(side=tk.TOP,
+                                       anchor=tk.W,
+                                       padx=(20, right_x_pad),
+                                       pady=(0, 0))
+
+        self.total_anesthesia_patients_label = ctk.CTkLabel(master=self.summary_frame,
+                                                            fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                            text="Pazienti con anestesia: ",
+                                                            font=self.SOURCE_SANS_PRO_SMALL)
+        self.total_anesthesia_patients_label.pack(side=tk.TOP,
+                                                  anchor=tk.W,
+                                                  padx=(20, right_x_pad),
+                                                  pady=(0, 0))
+
+        self.total_infectious_patients_label = ctk.CTkLabel(master=self.summary_frame,
+                                                            fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                            text="Pazienti con infezioni in atto: ",
+                                                            font=self.SOURCE_SANS_PRO_SMALL)
+        self.total_infectious_patients_label.pack(side=tk.TOP,
+                                                  anchor=tk.W,
+                                                  padx=(20, right_x_pad),
+                                                  pady=(0, 0))
+        self.median_waiting_label = ctk.CTkLabel(master=self.summary_frame,
+                                                 fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                 text="Attesa mediana: ",
+                                                 font=self.SOURCE_SANS_PRO_SMALL)
+        self.median_waiting_label.pack(side=tk.TOP,
+                                       anchor=tk.W,
+                                       padx=(20, right_x_pad),
+                                       pady=(0, 0))
+        self.longest_waiting_label = ctk.CTkLabel(master=self.summary_frame,
+                                                  fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                  text="Attesa al 90° percentile: ",
+                                                  font=self.SOURCE_SANS_PRO_SMALL)
+        self.longest_waiting_label.pack(side=tk.TOP,
+                                        anchor=tk.W,
+                                        padx=(20, right_x_pad),
+                                        pady=(0, 0))
+        self.top_services_label = ctk.CTkLabel(master=self.summary_frame,
+                                               fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                               text="Prestazioni più richieste: ",
+                                               justify=tk.LEFT,
+                                               font=self.SOURCE_SANS_PRO_SMALL)
+        self.top_services_label.pack(side=tk.TOP,
+                                     anchor=tk.W,
+                                     padx=(20, right_x_pad),
+                                     pady=(0, 0))
 
         solver_label = ctk.CTkLabel(master=self.summary_frame,
                                      fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
@@ -274,22 +558,64 @@ class GUI(object):
                            padx=(20, right_x_pad),
                            pady=(20, 0))
 
-        gap_label = ctk.CTkLabel(master=self.summary_frame,
+        self.gap_label = ctk.CTkLabel(master=self.summary_frame,
                                                        fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
-                                                       text="Gap (%): ",
+                                                       text="Gap (%): {0:g}".format(self.solver_settings.gap * 100),
                                                        font=self.SOURCE_SANS_PRO_SMALL)
-        gap_label.pack(side=tk.TOP,
+        self.gap_label.pack(side=tk.TOP,
                                              anchor=tk.W,
                                              padx=(20, right_x_pad),
                                              pady=(0, 0))
-        time_limit_label = ctk.CTkLabel(master=self.summary_frame,
+        self.time_limit_label = ctk.CTkLabel(master=self.summary_frame,
                                                        fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
-                                                       text="Timeout (s): ",
+                                                       text="Timeout (s): {0:g}".format(self.solver_settings.timeout),
                                                        font=self.SOURCE_SANS_PRO_SMALL)
-        time_limit_label.pack(side=tk.TOP,
+        self.time_limit_label.pack(side=tk.TOP,
                                              anchor=tk.W,
                                              padx=(20, right_x_pad),
                                              pady=(0, 0))
+        self.method_label = ctk.CTkLabel(master=self.summary_frame,
+                                         fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                         text="Metodo: " + self.METHOD_NAMES[self.solver_settings.method],
+                                         font=self.SOURCE_SANS_PRO_SMALL)
+        self.method_label.pack(side=tk.TOP,
+                               anchor=tk.W,
+                               padx=(20, right_x_pad),
+                               pady=(0, 0))
+        self.workers_label = ctk.CTkLabel(master=self.summary_frame,
+                                          fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                          text="Processi: " + ("automatico" if self.solver_settings.workers is None
+                                                               else str(self.solver_settings.workers)),
+                                          font=self.SOURCE_SANS_PRO_SMALL)
+        self.workers_label.pack(side=tk.TOP,
+                                anchor=tk.W,
+                                padx=(20, right_x_pad),
+                                pady=(0, 0))
+
+        progress_label = ctk.CTkLabel(master=self.summary_frame,
+                                      fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                      text="Avanzamento pianificazione",
+                                      font=self.SOURCE_SANS_PRO_MEDIUM_BOLD)
+        progress_label.pack(side=tk.TOP,
+                            anchor=tk.W,
+                            padx=(20, right_x_pad),
+                            pady=(20, 0))
+        self.solver_progress_bar = ctk.CTkProgressBar(master=self.summary_frame,
+                                                      progress_color=self.CRAYON_BLUE)
+        self.solver_progress_bar.set(0)
+        self.solver_progress_bar.pack(side=tk.TOP,
+                                      anchor=tk.W,
+                                      padx=(20, 20),
+                                      pady=(5, 5))
+        self.solver_progress_label = ctk.CTkLabel(master=self.summary_frame,
+                                                  fg_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                                  text=self.solver_telemetry.text(),
+                                                  justify=tk.LEFT,
+                                                  font=self.SOURCE_SANS_PRO_SMALL)
+        self.solver_progress_label.pack(side=tk.TOP,
+                                        anchor=tk.W,
+                                        padx=(20, right_x_pad),
+                                        pady=(0, 0))
 
     def create_toolbar(self):
 
@@ -309,6 +635,11 @@ class GUI(object):
                                    self.export_callback,
                                    text="Esporta in file Excel",
                                    )
+        self.create_toolbar_button("resources/export.png",
+                                   "resources/export_w.png",
+                                   self.export_all_callback,
+                                   text="Esporta tutte le schede",
+                                   )
         self.close_tab_button = self.create_toolbar_button("resources/delete.png",
                                                            "resources/delete_w.png",
                                                            self.close_active_tab,
@@ -330,6 +661,13 @@ class GUI(object):
                                    state=tk.NORMAL,
                                    )
 
+        self.create_toolbar_button("resources/delete.png",
+                                   "resources/delete_w.png",
+                                   self.remove_patient,
+                                   text="Rimuovi paziente selezionato",
+                                   state=tk.NORMAL,
+                                   )
+
         self.create_toolbar_button("resources/run.png",
                                    "resources/run_w.png",
                                    self.launch_solver,
@@ -355,19 +693,175 @@ class GUI(object):
         if self.theme == "light":
             self.theme = "dark"
             ctk.set_appearance_mode("dark")
-            for table in self.tables:
+            for table in self.tables.values():
                 table.switch_theme("dark")
         else:
             self.theme = "light"
             ctk.set_appearance_mode("light")
-            for table in self.tables:
+            for table in self.tables.values():
                 table.switch_theme("light")
 
     def launch_solver(self):
-        pass
+        if self.solver_engine.running:
+            print("A planning is already being computed.")
+            return
+
+        tab_name = self.notebook.get()
+        if tab_name not in self.tables or tab_name in self.planning_tabs:
+            print("Select a patient list in order to compute its planning.")
+            return
+
+        data_frame = self.tables[tab_name].data_frame
+        self.resources.start_date = datetime.date.today()
+        # runs on an unchanged list, e.g. with other solver settings, reuse the model built the first time
+        model = self.model_cache.get_or_build(model_fingerprint(data_frame, self.resources, self.service_catalog),
+                                              lambda: PlanningModel(self.build_patient_table(data_frame,
+                                                                                             self.service_catalog),
+                                                                    self.resources))
+        patient_table, keys, instance = model.patient_table, model.keys, model.instance
+
+        # the solver runs in its own process: this only waits for its events
+        snapshot = self.last_plans.get(tab_name)
+        if snapshot is None:
+            fixed = None
+            self.solver_engine.start(instance, self.solver_settings, initial_plan=model.greedy_plan)
+            print("Planning " + tab_name + " (" + str(len(patient_table)) + " patients)...")
+        else:
+            # only patients whose session changed are placed again, starting from the previous planning
+            initial_plan, free = patch_plan(snapshot, keys, instance)
+            fixed = ~free
+            self.solver_engine.start(instance, self.solver_settings, initial_plan=initial_plan, fixed=fixed)
+            print("Replanning " + tab_name + " (" + str(int(free.sum())) + " of " + str(len(patient_table)) +
+                  " patients to place)...")
+        print("Method: {0}, {1} processes.".format(self.solver_settings.choose_method(instance, fixed),
+                                                   self.solver_settings.worker_count(instance, fixed)))
+        self.solver_run = (tab_name, patient_table, keys)
+        self.solver_telemetry.start(self.solver_settings.timeout)
+        self.render_solver_progress()
+
+        self.master.after(self.SOLVER_POLL_INTERVAL, self.poll_solver)
 
     def stop_solver(self):
-        pass
+        if not self.solver_engine.running:
+            return
+
+        self.solver_engine.stop()
+        print("Stopping the planning...")
+
+    def load_service_catalog(self):
+        # without a catalog every service takes the default duration
+        if not os.path.exists(self.SERVICE_CATALOG_FILE):
+            return ServiceCatalog()
+        try:
+            return ServiceCatalog.load(self.SERVICE_CATALOG_FILE)
+        except (InvalidCatalog, OSError, ValueError) as exception:
+            print("Service catalog not loaded: " + str(exception))
+            return ServiceCatalog()
+
+    @staticmethod
+    def build_patient_table(data_frame, catalog=None):
+        # input tables keep the columns of the imported sheets, in the same order
+        patient_table = PatientTable(capacity=data_frame.shape[0], catalog=catalog)
+        patient_table.extend(ExcelLoader.parse_row(row) for row in data_frame.itertuples(index=False, name=None))
+        return patient_table
+
+    def poll_solver(self):
+        # incumbents and bounds only update the progress display, the log gets the outcome of the run
+        for event, payload in self.solver_engine.poll():
+            if event in ("incumbent", "progress"):
+                self.solver_telemetry.push(event, payload)
+            elif event == "done":
+                self.solver_telemetry.finish()
+                self.complete_planning(payload)
+            elif event == "error":
+                self.solver_telemetry.finish()
+                print("Planning failed: " + payload)
+            elif event == "killed":
+                self.solver_telemetry.finish()
+                print("Planning interrupted: the solver did not stop in time.")
+
+        if self.solver_telemetry.render_due():
+            self.render_solver_progress()
+
+        if self.solver_engine.busy:
+            self.master.after(self.SOLVER_POLL_INTERVAL, self.poll_solver)
+
+    def schedule_summary_update(self):
+        # a burst of edits, or of tab switches, refreshes the labels once
+        if self.summary_update_job is not None:
+            self.master.after_cancel(self.summary_update_job)
+        self.summary_update_job = self.master.after(self.SUMMARY_UPDATE_DELAY, self.update_summary_labels)
+
+    def update_summary_labels(self):
+        self.summary_update_job = None
+        summary = self.summaries.get(self.notebook.get())
+        if summary is None:
+            self.total_patients_label.configure(text="Pazienti totali: ")
+            self.total_anesthesia_patients_label.configure(text="Pazienti con anestesia: ")
+            self.total_infectious_patients_label.configure(text="Pazienti con infezioni in atto: ")
+            self.median_waiting_label.configure(text="Attesa mediana: ")
+            self.longest_waiting_label.configure(text="Attesa al 90° percentile: ")
+            self.top_services_label.configure(text="Prestazioni più richieste: ")
+            return
+
+        today = datetime.date.today()
+        median_waiting = summary.waiting_days(0.5, today)
+        longest_waiting = summary.waiting_days(0.9, today)
+        self.total_patients_label.configure(text="Pazienti totali: " + str(summary.total))
+        self.total_anesthesia_patients_label.configure(text="Pazienti con anestesia: " + str(summary.anesthesia))
+        self.total_infectious_patients_label.configure(text="Pazienti con infezioni in atto: "
+                                                            + str(summary.infectious))
+        self.median_waiting_label.configure(text="Attesa mediana: " + (
+            "-" if median_waiting is None else "{0} giorni".format(median_waiting)))
+        self.longest_waiting_label.configure(text="Attesa al 90° percentile: " + (
+            "-" if longest_waiting is None else "{0} giorni".format(longest_waiting)))
+        self.top_services_label.configure(text="Prestazioni più richieste: " + ", ".join(
+            "{0} ({1})".format(code, patients) for code, patients in summary.top_services()))
+
+    def render_solver_progress(self):
+        progress = self.solver_telemetry.progress()
+        self.solver_progress_bar.set(progress if progress is not None else 0)
+        self.solver_progress_label.configure(text=self.solver_telemetry.text())
+        self.solver_telemetry.rendered()
+
+    def complete_planning(self, result):
+        tab_name, patient_table, keys = self.solver_run
+        self.solver_run = None
+
+        if tab_name in self.tables:
+            self.last_plans[tab_name] = PlanningSnapshot(keys, result.plan, self.resources.start_date)
+
+        print("Planning of {0} completed ({1}): cost {2}, gap {3:.2%}, {4:.1f} s.".format(tab_name,
+                                                                                     result.status.value,
+                                                                                     result.cost,
+                                                                                     result.gap,
+                                                                                     result.elapsed))
+
+        planning_tab_name = "Pianificazione " + str(self.planning_number)
+        planning_tab = self.notebook.add(planning_tab_name)
+        self.planning_number += 1
+
+        self.initialize_input_table(tab_name=planning_tab_name,
+                                    input_tab=planning_tab,
+                                    data_frame=self.plan_data_frame(patient_table, result.plan))
+        self.planning_tabs.add(planning_tab_name)
+        self.notebook.set(planning_tab_name)
+
+    def plan_data_frame(self, patient_table, plan):
+        # scheduled patients only, session by session in treatment order
+        scheduled = np.flatnonzero(plan.scheduled)
+        scheduled = scheduled[np.lexsort((plan.order[scheduled], plan.room[scheduled], plan.day[scheduled]))]
+
+        return pandas.DataFrame(data={
+            "Data": [self.resources.day_date(day) for day in plan.day[scheduled]],
+            "Sala": plan.room[scheduled] + 1,
+            "Ordine": plan.order[scheduled] + 1,
+            "Nome": patient_table.decode("name")[scheduled],
+            "Cognome": patient_table.decode("surname")[scheduled],
+            "Prestazioni": patient_table.decode("services")[scheduled],
+            "Anestesia": np.where(patient_table.anesthesia[scheduled], "true", "false"),
+            "Infezioni": np.where(patient_table.infectious[scheduled], "true", "false"),
+        })
 
     def create_toolbar_button(self,
                               theme1_icon_path,
@@ -405,7 +899,27 @@ class GUI(object):
     def hover_button(self, event):
         print(event.widget)
 
+    def get_active_patient_list(self):
+        tab_name = self.notebook.get()
+        if tab_name not in self.tables or tab_name in self.planning_tabs:
+            print("Select a patient list first.")
+            return None
+        return self.tables[tab_name]
+
     def add_patient(self):
+        table = self.get_active_patient_list()
+        if table is None:
+            return
+
+        summary = self.summaries[self.notebook.get()]
+        filter_bar = self.filter_bars[self.notebook.get()]
+
+        def insert_patient(row):
+            new_row = pandas.DataFrame([row], columns=table.data_frame.columns)
+            filter_bar.set_data_frame(pandas.concat([table.data_frame, new_row], ignore_index=True))
+            summary.add(row)
+            self.schedule_summary_update()
+
         dialog = InsertionDialog(frame_color=(self.WHITE, self.THEME2_COLOR2),
                                  section_font=self.SOURCE_SANS_PRO_MEDIUM,
                                  elements_font=self.SOURCE_SANS_PRO_SMALL,
@@ -413,9 +927,28 @@ class GUI(object):
                                  labels_text_color=(self.BLACK, self.WHITE),
                                  entries_color=(self.THEME1_COLOR1, self.THEME2_COLOR1),
                                  checkmarks_color=self.WHITE,
-                                 checkboxes_color=self.CRAYON_BLUE)
+                                 checkboxes_color=self.CRAYON_BLUE,
+                                 on_confirm=insert_patient)
 
     def edit_patient(self):
+        table = self.get_active_patient_list()
+        if table is None:
+            return
+        if table.selected_row is None:
+            print("Select the patient to edit first.")
+            return
+
+        selected_row = table.selected_data_row
+        summary = self.summaries[self.notebook.get()]
+        filter_bar = self.filter_bars[self.notebook.get()]
+
+        def update_patient(row):
+            data_frame = table.data_frame.copy()
+            summary.replace(tuple(data_frame.iloc[selected_row]), row)
+            data_frame.iloc[selected_row] = row
+            filter_bar.set_data_frame(data_frame)
+            self.schedule_summary_update()
+
         dialog = InsertionDialog(frame_color=(self.WHITE, self.THEME2_COLOR2),
                                  section_font=self.SOURCE_SANS_PRO_MEDIUM,
                                  elements_font=self.SOURCE_SANS_PRO_SMALL,
@@ -423,12 +956,42 @@ class GUI(object):
                                  labels_text_color=(self.BLACK, self.WHITE),
                                  entries_color=(self.THEME1_COLOR1, self.THEME2_COLOR1),
                                  checkmarks_color=self.WHITE,
-                                 checkboxes_color=self.CRAYON_BLUE)
+                                 checkboxes_color=self.CRAYON_BLUE,
+                                 on_confirm=update_patient,
+                                 patient=tuple(table.data_frame.iloc[selected_row]))
+
+    def remove_patient(self):
+        table = self.get_active_patient_list()
+        if table is None:
+            return
+        if table.selected_row is None:
+            print("Select the patient to remove first.")
+            return
+
+        selected_row = table.selected_data_row
+        self.summaries[self.notebook.get()].remove(tuple(table.data_frame.iloc[selected_row]))
+        self.filter_bars[self.notebook.get()].set_data_frame(
+            table.data_frame.drop(index=table.data_frame.index[selected_row]).reset_index(drop=True))
+        self.schedule_summary_update()
 
     def close_active_tab(self):
         active_tab = self.notebook.get()
+
+        # a tab still being imported holds no table yet: the import is just dropped
+        import_task = self.import_tasks.pop(active_tab, None)
+        if import_task is not None:
+            import_task.cancel()
+            self.notebook.delete(active_tab)
+            return
+
         self.notebook.delete(active_tab)
+        self.tables.pop(active_tab, None)
+        self.filter_bars.pop(active_tab, None)
+        self.summaries.pop(active_tab, None)
+        self.planning_tabs.discard(active_tab)
+        self.last_plans.pop(active_tab, None)
         self.tabs -= 1
+        self.schedule_summary_update()
 
         if self.tabs == 0:
             self.close_tab_button.configure(state=tk.DISABLED)
@@ -437,59 +1000,184 @@ class GUI(object):
         pass
 
     def import_callback(self):
-        selected_file = filedialog.askopenfile(
+        file_name = filedialog.askopenfilename(
             filetypes=[(self.EXCEL_FILE,
-                        ["*.xlsx", "*.xls"]), ("Tutti i file", "*.*")])
-        if selected_file is None:
+                        ["*.xlsx"]), ("Tutti i file", "*.*")])
+        if not file_name:
             return
 
-        input_tab = self.notebook.add(
-            "Lista pazienti " + str(self.planning_number))
+        tab_name = "Lista pazienti " + str(self.planning_number)
+        input_tab = self.notebook.add(tab_name)
         self.planning_number += 1
 
-        import_data_frame = pandas.read_excel(selected_file.name)
-        self.initialize_input_table(input_tab=input_tab,
-                                    data_frame=import_data_frame)
+        # parsing runs on a worker thread: only the progress frame and,
+        # at the very end, the input table are touched from here
+        progress_frame = ProgressFrame(master=input_tab,
+                                       frame_color=(self.WHITE, self.THEME2_COLOR2),
+                                       text_color=(self.BLACK, self.WHITE),
+                                       progress_color=self.CRAYON_BLUE,
+                                       button_color=self.CRAYON_BLUE,
+                                       button_hover_color=self.DARK_CRAYON_BLUE,
+                                       cancel_command=lambda: self.cancel_import(tab_name),
+                                       font=self.SOURCE_SANS_PRO_SMALL)
+        progress_frame.pack(side=tk.TOP, anchor=tk.W, padx=(20, 20), pady=(20, 20))
+        progress_frame.set_progress("Apertura del file in corso...")
+
+        self.import_tasks[tab_name] = BackgroundTask(
+            widget=self.master,
+            work=lambda task: self.import_patients(task, file_name),
+            on_progress=lambda imported_rows, total_rows: self.show_import_progress(progress_frame,
+                                                                                    imported_rows,
+                                                                                    total_rows),
+            on_done=lambda result: self.complete_import(tab_name, input_tab, progress_frame, *result),
+            on_error=lambda exception: self.fail_import(tab_name, file_name, exception),
+            on_cancel=lambda: self.fail_import(tab_name, file_name, None)
+        ).start()
+
+    # runs on the import worker thread: no Tk calls allowed here
+    def import_patients(self, task, file_name):
+        loader = ExcelLoader()
+        total_rows = loader.count_patients(file_name)
+
+        def report_progress(imported_rows):
+            task.check_cancelled()
+            task.report_progress(imported_rows, total_rows)
+
+        patient_table = loader.load_patient_table(file_name, progress=report_progress)
+
+        data_frame = pandas.DataFrame(data={
+            "Nome": patient_table.decode("name"),
+            "Cognome": patient_table.decode("surname"),
+            "Prestazioni": patient_table.decode("services"),
+            "Anestesia": np.where(patient_table.anesthesia, "true", "false"),
+            "Infezioni": np.where(patient_table.infectious, "true", "false"),
+            "Data inserimento in lista": patient_table.list_insertion_date,
+        })
+        return data_frame, PatientSummary.from_patient_table(patient_table)
+
+    def show_import_progress(self, progress_frame, imported_rows, total_rows):
+        if total_rows:
+            progress_frame.set_progress("Righe importate: {0} / {1}".format(imported_rows, total_rows),
+                                        min(imported_rows / total_rows, 1))
+        else:
+            progress_frame.set_progress("Righe importate: {0}".format(imported_rows))
+
+    def cancel_import(self, tab_name):
+        import_task = self.import_tasks.get(tab_name)
+        if import_task is not None:
+            import_task.cancel()
+
+    def complete_import(self, tab_name, input_tab, progress_frame, data_frame, summary):
+        # the tab may have been closed in the meantime
+        if self.import_tasks.pop(tab_name, None) is None:
+            return
+
+        progress_frame.destroy()
+        self.initialize_input_table(tab_name=tab_name,
+                                    input_tab=input_tab,
+                                    data_frame=data_frame,
+                                    summary=summary)
+
+    def fail_import(self, tab_name, file_name, exception):
+        if self.import_tasks.pop(tab_name, None) is None:
+            return
+
+        self.notebook.delete(tab_name)
+        if exception is None:
+            print("Import of " + file_name + " cancelled.")
+        else:
+            print("Import of " + file_name + " failed: " + str(exception))
 
     def export_callback(self):
+        active_tab = self.notebook.get()
+        if active_tab not in self.tables:
+            return
+
+        self.export_tables({active_tab: self.tables[active_tab]})
+
+    def export_all_callback(self):
+        if len(self.tables) == 0:
+            return
+
+        # tabs are written in the order they appear in the notebook
+        tab_names = sorted(self.tables, key=self.notebook.index)
+        self.export_tables({tab_name: self.tables[tab_name] for tab_name in tab_names})
+
+    def export_tables(self, tables):
         selected_filetype = tk.StringVar()
-        file_name = filedialog.asksaveasfilename(filetypes=[(self.EXCEL_FILE, ["*.xlsx"]), (self.ODF_FILE, "*.odf*")],
+        file_name = filedialog.asksaveasfilename(filetypes=[(self.EXCEL_FILE, ["*.xlsx"]), (self.ODF_FILE, "*.ods")],
                                                  typevariable=selected_filetype)
-        if selected_filetype.get() == self.EXCEL_FILE:
-            extension = ".xlsx"
-        elif selected_filetype.get() == self.ODF_FILE:
-            extension = ".odf"
-        else:
-            raise Exception("...")
+        if not file_name:
+            return
 
-        file_name += str(extension)
+        if selected_filetype.get() == self.ODF_FILE:
+            extension = ".ods"
+        else:
+            extension = ".xlsx"
 
-        tabs = self.notebook.tabs()
-        current_tab_id = self.notebook.index(self.notebook.select())
+        if not file_name.lower().endswith(extension):
+            file_name += str(extension)
 
-        selected_tab = self.notebook.nametowidget(tabs[current_tab_id])
-        for w in selected_tab.winfo_children():
-            if isinstance(w, Table):
-                table = w
-                break
+        # the worker gets its own copies, so that edits made during the export cannot reach it
+        sheets = {tab_name: table.data_frame.copy() for tab_name, table in tables.items()}
 
-        table.data_frame.to_excel(file_name,
-                                  header=list(table.data_frame.columns),
-                                  index=False  # avoid writing a column of indices
-                                  )
+        progress_frame = ProgressFrame(master=self.summary_frame,
+                                       frame_color=(self.THEME1_COLOR2, self.THEME2_COLOR2),
+                                       text_color=(self.BLACK, self.WHITE),
+                                       progress_color=self.CRAYON_BLUE,
+                                       button_color=self.CRAYON_BLUE,
+                                       button_hover_color=self.DARK_CRAYON_BLUE,
+                                       cancel_command=lambda: export_task.cancel(),
+                                       font=self.SOURCE_SANS_PRO_SMALL)
+        progress_frame.pack(side=tk.BOTTOM, anchor=tk.W, padx=(20, 20), pady=(0, 20))
+        progress_frame.set_progress("Esportazione in corso...")
+
+        export_task = BackgroundTask(
+            widget=self.master,
+            work=lambda task: self.export_sheets(task, file_name, sheets),
+            on_progress=lambda written_rows, total_rows: self.show_export_progress(progress_frame,
+                                                                                   written_rows,
+                                                                                   total_rows),
+            on_done=lambda result: self.complete_export(progress_frame, file_name, None),
+            on_error=lambda exception: self.complete_export(progress_frame, file_name, exception),
+            on_cancel=lambda: self.complete_export(progress_frame, file_name, None, cancelled=True)
+        ).start()
+
+    # runs on an export worker thread: no Tk calls allowed here
+    def export_sheets(self, task, file_name, sheets):
+        def report_progress(written_rows, total_rows):
+            task.check_cancelled()
+            task.report_progress(written_rows, total_rows)
+
+        ExcelExporter().export(file_name, sheets, progress=report_progress)
+
+    def show_export_progress(self, progress_frame, written_rows, total_rows):
+        progress_frame.set_progress("Righe esportate: {0} / {1}".format(written_rows, total_rows),
+                                    written_rows / total_rows if total_rows else 1)
+
+    def complete_export(self, progress_frame, file_name, exception, cancelled=False):
+        progress_frame.destroy()
+
+        if cancelled:
+            print("Export to " + file_name + " cancelled.")
+        elif exception is not None:
+            print("Export to " + file_name + " failed: " + str(exception))
+        else:
+            print("Exported to " + file_name + ".")
 
     def new_planning_callback(self):
-        input_tab = self.notebook.add(
-            "Lista pazienti " + str(self.planning_number))
+        tab_name = "Lista pazienti " + str(self.planning_number)
+        input_tab = self.notebook.add(tab_name)
         self.planning_number += 1
 
-        self.initialize_input_table(input_tab=input_tab, data_frame=None)
+        self.initialize_input_table(tab_name=tab_name, input_tab=input_tab, data_frame=None, summary=PatientSummary())
 
     def create_notebook(self):
         self.notebook = ctk.CTkTabview(self.right_frame,
                                        fg_color=(self.WHITE, self.THEME2_COLOR2),
                                        segmented_button_selected_color=self.CRAYON_BLUE,
                                        segmented_button_selected_hover_color=self.DARK_CRAYON_BLUE,
+                                       command=self.schedule_summary_update
                                        )
         self.notebook.pack(side=tk.TOP,
                            expand=True,
@@ -497,7 +1185,7 @@ class GUI(object):
                            padx=(20, 10),
                            pady=(0, 10))
 
-    def initialize_input_table(self, input_tab, data_frame):
+    def initialize_input_table(self, tab_name, input_tab, data_frame, summary=None):
         if data_frame is None:
             columns = {
                 "Nome": [],
@@ -516,12 +1204,29 @@ class GUI(object):
                       fit_criterion=FitCriterion.FIT_HEADER_AND_COL_MAX_LENGTH,
                       row_separator_width=1,
                       width=1200,
-                      pagination_size=3,
+                      pagination_size=1000,
+                      virtualized=True,
+                      viewport_rows=3,
                       theme=self.theme,
                       even_row_colors=("#ffffff", self.THEME2_COLOR2))
+        filter_bar = FilterBar(master=input_tab,
+                               table=table,
+                               frame_color=(self.WHITE, self.THEME2_COLOR2),
+                               label_color=(self.WHITE, self.THEME2_COLOR2),
+                               label_text_color=(self.BLACK, self.WHITE),
+                               entry_color=(self.THEME1_COLOR1, self.THEME2_COLOR1),
+                               checkboxes_color=self.CRAYON_BLUE,
+                               checkmarks_color=self.WHITE,
+                               font=self.SOURCE_SANS_PRO_SMALL)
+        filter_bar.pack(side=tk.TOP, anchor=tk.W, padx=(0, 0), pady=(0, 10))
         table.pack()
 
-        self.tables.append(table)
+        self.tables[tab_name] = table
+        self.filter_bars[tab_name] = filter_bar
+        # planning tabs have no summary
+        if summary is not None:
+            self.summaries[tab_name] = summary
+            self.schedule_summary_update()
 
         self.tabs += 1
         self.close_tab_button.configure(state=tk.NORMAL)
@@ -537,16 +1242,19 @@ class GUI(object):
                            padx=(20, 10),
                            pady=(10, 20))
 
-        sys.stdout = StdoutRedirector(self.text_box)
+        # prints are inserted in batches: a burst of them costs a single insertion
+        sys.stdout = BatchedWriter(self.text_box)
 
 
-root = ctk.CTk()
-ctk.set_appearance_mode("light")
-root.title("Interventional Radiology Planner & Scheduler")
-root.geometry("{0}x{1}+0+0".format(root.winfo_screenwidth(),
-              root.winfo_screenheight()))
-root.state("zoomed")
+# solver processes import this module again: the window must only be created by the main process
+if __name__ == "__main__":
+    root = ctk.CTk()
+    ctk.set_appearance_mode("light")
+    root.title("Interventional Radiology Planner & Scheduler")
+    root.geometry("{0}x{1}+0+0".format(root.winfo_screenwidth(),
+                  root.winfo_screenheight()))
+    root.state("zoomed")
 
-gui = GUI(root)
+    gui = GUI(root)
 
-root.mainloop()
+    root.mainloop()
@@ -0,0 +1,88 @@
+import numpy as np
+
+from src.planning import Plan
+
+
+class MaxSegmentTree:
+    # max over sessions, answering "first session with at least this value" in O(log n)
+
+    def __init__(self, values):
+        self.size = 1
+        while self.size < len(values):
+            self.size *= 2
+        self.tree = [-1] * (2 * self.size)
+        self.tree[self.size:self.size + len(values)] = values
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def update(self, index, value):
+        node = index + self.size
+        self.tree[node] = value
+        node //= 2
+        while node >= 1:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def first_at_least(self, value):
+        if self.tree[1] < value:
+            return None
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= value else 2 * node + 1
+        return node - self.size
+
+
+class GreedyScheduler:
+    # Constructive heuristic: patients are taken by list insertion date, oldest first, and each goes into the
+    # earliest session with enough minutes left and, if needed, an anesthesia slot left. Patients fitting
+    # no session stay unscheduled. Sessions are looked up in segment trees, so the whole plan costs
+    # O(n log n) for sorting plus O(log s) per patient; infectious patients are moved last by sequencing.
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    def priority_order(self):
+        # waiting days decrease as list insertion dates increase; ties keep the list order
+        return np.argsort(-self.instance.waiting_days, kind="stable")
+
+    def schedule(self, plan=None, patients=None) -> Plan:
+        """Assigns patients to sessions, oldest list insertion first.
+
+        Args:
+            plan (Plan, optional): Partial plan to complete, left untouched; its assignments are kept. Defaults to an empty plan.
+            patients (array, optional): Patients to assign, in order; None for the unscheduled patients of the plan
+                by priority. Defaults to None.
+        """
+        instance = self.instance
+        resources = instance.resources
+        plan = Plan.empty(len(instance)) if plan is None else plan.copy()
+
+        minutes, anesthesia_patients = instance.session_loads(plan)
+        residual = (resources.session_duration - minutes).tolist()
+        anesthesia_left = (resources.max_anesthesia_patients - anesthesia_patients).tolist()
+
+        # sessions out of anesthesia slots are hidden from the second tree
+        sessions = MaxSegmentTree(residual)
+        anesthesia_sessions = MaxSegmentTree([left if slots > 0 else -1
+                                              for left, slots in zip(residual, anesthesia_left)])
+
+        if patients is None:
+            order = self.priority_order()
+            patients = order[~plan.scheduled[order]]
+
+        durations = instance.durations.tolist()
+        anesthesia = instance.anesthesia.tolist()
+        for patient in np.asarray(patients).tolist():
+            duration = durations[patient]
+            session = (anesthesia_sessions if anesthesia[patient] else sessions).first_at_least(duration)
+            if session is None:
+                continue
+
+            plan.day[patient], plan.room[patient] = divmod(session, resources.rooms)
+            residual[session] -= duration
+            anesthesia_left[session] -= anesthesia[patient]
+
+            sessions.update(session, residual[session])
+            anesthesia_sessions.update(session, residual[session] if anesthesia_left[session] > 0 else -1)
+
+        return instance.sequence(plan)
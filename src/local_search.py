@@ -0,0 +1,205 @@
+import time
+
+import numpy as np
+
+from src.evaluation import IncrementalPlan
+from src.solver import BranchAndBound, SolverResult, SolverStatus, relative_gap
+
+
+class LargeNeighborhoodSearch:
+    # Anytime improvement of a feasible plan. Each iteration destroys the sessions of a few random days, or of a
+    # random room over a few days, repairs them by moving the freed, unscheduled and later patients into the
+    # earliest sessions they fit, then tries random moves and swaps. Every change is priced by the delta
+    # evaluation of an IncrementalPlan, never by evaluating the whole plan again; worse plans are rolled back.
+
+    NEIGHBORHOODS = ("day", "room")
+    DAY_NEIGHBORHOOD_DAYS = 3  # at most
+    ROOM_NEIGHBORHOOD_DAYS = 5
+    MOVES_PER_ITERATION = 200
+    NOISE = 0.2  # relative perturbation of repair priorities
+    PROGRESS_INTERVAL = 1.0  # s
+
+    def __init__(self, instance, initial_plan, gap=0.0, timeout=None, callback=None, should_stop=None,
+                 fixed=None, seed=0, max_iterations=None, shared=None):
+        """Prepares the search; nothing runs until solve() is called.
+
+        Args:
+            instance (PlanningInstance): Patients and resources to plan.
+            initial_plan (Plan): Feasible plan to improve, e.g. a greedy one.
+            gap (float, optional): Relative gap from the lower bound at which the search stops. Defaults to 0.
+            timeout (float, optional): Seconds after which the best plan found is returned. Defaults to None.
+            callback (callable, optional): Called like the callback of BranchAndBound, iterations being reported as nodes.
+            should_stop (callable, optional): Polled between iterations; the search stops once it returns True.
+            fixed (np.ndarray, optional): Mask of the patients keeping their session of initial_plan. Defaults to None.
+            seed (int, optional): Seed of the random choices. Defaults to 0.
+            max_iterations (int, optional): Iterations after which the search stops anyway. Defaults to None.
+            shared (SharedIncumbent, optional): Incumbent shared with other solvers, which is offered every
+                improvement; the search restarts from it whenever it is better than the current plan. Defaults to None.
+        """
+        self.instance = instance
+        self.gap = gap
+        self.timeout = timeout
+        self.callback = callback
+        self.should_stop = should_stop
+        self.max_iterations = max_iterations
+        self.rng = np.random.default_rng(seed)
+        self.shared = shared
+        self.shared_version = 0
+
+        resources = instance.resources
+        self.rooms = resources.rooms
+        self.session_days = np.repeat(np.arange(resources.days), resources.rooms)
+
+        self.durations = instance.durations.astype(np.int64)
+        self.priorities = instance.priorities
+        self.anesthesia = instance.anesthesia.astype(np.int64)
+        self.movable = np.ones(len(instance), dtype=np.bool_) if fixed is None else ~fixed
+        self.densities = np.divide(self.priorities, self.durations,
+                                   out=np.full(len(instance), np.inf), where=self.durations > 0)
+
+        self.state = IncrementalPlan(instance, initial_plan.sessions(resources), instance.cost(initial_plan))
+        self.best_session = self.state.session.copy()
+        self.best_cost = self.state.cost
+        self.bound = BranchAndBound(instance, initial_plan=initial_plan, fixed=fixed).lower_bound()
+
+        self.iterations = 0
+        self.start_time = None
+        self.last_progress_time = None
+
+    def adopt_shared_incumbent(self):
+        fetched = self.shared.fetch(self.shared_version)
+        if fetched is None:
+            return
+
+        self.shared_version, cost, sessions = fetched
+        if cost < self.state.cost:
+            self.state = IncrementalPlan(self.instance, sessions, cost)
+        if cost < self.best_cost:
+            self.best_session = self.state.session.copy()
+            self.best_cost = cost
+
+    # destroy and repair
+
+    def destroy(self):
+        state = self.state
+        neighborhood = self.NEIGHBORHOODS[self.rng.integers(len(self.NEIGHBORHOODS))]
+        days = len(self.session_days) // self.rooms
+
+        if neighborhood == "day":
+            first_day = self.rng.integers(days)
+            last_day = min(first_day + self.rng.integers(1, self.DAY_NEIGHBORHOOD_DAYS + 1), days)
+            sessions = np.arange(first_day * self.rooms, last_day * self.rooms)
+        else:
+            room = self.rng.integers(self.rooms)
+            first_day = self.rng.integers(days)
+            sessions = np.arange(first_day, min(first_day + self.ROOM_NEIGHBORHOOD_DAYS, days)) * self.rooms + room
+
+        removed = np.flatnonzero(np.isin(state.session, sessions) & self.movable)
+        for patient in removed.tolist():
+            state.move(patient, -1)
+
+        return self.session_days[sessions[0]]
+
+    def repair(self, first_day):
+        # unscheduled patients and those treated after the destroyed sessions, by decreasing priority per minute,
+        # perturbed so that repairs differ; scheduled ones only move to earlier days
+        state = self.state
+        patient_days = np.where(state.session >= 0, self.session_days[state.session], len(self.session_days))
+        candidates = np.flatnonzero((patient_days > first_day) & self.movable)
+        noise = self.rng.uniform(1 - self.NOISE, 1 + self.NOISE, len(candidates))
+        candidates = candidates[np.argsort(-self.densities[candidates] * noise, kind="stable")]
+
+        max_residual = state.residual.max(initial=-1)
+        for patient in candidates.tolist():
+            if self.durations[patient] > max_residual:
+                continue
+            feasible = (state.residual >= self.durations[patient]) & (state.anesthesia_left >= self.anesthesia[patient])
+            sessions = np.flatnonzero(feasible)
+            # sessions are numbered day by day: the first one is the cheapest
+            if len(sessions) == 0 or state.move_delta(patient, sessions[0]) >= 0:
+                continue
+            state.move(patient, sessions[0])
+            max_residual = state.residual.max()
+
+    def improve(self):
+        state = self.state
+        movable = np.flatnonzero(self.movable)
+        if len(movable) == 0:
+            return
+
+        for patient, other in self.rng.choice(movable, size=(self.MOVES_PER_ITERATION, 2)).tolist():
+            # an earlier session with room enough
+            session = self.rng.integers(len(self.session_days))
+            if state.move_delta(patient, session) < 0 and state.fits(patient, session):
+                state.move(patient, session)
+                continue
+
+            # a swap with a patient treated earlier, or with one left out, paying off for the whole plan
+            if state.session[patient] == state.session[other] or state.swap_delta(patient, other) >= 0:
+                continue
+            if state.fits(patient, state.session[other], leaving=other) and state.fits(other, state.session[patient],
+                                                                                       leaving=patient):
+                state.swap(patient, other)
+
+    # search
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def notify(self, event):
+        if self.callback is None:
+            return
+        self.callback(event, {
+            "cost": self.best_cost,
+            "bound": self.bound,
+            "gap": relative_gap(self.best_cost, self.bound),
+            "elapsed": self.elapsed(),
+            "nodes": self.iterations,
+        })
+
+    def interruption(self):
+        if relative_gap(self.best_cost, self.bound) <= self.gap:
+            return SolverStatus.OPTIMAL if self.best_cost <= self.bound else SolverStatus.GAP_REACHED
+        if self.should_stop is not None and self.should_stop():
+            return SolverStatus.STOPPED
+        if self.timeout is not None and self.elapsed() >= self.timeout:
+            return SolverStatus.TIMEOUT
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return SolverStatus.TIMEOUT
+
+        if time.monotonic() - self.last_progress_time >= self.PROGRESS_INTERVAL:
+            self.last_progress_time = time.monotonic()
+            self.notify("progress")
+        return None
+
+    def solve(self) -> SolverResult:
+        self.start_time = time.monotonic()
+        self.last_progress_time = self.start_time
+        self.notify("incumbent")
+
+        while True:
+            status = self.interruption()
+            if status is not None:
+                break
+
+            if self.shared is not None:
+                self.adopt_shared_incumbent()
+
+            previous_state = self.state.copy()
+            self.repair(self.destroy())
+            self.improve()
+            self.iterations += 1
+
+            if self.state.cost > previous_state.cost:
+                self.state = previous_state
+            elif self.state.cost < self.best_cost:
+                self.best_session = self.state.session.copy()
+                self.best_cost = self.state.cost
+                self.notify("incumbent")
+                if self.shared is not None:
+                    self.shared.offer(self.best_cost, self.best_session)
+
+        return SolverResult(self.best_plan(), self.best_cost, self.bound, status, self.iterations, self.elapsed())
+
+    def best_plan(self):
+        return IncrementalPlan(self.instance, self.best_session, self.best_cost).plan()
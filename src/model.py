@@ -1,4 +1,18 @@
+import sys
+from array import array
+
+import numpy as np
+
+from src.service_catalog import ServiceCatalog
+
+
+def parse_services(services) -> list[int]:
+    # services are stored as pipe-delimited codes, e.g. "7253|7724"
+    return [int(code) for code in services.split("|") if code.strip()]
+
+
 class Patient:
+    __slots__ = ("name", "surname", "services", "anesthesia", "infectious", "list_insertion_date")
 
     def __init__(self, name, surname, services, anesthesia, infectious, list_insertion_date):
         self.name = name
@@ -8,4 +22,252 @@ class Patient:
         self.infectious = infectious
         self.list_insertion_date = list_insertion_date
 
-        
\ No newline at end of file
+    @property
+    def service_codes(self):
+        return parse_services(self.services)
+
+
+class StringPool:
+    # categorical storage: each distinct string is kept once and rows only hold its integer code
+
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def intern(self, string) -> int:
+        code = self.codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self.codes[string] = code
+            self.strings.append(sys.intern(string))
+        return code
+
+    def code_of(self, string):
+        return self.codes.get(string)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ServiceIndex:
+    # inverted index: service code -> rows of the patients needing it
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, row, service_codes):
+        for code in service_codes:
+            rows = self.rows.get(code)
+            if rows is None:
+                rows = array("i")
+                self.rows[code] = rows
+            rows.append(row)
+
+    def patients_needing(self, service_code):
+        # O(k) in the number of patients needing the service
+        return np.array(self.rows.get(service_code, ()), dtype=np.int32)
+
+    def count(self, service_code) -> int:
+        rows = self.rows.get(service_code)
+        return 0 if rows is None else len(rows)
+
+    def counts(self) -> dict:
+        return {code: len(rows) for code, rows in self.rows.items()}
+
+    def service_codes(self):
+        return sorted(self.rows)
+
+
+class PatientRow(Patient):
+    # zero-copy view of a single PatientTable row: every field is read from the table's columns on access
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self):
+        return self.table.name_pool[self.table.columns["name"][self.index]]
+
+    @property
+    def surname(self):
+        return self.table.surname_pool[self.table.columns["surname"][self.index]]
+
+    @property
+    def services(self):
+        return self.table.services_pool[self.table.columns["services"][self.index]]
+
+    @property
+    def service_codes(self):
+        # a list, as for a Patient
+        return self.table.service_codes_of(self.index).tolist()
+
+    @property
+    def anesthesia(self):
+        return bool(self.table.columns["anesthesia"][self.index])
+
+    @property
+    def infectious(self):
+        return bool(self.table.columns["infectious"][self.index])
+
+    @property
+    def list_insertion_date(self):
+        return self.table.columns["list_insertion_date"][self.index].item()
+
+
+class PatientTable:
+    # column name -> dtype; string columns hold codes into the corresponding StringPool,
+    # services_end is the end offset of each row's parsed codes inside flat_service_codes
+    COLUMN_TYPES = {
+        "name": np.int32,
+        "surname": np.int32,
+        "services": np.int32,
+        "services_end": np.int64,
+        "anesthesia": np.bool_,
+        "infectious": np.bool_,
+        "list_insertion_date": "datetime64[us]",
+        "duration": np.int32,
+        "services_anesthesia": np.bool_,
+    }
+
+    def __init__(self, capacity=1024, catalog=None):
+        self.size = 0
+        self.capacity = max(capacity, 1)
+        # durations and requirements of the services are looked up once, while rows are appended
+        self.catalog = catalog if catalog is not None else ServiceCatalog()
+
+        self.name_pool = StringPool()
+        self.surname_pool = StringPool()
+        self.services_pool = StringPool()
+
+        self.columns = {column: np.empty(self.capacity, dtype=dtype)
+                        for column, dtype in PatientTable.COLUMN_TYPES.items()}
+
+        # parsed service codes of all rows, laid out one after the other
+        self.parsed_services_size = 0
+        self.parsed_services = np.empty(self.capacity, dtype=np.int32)
+        self.service_index = ServiceIndex()
+
+    @staticmethod
+    def from_patients(patients):
+        table = PatientTable()
+        for patient in patients:
+            table.append(patient.name,
+                         patient.surname,
+                         patient.services,
+                         patient.anesthesia,
+                         patient.infectious,
+                         patient.list_insertion_date)
+        return table
+
+    def grow(self):
+        # capacity doubles, so appending n rows costs O(n) amortized
+        self.capacity *= 2
+        for column, values in self.columns.items():
+            grown_values = np.empty(self.capacity, dtype=values.dtype)
+            grown_values[:self.size] = values[:self.size]
+            self.columns[column] = grown_values
+
+    def append_service_codes(self, service_codes):
+        end = self.parsed_services_size + len(service_codes)
+        if end > len(self.parsed_services):
+            grown_parsed_services = np.empty(max(2 * len(self.parsed_services), end), dtype=np.int32)
+            grown_parsed_services[:self.parsed_services_size] = self.parsed_services[:self.parsed_services_size]
+            self.parsed_services = grown_parsed_services
+
+        self.parsed_services[self.parsed_services_size:end] = service_codes
+        self.parsed_services_size = end
+        return end
+
+    def append(self, name, surname, services, anesthesia, infectious, list_insertion_date) -> int:
+        # services are parsed once here, so that no consumer has to split the raw string again
+        service_codes = parse_services(services)
+        duration, services_anesthesia = self.catalog.patient_requirements(service_codes)
+        list_insertion_date = np.datetime64(list_insertion_date, "us")
+
+        if self.size == self.capacity:
+            self.grow()
+
+        index = self.size
+        self.columns["name"][index] = self.name_pool.intern(name)
+        self.columns["surname"][index] = self.surname_pool.intern(surname)
+        self.columns["services"][index] = self.services_pool.intern(services)
+        self.columns["services_end"][index] = self.append_service_codes(service_codes)
+        self.columns["anesthesia"][index] = anesthesia
+        self.columns["infectious"][index] = infectious
+        self.columns["list_insertion_date"][index] = list_insertion_date
+        self.columns["duration"][index] = duration
+        self.columns["services_anesthesia"][index] = services_anesthesia
+        self.service_index.add(index, service_codes)
+        self.size += 1
+
+        return index
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(*row)
+
+    def column(self, column):
+        # a view over the filled part of the column, no data is copied
+        return self.columns[column][:self.size]
+
+    def decode(self, column):
+        # the strings of a categorical column, one per row
+        pool = {"name": self.name_pool, "surname": self.surname_pool, "services": self.services_pool}[column]
+        return np.array(pool.strings, dtype=object)[self.column(column)]
+
+    @property
+    def flat_service_codes(self):
+        return self.parsed_services[:self.parsed_services_size]
+
+    @property
+    def service_offsets(self):
+        # row i owns flat_service_codes[service_offsets[i]:service_offsets[i + 1]]
+        return np.concatenate(([0], self.column("services_end")))
+
+    def service_codes_of(self, index):
+        start = 0 if index == 0 else self.columns["services_end"][index - 1]
+        return self.parsed_services[start:self.columns["services_end"][index]]
+
+    def patients_needing(self, service_code):
+        return self.service_index.patients_needing(service_code)
+
+    @property
+    def anesthesia(self):
+        return self.column("anesthesia")
+
+    @property
+    def infectious(self):
+        return self.column("infectious")
+
+    @property
+    def list_insertion_date(self):
+        return self.column("list_insertion_date")
+
+    @property
+    def durations(self):
+        # total minutes of the services of each patient
+        return self.column("duration")
+
+    @property
+    def services_anesthesia(self):
+        # whether any service of each patient needs anesthesia, whatever the anesthesia column says
+        return self.column("services_anesthesia")
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index) -> PatientRow:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("PatientTable index out of range")
+        return PatientRow(self, index)
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield PatientRow(self, index)
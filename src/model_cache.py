@@ -0,0 +1,137 @@
+import copy
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.heuristics import GreedyScheduler
+from src.planning import PlanningInstance
+from src.replanning import patient_keys
+
+
+def model_fingerprint(data_frame, resources, catalog=None) -> str:
+    # hashes every cell, vectorized by pandas, along with the columns, the resources and the service catalog
+    digest = hashlib.sha256()
+    digest.update(repr((list(data_frame.columns),
+                        resources.rooms,
+                        resources.days,
+                        resources.session_duration,
+                        resources.max_anesthesia_patients,
+                        str(resources.start_date))).encode())
+    digest.update(pd.util.hash_pandas_object(data_frame, index=False).values.tobytes())
+    if catalog is not None:
+        digest.update(catalog.fingerprint().encode())
+    return digest.hexdigest()
+
+
+class PlanningModel:
+    # Everything a planning run needs that depends on the patient list and the resources only:
+    # the parsed patients, their keys, the planning instance with its precomputed arrays and the greedy plan
+    # warm-starting the solvers.
+
+    def __init__(self, patient_table, resources):
+        self.patient_table = patient_table
+        self.keys = patient_keys(patient_table)
+        # resources are edited in place by the GUI, a cached model must not follow them
+        self.instance = PlanningInstance.from_patient_table(patient_table, copy.copy(resources))
+        self.greedy_plan = GreedyScheduler(self.instance).schedule()
+
+
+class ModelCache:
+    # LRU cache of planning models keyed by model_fingerprint(), held in memory and, if a directory is given,
+    # pickled on disk too, where the least recently used files are deleted beyond disk_size.
+
+    FILE_EXTENSION = ".model"
+
+    def __init__(self, size=8, directory=None, disk_size=32):
+        """Creates an empty cache, or one backed by the models already pickled in directory.
+
+        Args:
+            size (int, optional): Models kept in memory. Defaults to 8.
+            directory (str, optional): Directory the models are pickled into; None keeps them in memory
+                only. Defaults to None.
+            disk_size (int, optional): Models kept in directory. Defaults to 32.
+        """
+        self.size = size
+        self.directory = directory
+        self.disk_size = disk_size
+        self.models = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.models)
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + self.FILE_EXTENSION)
+
+    def get(self, fingerprint):
+        model = self.models.get(fingerprint)
+        if model is not None:
+            self.models.move_to_end(fingerprint)
+            self.hits += 1
+            return model
+
+        if self.directory is not None:
+            model = self.load(fingerprint)
+            if model is not None:
+                self.remember(fingerprint, model)
+                self.hits += 1
+                return model
+
+        self.misses += 1
+        return None
+
+    def put(self, fingerprint, model):
+        self.remember(fingerprint, model)
+        if self.directory is not None:
+            self.store(fingerprint, model)
+
+    def get_or_build(self, fingerprint, build):
+        model = self.get(fingerprint)
+        if model is None:
+            model = build()
+            self.put(fingerprint, model)
+        return model
+
+    def remember(self, fingerprint, model):
+        self.models[fingerprint] = model
+        self.models.move_to_end(fingerprint)
+        if len(self.models) > self.size:
+            self.models.popitem(last=False)  # least recently used
+
+    def load(self, fingerprint):
+        path = self.path(fingerprint)
+        try:
+            with open(path, "rb") as model_file:
+                model = pickle.load(model_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            # written by an older version, or truncated: built again
+            os.remove(path)
+            return None
+
+        os.utime(path)  # recently used
+        return model
+
+    def store(self, fingerprint, model):
+        # written aside and renamed, so that a model file is never seen half written
+        path = self.path(fingerprint)
+        with open(path + ".tmp", "wb") as model_file:
+            pickle.dump(model, model_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+        model_files = [os.path.join(self.directory, file_name) for file_name in os.listdir(self.directory)
+                       if file_name.endswith(self.FILE_EXTENSION)]
+        model_files.sort(key=os.path.getmtime)
+        for model_file in model_files[:max(len(model_files) - self.disk_size, 0)]:
+            os.remove(model_file)
+
+    def clear(self):
+        self.models.clear()
@@ -0,0 +1,135 @@
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.excel_loader import ExcelLoader
+from src.model import parse_services
+
+
+class FenwickTree:
+    # Binary indexed tree of counts over 0..size-1: adding to a count, summing a prefix and finding
+    # the k-th smallest counted index all take O(log size).
+
+    def __init__(self, size, counts=None):
+        self.size = size
+        self.tree = [0] * size if counts is None else [int(count) for count in counts]
+        if counts is not None:
+            # linear construction: every node pushes its sum to its parent
+            for index in range(size):
+                parent = index | (index + 1)
+                if parent < size:
+                    self.tree[parent] += self.tree[index]
+        self.total = self.prefix_sum(size)
+
+    def add(self, index, delta):
+        self.total += delta
+        while index < self.size:
+            self.tree[index] += delta
+            index |= index + 1
+
+    def prefix_sum(self, end) -> int:
+        # sum of the counts of 0..end-1
+        total = 0
+        while end > 0:
+            total += self.tree[end - 1]
+            end &= end - 1
+        return total
+
+    def find(self, rank) -> int:
+        # smallest index whose prefix, itself included, counts more than rank (0-based) items
+        index = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            child = index + step
+            if child <= self.size and self.tree[child - 1] <= rank:
+                index = child
+                rank -= self.tree[child - 1]
+            step >>= 1
+        return index
+
+
+class PatientSummary:
+    # Aggregates of a patient list kept up to date on every insertion, edit or removal instead of being computed
+    # from the whole list: the counts shown in the summary panel, the patients needing each service and a
+    # FenwickTree of the list insertion days, which answers waiting time percentiles in O(log DAY_RANGE).
+
+    DAY_RANGE = 1 << 16  # days since 1970, up to 2149
+
+    def __init__(self, day_counts=None):
+        self.total = 0
+        self.anesthesia = 0
+        self.infectious = 0
+        self.services = Counter()
+        self.insertion_days = FenwickTree(self.DAY_RANGE, day_counts)
+
+    @staticmethod
+    def from_patient_table(patient_table) -> "PatientSummary":
+        # built from the columns of an imported list, without a pass per row
+        days = PatientSummary.day_numbers(patient_table.list_insertion_date)
+        summary = PatientSummary(np.bincount(days, minlength=PatientSummary.DAY_RANGE))
+        summary.total = len(patient_table)
+        summary.anesthesia = int(patient_table.anesthesia.sum())
+        summary.infectious = int(patient_table.infectious.sum())
+        summary.services.update(patient_table.service_index.counts())
+        return summary
+
+    @staticmethod
+    def from_data_frame(data_frame) -> "PatientSummary":
+        summary = PatientSummary()
+        for row in data_frame.itertuples(index=False, name=None):
+            summary.add(row)
+        return summary
+
+    @staticmethod
+    def day_numbers(dates) -> np.ndarray:
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        return np.clip(days, 0, PatientSummary.DAY_RANGE - 1)
+
+    @staticmethod
+    def day_number(date) -> int:
+        return int(PatientSummary.day_numbers([pd.Timestamp(date).to_datetime64()])[0])
+
+    def update(self, row, sign):
+        _, _, services, anesthesia, infectious, list_insertion_date = ExcelLoader.parse_row(row)
+        self.total += sign
+        self.anesthesia += sign * anesthesia
+        self.infectious += sign * infectious
+        for code in parse_services(services):
+            self.services[code] += sign
+            if self.services[code] == 0:
+                del self.services[code]
+        self.insertion_days.add(self.day_number(list_insertion_date), sign)
+
+    def add(self, row):
+        self.update(row, 1)
+
+    def remove(self, row):
+        self.update(row, -1)
+
+    def replace(self, old_row, new_row):
+        self.remove(old_row)
+        self.add(new_row)
+
+    def waiting_days(self, fraction, today):
+        """Waiting time of the patients, in days, at the given percentile (nearest rank).
+
+        Args:
+            fraction (float): Percentile as a fraction, 0.5 being the median.
+            today (date): Day the waiting times are measured at.
+
+        Returns:
+            int: Days waited by the patient at the percentile, None for an empty list.
+        """
+        if self.total == 0:
+            return None
+        # the longer the wait, the earlier the insertion: ranks are counted from the latest insertion backwards
+        rank = min(max(math.ceil(fraction * self.total), 1), self.total)
+        insertion_day = self.insertion_days.find(self.total - rank)
+        return self.day_number(today) - insertion_day
+
+    def top_services(self, count=3) -> list:
+        # the most needed services, as (code, patients) pairs
+        return heapq.nlargest(count, self.services.items(), key=lambda item: (item[1], -item[0]))
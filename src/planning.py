@@ -0,0 +1,132 @@
+import datetime
+
+import numpy as np
+
+
+# unscheduled patients cost as if they were operated this many days after the end of the horizon
+UNSCHEDULED_PENALTY_DAYS = 5
+
+
+class Resources:
+
+    def __init__(self, rooms=2, days=10, session_duration=480, max_anesthesia_patients=2, start_date=None):
+        """Describes the interventional radiology resources available over the planning horizon.
+
+        Args:
+            rooms (int, optional): Rooms available each day. Defaults to 2.
+            days (int, optional): Working days in the planning horizon. Defaults to 10.
+            session_duration (int, optional): Minutes available in each room each day. Defaults to 480.
+            max_anesthesia_patients (int, optional): Patients needing anesthesia that can be treated
+                in the same room on the same day. Defaults to 2.
+            start_date (datetime.date, optional): First day of the horizon. Defaults to today.
+        """
+        self.rooms = rooms
+        self.days = days
+        self.session_duration = session_duration
+        self.max_anesthesia_patients = max_anesthesia_patients
+        self.start_date = start_date if start_date is not None else datetime.date.today()
+
+    @property
+    def sessions(self):
+        return self.rooms * self.days
+
+    def day_date(self, day):
+        # days of the horizon are working days
+        return np.busday_offset(np.datetime64(self.start_date, "D"), day, roll="forward").item()
+
+
+class Plan:
+    # day and room of each patient, -1 when not scheduled; order is the position inside the session
+
+    def __init__(self, day, room, order=None):
+        self.day = np.asarray(day, dtype=np.int16)
+        self.room = np.asarray(room, dtype=np.int16)
+        self.order = np.zeros(len(self.day), dtype=np.int32) if order is None else np.asarray(order, dtype=np.int32)
+
+    @staticmethod
+    def empty(size):
+        return Plan(np.full(size, -1), np.full(size, -1))
+
+    def __len__(self):
+        return len(self.day)
+
+    def copy(self):
+        return Plan(self.day.copy(), self.room.copy(), self.order.copy())
+
+    @property
+    def scheduled(self):
+        return self.day >= 0
+
+    def sessions(self, resources):
+        # sessions are numbered day by day, -1 for unscheduled patients
+        return np.where(self.scheduled, self.day.astype(np.int32) * resources.rooms + self.room, -1)
+
+
+class PlanningInstance:
+
+    def __init__(self, durations, anesthesia, infectious, waiting_days, resources):
+        self.durations = np.asarray(durations, dtype=np.int32)
+        self.anesthesia = np.asarray(anesthesia, dtype=np.bool_)
+        self.infectious = np.asarray(infectious, dtype=np.bool_)
+        self.waiting_days = np.asarray(waiting_days, dtype=np.int32)
+        self.resources = resources
+
+        # the longer a patient has been waiting, the more each further day of waiting costs
+        self.priorities = self.waiting_days.astype(np.int64) + 1
+        self.unscheduled_day = resources.days + UNSCHEDULED_PENALTY_DAYS
+
+        # patients fitting at least one session
+        self.schedulable = self.durations <= resources.session_duration
+        if resources.max_anesthesia_patients <= 0:
+            self.schedulable &= ~self.anesthesia
+
+    @staticmethod
+    def from_patient_table(table, resources):
+        # durations come from the service catalog of the table, looked up at import
+        insertion_days = table.list_insertion_date.astype("datetime64[D]")
+        waiting_days = (np.datetime64(resources.start_date, "D") - insertion_days).astype(np.int64)
+
+        return PlanningInstance(table.durations,
+                                table.anesthesia | table.services_anesthesia,
+                                table.infectious,
+                                np.maximum(waiting_days, 0),
+                                resources)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def cost(self, plan):
+        days = np.where(plan.scheduled, plan.day, self.unscheduled_day)
+        return int(np.dot(self.priorities, days))
+
+    def session_loads(self, plan):
+        sessions = plan.sessions(self.resources)
+        scheduled = sessions >= 0
+        minutes = np.bincount(sessions[scheduled],
+                              weights=self.durations[scheduled],
+                              minlength=self.resources.sessions)
+        anesthesia_patients = np.bincount(sessions[scheduled],
+                                          weights=self.anesthesia[scheduled],
+                                          minlength=self.resources.sessions)
+        return minutes.astype(np.int64), anesthesia_patients.astype(np.int64)
+
+    def is_feasible(self, plan):
+        minutes, anesthesia_patients = self.session_loads(plan)
+        return bool(np.all(minutes <= self.resources.session_duration)
+                    and np.all(anesthesia_patients <= self.resources.max_anesthesia_patients))
+
+    def sequence(self, plan):
+        # inside each session patients with infections in progress go last, so that the room
+        # is sanitized once at the end of the day; otherwise longer waits go first
+        sessions = plan.sessions(self.resources)
+        ranking = np.lexsort((np.arange(len(self)), -self.priorities, self.infectious, sessions))
+
+        order = np.zeros(len(self), dtype=np.int32)
+        sorted_sessions = sessions[ranking]
+        session_starts = np.flatnonzero(np.r_[True, sorted_sessions[1:] != sorted_sessions[:-1]])
+        session_lengths = np.diff(np.r_[session_starts, len(self)])
+        order[ranking] = np.arange(len(self)) - np.repeat(session_starts, session_lengths)
+        order[sessions < 0] = 0
+
+        plan.order = order
+        return plan
@@ -0,0 +1,57 @@
+import multiprocessing
+
+import numpy as np
+
+from src.solver import SolverResult, SolverStatus, relative_gap
+
+
+class SharedIncumbent:
+    # Best plan found by any worker of a portfolio, kept in shared memory as the session of each patient.
+    # Workers offer their improvements and fetch the others' ones; the version tells whether anything changed
+    # since the last fetch without taking the lock.
+
+    def __init__(self, size, context=multiprocessing):
+        self.size = size
+        self.lock = context.Lock()
+        self.cost = context.RawValue("q", -1)  # -1 until a plan is offered
+        self.version = context.RawValue("q", 0)
+        self.sessions = context.RawArray("i", max(size, 1))
+
+    def offer(self, cost, sessions) -> bool:
+        with self.lock:
+            if 0 <= self.cost.value <= cost:
+                return False
+            np.frombuffer(self.sessions, dtype=np.int32)[:self.size] = sessions
+            self.cost.value = cost
+            self.version.value += 1
+            return True
+
+    def fetch(self, known_version):
+        """Returns the version, cost and sessions of the shared plan, or None if unchanged since known_version."""
+        if self.version.value == known_version:
+            return None
+        with self.lock:
+            if self.cost.value < 0:
+                return None
+            return self.version.value, self.cost.value, np.frombuffer(self.sessions, dtype=np.int32)[:self.size].copy()
+
+
+def combine_results(results, gap, stopped) -> SolverResult:
+    # the best plan of all workers, against the best bound any of them proved
+    best = min(results, key=lambda result: result.cost)
+    bound = max(result.bound for result in results)
+    combined_gap = relative_gap(best.cost, bound)
+
+    if combined_gap <= gap:
+        status = SolverStatus.OPTIMAL if combined_gap == 0 else SolverStatus.GAP_REACHED
+    elif stopped:
+        status = SolverStatus.STOPPED
+    else:
+        status = SolverStatus.TIMEOUT
+
+    return SolverResult(best.plan,
+                        best.cost,
+                        bound,
+                        status,
+                        sum(result.nodes for result in results),
+                        max(result.elapsed for result in results))
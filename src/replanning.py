@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+import numpy as np
+
+from src.planning import Plan
+
+
+def patient_keys(patient_table) -> list:
+    # patients have no identifier: a patient is recognized by all of its fields
+    return list(zip(patient_table.decode("name"),
+                    patient_table.decode("surname"),
+                    patient_table.decode("services"),
+                    patient_table.anesthesia.tolist(),
+                    patient_table.infectious.tolist(),
+                    patient_table.list_insertion_date.astype(np.int64).tolist()))
+
+
+class PlanningSnapshot:
+    # the last plan computed for a patient list, along with what is needed to patch it later
+
+    def __init__(self, keys, plan, start_date):
+        self.keys = keys
+        self.plan = plan
+        self.start_date = start_date
+
+
+def patch_plan(snapshot, keys, instance):
+    """Carries a previous plan over to a changed patient list.
+
+    Patients still in the list keep their session, shifted by the working days elapsed since the snapshot.
+    Sessions that lost patients, or that do not fit the resources anymore, are released along with
+    new, edited and unscheduled patients, which are the only ones the solver has to place again.
+
+    Args:
+        snapshot (PlanningSnapshot): Last plan computed for the list.
+        keys (list): Keys of the current patients, as returned by patient_keys().
+        instance (PlanningInstance): Planning instance of the current patients.
+
+    Returns:
+        tuple[Plan, np.ndarray]: The patched plan and the mask of the patients left free to move.
+    """
+    resources = instance.resources
+
+    previous_patients = defaultdict(list)
+    for previous_patient in range(len(snapshot.keys) - 1, -1, -1):
+        previous_patients[snapshot.keys[previous_patient]].append(previous_patient)
+
+    # duplicated patients are matched in list order
+    matches = np.full(len(keys), -1, dtype=np.int64)
+    for patient, key in enumerate(keys):
+        candidates = previous_patients.get(key)
+        if candidates:
+            matches[patient] = candidates.pop()
+
+    previous_plan = snapshot.plan.copy()
+    previous_plan.day[previous_plan.scheduled] -= np.busday_count(np.datetime64(snapshot.start_date, "D"),
+                                                                  np.datetime64(resources.start_date, "D"))
+    outside = (previous_plan.day < 0) | (previous_plan.day >= resources.days) | (previous_plan.room >= resources.rooms)
+    previous_plan.day[outside] = -1
+    previous_plan.room[outside] = -1
+
+    plan = Plan.empty(len(keys))
+    matched = matches >= 0
+    plan.day[matched] = previous_plan.day[matches[matched]]
+    plan.room[matched] = previous_plan.room[matches[matched]]
+
+    # sessions of the patients that left the list have room to spare
+    removed = np.ones(len(snapshot.keys), dtype=np.bool_)
+    removed[matches[matched]] = False
+    released_sessions = previous_plan.sessions(resources)[removed]
+
+    # sessions overloaded by changed resources
+    minutes, anesthesia_patients = instance.session_loads(plan)
+    overloaded_sessions = np.flatnonzero((minutes > resources.session_duration)
+                                         | (anesthesia_patients > resources.max_anesthesia_patients))
+
+    sessions = plan.sessions(resources)
+    free = ~plan.scheduled | np.isin(sessions, np.concatenate((released_sessions, overloaded_sessions)))
+    plan.day[free] = -1
+    plan.room[free] = -1
+
+    return instance.sequence(plan), free
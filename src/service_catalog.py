@@ -0,0 +1,119 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# minutes booked for a service missing from the catalog
+DEFAULT_SERVICE_DURATION = 45
+
+
+class InvalidCatalog(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class ServiceCatalog:
+    # Duration and anesthesia requirement of each service code, held in arrays sorted by code, so that looking up
+    # the services of all patients is a single binary search over them, however large the codes are.
+    # Codes missing from the catalog take DEFAULT_SERVICE_DURATION minutes and need no anesthesia.
+
+    CODE_COLUMN = "Codice"
+    DURATION_COLUMN = "Durata"
+    ANESTHESIA_COLUMN = "Anestesia"  # optional
+
+    def __init__(self, codes=(), durations=(), anesthesia=None, default_duration=DEFAULT_SERVICE_DURATION):
+        """Builds the lookup arrays of a catalog.
+
+        Args:
+            codes (array, optional): Service codes, non-negative integers. Defaults to none.
+            durations (array, optional): Minutes taken by each service. Defaults to none.
+            anesthesia (array, optional): Whether each service needs anesthesia. Defaults to none of them.
+            default_duration (int, optional): Minutes taken by services missing from the catalog.
+                Defaults to DEFAULT_SERVICE_DURATION.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        durations = np.asarray(durations, dtype=np.int64)
+        anesthesia = np.zeros(len(codes), dtype=np.bool_) if anesthesia is None else np.asarray(anesthesia, np.bool_)
+
+        if not len(codes) == len(durations) == len(anesthesia):
+            raise InvalidCatalog("Codes, durations and anesthesia requirements differ in number.")
+        if np.any(codes < 0) or np.any(durations < 0):
+            raise InvalidCatalog("Service codes and durations must not be negative.")
+        if len(np.unique(codes)) < len(codes):
+            raise InvalidCatalog("Service codes must be unique.")
+
+        self.default_duration = default_duration
+        order = np.argsort(codes)
+        self.codes = codes[order]
+        self.durations = durations[order].astype(np.int32)
+        self.anesthesia = anesthesia[order]
+
+        # python copy, for lookups of a few codes at a time
+        self.requirements = dict(zip(self.codes.tolist(), zip(self.durations.tolist(), self.anesthesia.tolist())))
+
+    @staticmethod
+    def load(file_name):
+        # CSV or spreadsheet with a code and a duration column, anesthesia being optional
+        if os.path.splitext(file_name)[1].lower() == ".csv":
+            data_frame = pd.read_csv(file_name)
+        else:
+            data_frame = pd.read_excel(file_name)
+
+        if (ServiceCatalog.CODE_COLUMN not in data_frame.columns
+                or ServiceCatalog.DURATION_COLUMN not in data_frame.columns):
+            raise InvalidCatalog("The catalog must have the columns " + ServiceCatalog.CODE_COLUMN + " and "
+                                 + ServiceCatalog.DURATION_COLUMN + ".")
+
+        try:
+            codes = data_frame[ServiceCatalog.CODE_COLUMN].astype(np.int64)
+            durations = data_frame[ServiceCatalog.DURATION_COLUMN].astype(np.int64)
+        except (ValueError, TypeError):
+            raise InvalidCatalog("Service codes and durations must be integers.")
+
+        # imported here, the loader depending on the model, which depends on the catalog
+        from src.excel_loader import ExcelLoader
+
+        anesthesia = None
+        if ServiceCatalog.ANESTHESIA_COLUMN in data_frame.columns:
+            anesthesia = data_frame[ServiceCatalog.ANESTHESIA_COLUMN].map(ExcelLoader.parse_flag)
+
+        return ServiceCatalog(codes, durations, anesthesia)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.requirements
+
+    def lookup(self, codes):
+        # durations and anesthesia requirements of the given codes, missing ones included
+        codes = np.asarray(codes, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.codes, codes), max(len(self.codes) - 1, 0))
+        known = self.codes[positions] == codes if len(self.codes) else np.zeros(len(codes), dtype=np.bool_)
+        durations = np.full(len(codes), self.default_duration, dtype=np.int32)
+        anesthesia = np.zeros(len(codes), dtype=np.bool_)
+        durations[known] = self.durations[positions[known]]
+        anesthesia[known] = self.anesthesia[positions[known]]
+        return durations, anesthesia
+
+    def patient_requirements(self, codes):
+        # total duration of the services of a patient, and whether any of them needs anesthesia:
+        # patients have a few services each, plain lists beat arrays here
+        duration = 0
+        anesthesia = False
+        for code in codes:
+            requirements = self.requirements.get(code)
+            if requirements is not None:
+                duration += requirements[0]
+                anesthesia = anesthesia or requirements[1]
+            else:
+                duration += self.default_duration
+        return duration, anesthesia
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        digest.update(str(self.default_duration).encode())
+        for array in (self.codes, self.durations, self.anesthesia):
+            digest.update(array.tobytes())
+        return digest.hexdigest()
@@ -0,0 +1,346 @@
+import enum
+import time
+
+import numpy as np
+
+from src.planning import Plan
+
+
+class SolverStatus(enum.Enum):
+    OPTIMAL = "optimal"
+    GAP_REACHED = "gap reached"
+    TIMEOUT = "timeout"
+    STOPPED = "stopped"
+
+
+def relative_gap(cost, bound) -> float:
+    if cost <= 0:
+        return 0.0
+    return max(cost - bound, 0) / cost
+
+
+class SolverResult:
+
+    def __init__(self, plan, cost, bound, status, nodes, elapsed):
+        self.plan = plan
+        self.cost = cost
+        self.bound = bound
+        self.status = status
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    @property
+    def gap(self):
+        return relative_gap(self.cost, self.bound)
+
+
+def fractional_bound(durations, priorities, day_capacities, unscheduled_day) -> float:
+    # Lower bound of the cost of scheduling the given patients into days with the given capacities,
+    # allowing patients to be split between days and ignoring rooms and anesthesia limits.
+    # Patients must come by decreasing priority per minute: filling the earliest days in this order is
+    # then optimal for the relaxation, as the cost of a minute is the product of its priority and its day.
+    # On the axis of booked minutes, patient i takes [ends[i] - durations[i], ends[i]) and day d takes
+    # [capacity_ends[d - 1], capacity_ends[d]): integrating the day over it gives the cost of each patient.
+    if len(durations) == 0:
+        return 0.0
+
+    capacity_ends = np.cumsum(day_capacities, dtype=np.float64)
+    total_capacity = capacity_ends[-1] if len(capacity_ends) else 0.0
+    breakpoints = np.concatenate(([0.0], capacity_ends))
+    integrals = np.concatenate(([0.0], np.cumsum(np.arange(len(day_capacities)) * np.asarray(day_capacities))))
+
+    def integral(minutes):
+        # minutes beyond the total capacity stay unscheduled
+        booked = np.minimum(minutes, total_capacity)
+        return np.interp(booked, breakpoints, integrals) + (minutes - booked) * unscheduled_day
+
+    ends = np.cumsum(durations, dtype=np.float64)
+    costs = integral(ends) - integral(ends - durations)
+    densities = np.divide(priorities, durations, out=np.zeros(len(durations)), where=durations > 0)
+    return float(np.dot(densities, costs))
+
+
+class BranchAndBound:
+    # Depth-first branch and bound assigning one patient per level to a (day, room) session or to no session,
+    # patients taken by decreasing priority per minute. The first dive fills the earliest sessions greedily;
+    # afterwards nodes whose fractional bound cannot beat the incumbent by more than the gap are pruned.
+
+    NODES_BETWEEN_CHECKS = 256
+    PROGRESS_INTERVAL = 1.0  # s
+
+    def __init__(self, instance, gap=0.0, timeout=None, callback=None, should_stop=None, initial_plan=None, fixed=None,
+                 shared=None):
+        """Prepares the search; nothing runs until solve() is called.
+
+        Args:
+            instance (PlanningInstance): Patients and resources to plan.
+            gap (float, optional): Relative gap between incumbent and bound at which the search stops. Defaults to 0.
+            timeout (float, optional): Seconds after which the best plan found so far is returned. Defaults to None.
+            callback (callable, optional): Called with an event name ("incumbent" or "progress") and a dict
+                holding cost, bound, gap, elapsed seconds and explored nodes.
+            should_stop (callable, optional): Polled during the search; the search stops once it returns True.
+            initial_plan (Plan, optional): Feasible plan used as first incumbent, e.g. a greedy one. Defaults to None.
+            fixed (np.ndarray, optional): Mask of the patients keeping their session of initial_plan, which is then
+                required; only the other patients are searched. Defaults to None.
+            shared (SharedIncumbent, optional): Incumbent shared with other solvers, which is offered every
+                improvement and from which better plans are adopted for pruning. Defaults to None.
+        """
+        self.instance = instance
+        self.gap = gap
+        self.timeout = timeout
+        self.callback = callback
+        self.should_stop = should_stop
+        self.initial_plan = initial_plan
+        self.shared = shared
+        self.shared_version = 0
+
+        schedulable = instance.schedulable.copy()
+
+        # fixed patients take their sessions before the search starts
+        self.base_plan = Plan.empty(len(instance))
+        if fixed is not None:
+            self.base_plan.day[fixed] = initial_plan.day[fixed]
+            self.base_plan.room[fixed] = initial_plan.room[fixed]
+            schedulable &= ~fixed
+
+        # patients that fit no session are left out of the search, along with fixed ones
+        candidates = np.flatnonzero(schedulable)
+        self.fixed_cost = (instance.cost(self.base_plan)
+                           - int(instance.priorities[candidates].sum()) * instance.unscheduled_day)
+
+        durations = instance.durations[candidates]
+        priorities = instance.priorities[candidates]
+        densities = np.divide(priorities, durations,
+                              out=np.full(len(candidates), np.inf), where=durations > 0)
+        self.order = candidates[np.lexsort((-priorities, -densities))]
+
+        self.durations = instance.durations[self.order].astype(np.int64)
+        self.priorities = instance.priorities[self.order]
+
+        self.nodes = 0
+        self.start_time = None
+        self.last_progress_time = None
+        self.incumbent = None
+        self.incumbent_cost = None
+        self.root_bound = None
+
+    def initial_state(self):
+        # minutes and anesthesia slots left in each room and day once fixed patients are in,
+        # along with the minutes of each day usable by the bound
+        resources = self.instance.resources
+        minutes, anesthesia_patients = self.instance.session_loads(self.base_plan)
+        residual = (resources.session_duration - minutes).reshape(resources.days, resources.rooms)
+        anesthesia_left = (resources.max_anesthesia_patients - anesthesia_patients).reshape(resources.days,
+                                                                                           resources.rooms)
+        day_capacities = residual.sum(axis=1).tolist()
+
+        return residual.tolist(), anesthesia_left.tolist(), day_capacities
+
+    def lower_bound(self):
+        return self.fixed_cost + self.suffix_bound(0, self.initial_state()[2])
+
+    def suffix_bound(self, depth, day_capacities):
+        return fractional_bound(self.durations[depth:],
+                                self.priorities[depth:],
+                                day_capacities,
+                                self.instance.unscheduled_day)
+
+    def branching_choices(self, depth, residual, anesthesia_left):
+        duration = self.durations[depth]
+        anesthesia = self.instance.anesthesia[self.order[depth]]
+
+        choices = []
+        for day in range(len(residual)):
+            # rooms left in the same state are interchangeable: only one of them is tried
+            seen = set()
+            rooms = sorted(range(len(residual[day])), key=residual[day].__getitem__)
+            for room in rooms:
+                state = (residual[day][room], anesthesia_left[day][room])
+                if state in seen or state[0] < duration or (anesthesia and state[1] == 0):
+                    continue
+                seen.add(state)
+                choices.append((day, room))
+        choices.append(None)
+        return choices
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def notify(self, event):
+        if self.callback is None:
+            return
+        self.callback(event, {
+            "cost": self.incumbent_cost,
+            "bound": self.root_bound,
+            "gap": None if self.incumbent_cost is None else relative_gap(self.incumbent_cost, self.root_bound),
+            "elapsed": self.elapsed(),
+            "nodes": self.nodes,
+        })
+
+    def interruption(self):
+        if self.should_stop is not None and self.should_stop():
+            return SolverStatus.STOPPED
+        if self.timeout is not None and self.elapsed() >= self.timeout:
+            return SolverStatus.TIMEOUT
+
+        if self.shared is not None and self.adopt_shared_incumbent():
+            gap = relative_gap(self.incumbent_cost, self.root_bound)
+            if gap <= self.gap:
+                return SolverStatus.OPTIMAL if gap == 0 else SolverStatus.GAP_REACHED
+
+        if time.monotonic() - self.last_progress_time >= self.PROGRESS_INTERVAL:
+            self.last_progress_time = time.monotonic()
+            self.notify("progress")
+        return None
+
+    def update_incumbent(self, cost, days, rooms):
+        self.incumbent_cost = cost
+        self.incumbent = (list(map(int, days)), list(map(int, rooms)))
+        self.notify("incumbent")
+
+        if self.shared is not None:
+            self.shared.offer(cost, self.incumbent_plan().sessions(self.instance.resources))
+
+    def adopt_shared_incumbent(self) -> bool:
+        fetched = self.shared.fetch(self.shared_version)
+        if fetched is None:
+            return False
+
+        self.shared_version, cost, sessions = fetched
+        if self.incumbent is not None and cost >= self.incumbent_cost:
+            return False
+
+        # other solvers share the fixed patients: only the searched ones are taken over
+        sessions = sessions[self.order]
+        rooms = self.instance.resources.rooms
+        self.incumbent_cost = cost
+        self.incumbent = (np.where(sessions >= 0, sessions // rooms, -1).tolist(),
+                          np.where(sessions >= 0, sessions % rooms, -1).tolist())
+        return True
+
+    def pruning_threshold(self):
+        # costs are integers: a node must be able to save at least one unit, and the gap is conceded
+        return min(self.incumbent_cost - 1, (1 - self.gap) * self.incumbent_cost) + 1e-9
+
+    def solve(self) -> SolverResult:
+        resources = self.instance.resources
+        unscheduled_day = self.instance.unscheduled_day
+        size = len(self.order)
+
+        self.start_time = time.monotonic()
+        self.last_progress_time = self.start_time
+
+        residual, anesthesia_left, day_capacities = self.initial_state()
+        anesthesia = self.instance.anesthesia[self.order].tolist()
+        durations = self.durations.tolist()
+        priorities = self.priorities.tolist()
+
+        self.root_bound = self.fixed_cost + self.suffix_bound(0, day_capacities)
+
+        days = [-1] * size
+        rooms = [-1] * size
+        applied = [False] * size
+        cost = self.fixed_cost
+        status = None
+
+        if size == 0:
+            self.update_incumbent(cost, days, rooms)
+            stack = []
+        else:
+            stack = [[self.branching_choices(0, residual, anesthesia_left), 0]]
+
+        # a warm start prunes from the very first dive, and may already be good enough
+        if self.initial_plan is not None and self.instance.is_feasible(self.initial_plan):
+            if self.incumbent is None or self.instance.cost(self.initial_plan) < self.incumbent_cost:
+                self.update_incumbent(self.instance.cost(self.initial_plan),
+                                      self.initial_plan.day[self.order],
+                                      self.initial_plan.room[self.order])
+            gap = relative_gap(self.incumbent_cost, self.root_bound)
+            if gap <= self.gap:
+                status = SolverStatus.OPTIMAL if gap == 0 else SolverStatus.GAP_REACHED
+                stack = []
+
+        while stack:
+            if self.nodes % self.NODES_BETWEEN_CHECKS == 0:
+                status = self.interruption()
+                if status is not None:
+                    break
+
+            depth = len(stack) - 1
+            frame = stack[-1]
+
+            # undo the choice previously taken at this depth
+            if applied[depth]:
+                applied[depth] = False
+                if days[depth] >= 0:
+                    residual[days[depth]][rooms[depth]] += durations[depth]
+                    day_capacities[days[depth]] += durations[depth]
+                    anesthesia_left[days[depth]][rooms[depth]] += anesthesia[depth]
+                    cost -= priorities[depth] * days[depth]
+                else:
+                    cost -= priorities[depth] * unscheduled_day
+                days[depth] = rooms[depth] = -1
+
+            choices, next_choice = frame
+            if next_choice == len(choices):
+                stack.pop()
+                continue
+            frame[1] += 1
+
+            choice = choices[next_choice]
+            applied[depth] = True
+            if choice is None:
+                cost += priorities[depth] * unscheduled_day
+            else:
+                day, room = choice
+                days[depth], rooms[depth] = day, room
+                residual[day][room] -= durations[depth]
+                day_capacities[day] -= durations[depth]
+                anesthesia_left[day][room] -= anesthesia[depth]
+                cost += priorities[depth] * day
+            self.nodes += 1
+
+            # no pruning is possible before the first dive has produced an incumbent
+            if self.incumbent is not None:
+                if cost + self.suffix_bound(depth + 1, day_capacities) > self.pruning_threshold():
+                    continue
+
+            if depth + 1 < size:
+                stack.append([self.branching_choices(depth + 1, residual, anesthesia_left), 0])
+                continue
+
+            if self.incumbent is None or cost < self.incumbent_cost:
+                self.update_incumbent(cost, days, rooms)
+                gap = relative_gap(self.incumbent_cost, self.root_bound)
+                if gap <= self.gap:
+                    status = SolverStatus.OPTIMAL if gap == 0 else SolverStatus.GAP_REACHED
+                    break
+
+        if status is None:
+            # the whole tree has been explored: the incumbent is within the gap from the optimum
+            if self.gap <= 0:
+                status = SolverStatus.OPTIMAL
+                self.root_bound = self.incumbent_cost
+            else:
+                status = SolverStatus.GAP_REACHED
+                self.root_bound = min(self.incumbent_cost, max(self.root_bound, (1 - self.gap) * self.incumbent_cost))
+
+        plan = self.incumbent_plan()
+        if self.incumbent is None:
+            # interrupted before the first dive completed: nobody is scheduled yet
+            self.incumbent_cost = self.instance.cost(plan)
+
+        return SolverResult(plan,
+                            self.incumbent_cost,
+                            self.root_bound,
+                            status,
+                            self.nodes,
+                            self.elapsed())
+
+    def incumbent_plan(self):
+        plan = self.base_plan.copy()
+        if self.incumbent is not None:
+            days, rooms = self.incumbent
+            plan.day[self.order] = days
+            plan.room[self.order] = rooms
+        return self.instance.sequence(plan)
@@ -0,0 +1,309 @@
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+
+from src.decomposition import RollingHorizonPlanner, WeekQueue
+from src.heuristics import GreedyScheduler
+from src.local_search import LargeNeighborhoodSearch
+from src.portfolio import SharedIncumbent, combine_results
+from src.solver import BranchAndBound, SolverStatus, relative_gap
+
+
+class SolverSettings:
+    AUTOMATIC = "automatic"
+    EXACT = "exact"
+    LOCAL_SEARCH = "local search"
+    ROLLING_HORIZON = "rolling horizon"
+
+    # automatic runs plan week by week horizons longer than this many days; shorter ones are searched exactly
+    # up to EXACT_SIZE_LIMIT patients to place, and locally beyond
+    ROLLING_HORIZON_DAYS = 2 * RollingHorizonPlanner.DAYS_PER_WEEK
+    EXACT_SIZE_LIMIT = 300
+
+    # by default one worker per CPU, but a single one for replannings placing at most this many patients,
+    # which are over before more processes would even have imported the application
+    SINGLE_WORKER_SIZE_LIMIT = 20
+
+    def __init__(self, gap=0.01, timeout=60, method=AUTOMATIC, workers=None):
+        """Settings of a planning run.
+
+        Args:
+            gap (float, optional): Relative gap between incumbent and bound at which the run stops. Defaults to 0.01.
+            timeout (float, optional): Seconds after which the best plan found so far is returned. Defaults to 60.
+            method (str, optional): EXACT for branch and bound, LOCAL_SEARCH for large neighborhood search,
+                ROLLING_HORIZON for week by week planning, AUTOMATIC to choose by horizon and instance size.
+                Defaults to AUTOMATIC.
+            workers (int, optional): Solver processes run in parallel, sharing their best plan. Defaults to None,
+                one per CPU.
+        """
+        self.gap = gap
+        self.timeout = timeout
+        self.method = method
+        self.workers = workers
+
+    @staticmethod
+    def free_patients(instance, fixed=None):
+        return len(instance) if fixed is None else len(instance) - int(fixed.sum())
+
+    def choose_method(self, instance, fixed=None):
+        if self.method != SolverSettings.AUTOMATIC:
+            return self.method
+        if instance.resources.days > SolverSettings.ROLLING_HORIZON_DAYS:
+            return SolverSettings.ROLLING_HORIZON
+        if SolverSettings.free_patients(instance, fixed) <= SolverSettings.EXACT_SIZE_LIMIT:
+            return SolverSettings.EXACT
+        return SolverSettings.LOCAL_SEARCH
+
+    def worker_count(self, instance, fixed=None):
+        if self.workers is not None:
+            return max(self.workers, 1)
+        if SolverSettings.free_patients(instance, fixed) <= SolverSettings.SINGLE_WORKER_SIZE_LIMIT:
+            return 1
+        return os.cpu_count() or 1
+
+    def portfolio(self, instance, fixed=None) -> list:
+        """Returns the (method, seed) pair run by each worker.
+
+        The first worker runs the chosen method. When it is branch and bound, which proves the bound, the others
+        run local searches with different seeds, feeding it better incumbents to prune with; otherwise all of them
+        search locally. When it is the rolling horizon planner, the others first solve weeks for it through
+        a WeekQueue, then search locally.
+        """
+        workers = self.worker_count(instance, fixed)
+        method = self.choose_method(instance, fixed)
+        return [(method, 0)] + [(SolverSettings.LOCAL_SEARCH, seed) for seed in range(1, workers)]
+
+
+# solver process side: no Tk in here
+
+def run_solver(instance, settings, method, seed, events, stop_event, shared=None, initial_plan=None, fixed=None,
+               worker=0, week_queue=None):
+    def callback(event, data):
+        events.put((worker, event, data))
+
+    start_time = time.monotonic()
+    try:
+        # the greedy plan, or the greedy completion of a patched one, is the first incumbent reported
+        initial_plan = GreedyScheduler(instance).schedule(initial_plan)
+        if method == SolverSettings.EXACT:
+            solver = BranchAndBound(instance,
+                                    gap=settings.gap,
+                                    timeout=settings.timeout,
+                                    callback=callback,
+                                    should_stop=stop_event.is_set,
+                                    initial_plan=initial_plan,
+                                    fixed=fixed,
+                                    shared=shared)
+        elif method == SolverSettings.ROLLING_HORIZON:
+            # a daemonic worker cannot start a pool of its own: its siblings solve weeks through the queue
+            solver = RollingHorizonPlanner(instance,
+                                           gap=settings.gap,
+                                           timeout=settings.timeout,
+                                           callback=callback,
+                                           should_stop=stop_event.is_set,
+                                           initial_plan=initial_plan,
+                                           fixed=fixed,
+                                           week_queue=week_queue)
+        else:
+            if week_queue is not None:
+                week_queue.serve(stop_event.is_set)
+            solver = LargeNeighborhoodSearch(instance,
+                                             initial_plan,
+                                             gap=settings.gap,
+                                             timeout=max(settings.timeout - (time.monotonic() - start_time), 0),
+                                             callback=callback,
+                                             should_stop=stop_event.is_set,
+                                             fixed=fixed,
+                                             seed=seed,
+                                             shared=shared)
+        result = solver.solve()
+        if shared is not None:
+            shared.offer(result.cost, result.plan.sessions(instance.resources))
+
+        # the target is met for the whole portfolio
+        if result.status in (SolverStatus.OPTIMAL, SolverStatus.GAP_REACHED):
+            stop_event.set()
+        events.put((worker, "done", result))
+    except Exception:
+        events.put((worker, "error", traceback.format_exc()))
+
+
+class SolverEngine:
+    # Runs the solvers in separate processes, so that the Tk main loop is never blocked by them.
+    # Each worker of the portfolio runs its own method, sharing the best plan found through a SharedIncumbent;
+    # the first one meeting the gap stops the others. Their incumbents, bounds and results come back through
+    # a single queue drained by poll(), which merges them into the events of one run.
+    # Stopping first asks the solvers to return their incumbent; those that do not within STOP_GRACE_PERIOD
+    # are terminated.
+
+    STOP_GRACE_PERIOD = 3.0  # s
+
+    def __init__(self):
+        # spawn is the only start method available on Windows, and forking a Tk process is unsafe anyway
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = []
+        self.exiting = []  # (process, deadline) pairs of the workers of finished runs
+        self.events = None
+        self.stop_event = None
+        self.stop_deadline = None
+        self.stopped = False
+        self.settings = None
+        self.shared = None
+        self.week_queue = None
+        self.results = {}
+        self.nodes = {}
+        self.cost = None
+        self.bound = None
+        self.start_time = None
+
+    @property
+    def running(self):
+        return len(self.processes) > 0
+
+    @property
+    def busy(self):
+        # worker processes of a finished run may take a while to exit
+        return self.running or len(self.exiting) > 0
+
+    def start(self, instance, settings, initial_plan=None, fixed=None):
+        """Starts solving in new processes, one per worker of the settings.
+
+        Args:
+            instance (PlanningInstance): Patients and resources to plan.
+            settings (SolverSettings): Gap, timeout, method and workers of the run.
+            initial_plan (Plan, optional): Partial plan to start from, e.g. a patched previous plan. Defaults to None.
+            fixed (np.ndarray, optional): Mask of the patients keeping their session of initial_plan. Defaults to None.
+        """
+        if self.running:
+            raise RuntimeError("A solver process is already running")
+
+        self.events = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.stop_deadline = None
+        self.stopped = False
+        self.settings = settings
+        self.results = {}
+        self.nodes = {}
+        self.cost = None
+        self.bound = None
+        self.start_time = time.monotonic()
+
+        # kept referenced until the workers are done: they rebuild its lock from the parent's one
+        self.shared = SharedIncumbent(len(instance), context=self.context)
+        portfolio = settings.portfolio(instance, fixed)
+        if portfolio[0][0] == SolverSettings.ROLLING_HORIZON and len(portfolio) > 1:
+            self.week_queue = WeekQueue(self.context, helpers=len(portfolio) - 1)
+        for worker, (method, seed) in enumerate(portfolio):
+            process = self.context.Process(target=run_solver,
+                                           args=(instance, settings, method, seed, self.events, self.stop_event,
+                                                 self.shared, initial_plan, fixed, worker, self.week_queue),
+                                           name="solver-" + str(worker),
+                                           daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def stop(self):
+        if not self.running or self.stop_deadline is not None:
+            return
+        self.stopped = True
+        self.stop_event.set()
+        self.stop_deadline = time.monotonic() + self.STOP_GRACE_PERIOD
+
+    def statistics(self):
+        return {
+            "cost": self.cost,
+            "bound": self.bound,
+            "gap": relative_gap(self.cost, self.bound),
+            "elapsed": time.monotonic() - self.start_time,
+            "nodes": sum(self.nodes.values()),
+        }
+
+    def poll(self) -> list:
+        """Collects the events sent by the solvers since the last call, without blocking.
+
+        Events are (name, payload) pairs: ("incumbent", dict) and ("progress", dict) while solving,
+        then exactly one of ("done", SolverResult), ("error", str) or ("killed", None). Incumbents are only
+        reported when they improve on those of all workers, and bounds are the best proved by any of them.
+        """
+        self.reap()
+        if not self.running:
+            return []
+
+        # checked before draining: a process found dead has already flushed all of its events
+        alive = [process.is_alive() for process in self.processes]
+
+        events = []
+        progress = False
+        while True:
+            try:
+                worker, event, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event == "error":
+                events.append((event, payload))
+                self.finish()
+                return events
+            if event == "done":
+                self.results[worker] = payload
+                if len(self.results) == len(self.processes):
+                    events.append((event, combine_results(list(self.results.values()),
+                                                          self.settings.gap,
+                                                          self.stopped)))
+                    self.finish()
+                    return events
+                continue
+
+            self.nodes[worker] = payload["nodes"]
+            self.bound = payload["bound"] if self.bound is None else max(self.bound, payload["bound"])
+            if event == "incumbent" and (self.cost is None or payload["cost"] < self.cost):
+                self.cost = payload["cost"]
+                events.append((event, self.statistics()))
+            else:
+                progress = True
+
+        if progress and self.cost is not None:
+            events.append(("progress", self.statistics()))
+
+        if not all(alive[worker] or worker in self.results for worker in range(len(self.processes))):
+            exit_codes = [process.exitcode for worker, process in enumerate(self.processes)
+                          if not alive[worker] and worker not in self.results]
+            events.append(("error", "The solver process exited with code " + str(exit_codes[0])))
+            self.finish()
+        elif self.stop_deadline is not None and time.monotonic() > self.stop_deadline:
+            for process in self.processes:
+                process.terminate()
+            events.append(("killed", None))
+            self.finish()
+
+        return events
+
+    def finish(self):
+        # workers still running after an error are of no use anymore; they are left STOP_GRACE_PERIOD to exit,
+        # checked by later polls instead of joined here, which would block the caller
+        self.stop_event.set()
+        deadline = time.monotonic() + self.STOP_GRACE_PERIOD
+        self.exiting += [(process, deadline) for process in self.processes]
+
+        self.events.close()
+        self.processes = []
+        self.events = None
+        self.stop_event = None
+        self.stop_deadline = None
+        self.settings = None
+        self.shared = None
+        self.week_queue = None
+
+    def reap(self):
+        exiting = []
+        for process, deadline in self.exiting:
+            if not process.is_alive():
+                process.join()
+            elif time.monotonic() > deadline:
+                process.kill()
+                exiting.append((process, float("inf")))
+            else:
+                exiting.append((process, deadline))
+        self.exiting = exiting
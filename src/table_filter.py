@@ -0,0 +1,127 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.excel_loader import ExcelLoader
+
+# combining marks left by the NFKD decomposition of accented letters
+COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+
+
+def normalize_texts(values) -> pd.Series:
+    # case and accents do not matter when searching: "Nicolò" is found by "nicolo"
+    return (pd.Series(values, dtype=object).astype(str)
+            .str.normalize("NFKD")
+            .str.replace(COMBINING_MARKS, "", regex=True)
+            .str.casefold())
+
+
+class PrefixIndex:
+    # Word prefix index over text columns. Columns are factorized, so that each distinct value is normalized and split
+    # into words once; the words are kept sorted, and those starting with a given prefix are a contiguous run of them,
+    # found with two binary searches. A query then marks the matching values and maps them onto the rows.
+
+    def __init__(self, columns):
+        self.codes = []  # per column, the value of each row, numbered across all columns
+        words = []
+        owners = []
+        values = 0
+        for column in columns:
+            codes, uniques = pd.factorize(pd.Series(column, dtype=object).astype(str))
+            self.codes.append(codes + values)
+            column_words = normalize_texts(uniques).str.split().explode().dropna()
+            words.append(column_words.to_numpy(dtype=str))
+            owners.append(column_words.index.to_numpy(dtype=np.int64) + values)
+            values += len(uniques)
+
+        self.values = values
+        words = np.concatenate(words) if words else np.array([], dtype=str)
+        owners = np.concatenate(owners) if owners else np.array([], dtype=np.int64)
+        order = np.argsort(words, kind="stable")
+        self.words = words[order]
+        self.owners = owners[order]
+
+    def mask(self, prefix) -> np.ndarray:
+        # rows having a word starting with prefix in any of the columns
+        prefix = normalize_texts([prefix])[0]
+        start = np.searchsorted(self.words, prefix, side="left")
+        end = np.searchsorted(self.words, prefix + "\U0010ffff", side="left")
+
+        matching = np.zeros(self.values, dtype=np.bool_)
+        matching[self.owners[start:end]] = True
+        mask = np.zeros(len(self.codes[0]) if self.codes else 0, dtype=np.bool_)
+        for codes in self.codes:
+            mask |= matching[codes]
+        return mask
+
+
+class DateIndex:
+    # rows sorted by date: the rows within a range of dates are a contiguous run of them
+
+    def __init__(self, column):
+        dates = pd.to_datetime(pd.Series(column), errors="coerce").to_numpy(dtype="datetime64[ns]")
+        self.order = np.argsort(dates, kind="stable")  # missing dates last
+        self.dates = dates[self.order]
+
+    def mask(self, start=None, end=None) -> np.ndarray:
+        # rows dated from start to end, both included
+        first = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns"), "left")
+        last = (np.searchsorted(self.dates, np.datetime64("NaT"), "left") if end is None
+                else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), "right"))
+
+        mask = np.zeros(len(self.dates), dtype=np.bool_)
+        mask[self.order[first:last]] = True
+        return mask
+
+
+def flag_bitmap(column) -> np.ndarray:
+    # a flag column holds a few distinct values: each of them is parsed once
+    codes, uniques = pd.factorize(pd.Series(column, dtype=object), use_na_sentinel=False)
+    flags = np.array([ExcelLoader.parse_flag(value) for value in uniques], dtype=np.bool_)
+    return flags[codes]
+
+
+class TableIndex:
+    # Indexes of a table's data frame answering searches with a few vectorized passes, instead of a scan of
+    # the rows: a PrefixIndex on the text columns, a DateIndex on the date column and a bitmap per flag column.
+    # Columns missing from the data frame are not indexed.
+
+    def __init__(self, data_frame, text_columns=(), date_column=None, flag_columns=()):
+        """Builds the indexes of a data frame.
+
+        Args:
+            data_frame (pd.DataFrame): Rows to index.
+            text_columns (tuple, optional): Columns searched by word prefixes. Defaults to none.
+            date_column (str, optional): Column filtered by date ranges. Defaults to None.
+            flag_columns (tuple, optional): Boolean columns filtered by their value. Defaults to none.
+        """
+        self.size = data_frame.shape[0]
+        text_columns = [data_frame[column] for column in text_columns if column in data_frame.columns]
+        self.words = PrefixIndex(text_columns) if text_columns else None
+        self.dates = DateIndex(data_frame[date_column]) if date_column in data_frame.columns else None
+        self.flags = {column: flag_bitmap(data_frame[column])
+                      for column in flag_columns if column in data_frame.columns}
+
+    def search(self, text="", start=None, end=None, flags=()) -> np.ndarray:
+        """Rows matching all of the given criteria, in the order of the data frame.
+
+        Args:
+            text (str, optional): Words, each of which must prefix a word of the text columns. Defaults to "".
+            start (date, optional): First date of the date column. Defaults to None.
+            end (date, optional): Last date of the date column. Defaults to None.
+            flags (tuple, optional): Flag columns that must be true. Defaults to none.
+
+        Returns:
+            np.ndarray: Row numbers of the matching rows.
+        """
+        mask = np.ones(self.size, dtype=np.bool_)
+        if self.words is not None:
+            for word in text.split():
+                mask &= self.words.mask(word)
+        if self.dates is not None and (start is not None or end is not None):
+            mask &= self.dates.mask(start, end)
+        for column in flags:
+            if column in self.flags:
+                mask &= self.flags[column]
+        return np.flatnonzero(mask)
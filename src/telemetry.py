@@ -0,0 +1,113 @@
+import threading
+import time
+
+
+class SolverTelemetry:
+    # Latest state of a planning run, fed with every event of the solver engine but rendered at most every
+    # RENDER_INTERVAL: however many incumbents arrive in between, the display is redrawn once, with the last one.
+
+    RENDER_INTERVAL = 0.5  # s
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.timeout = None
+        self.state = None
+        self.incumbents = 0
+        self.events = 0
+        self.dirty = False
+        self.last_render_time = None
+
+    @property
+    def active(self):
+        return self.state is not None
+
+    def start(self, timeout=None):
+        self.timeout = timeout
+        self.state = {"cost": None, "bound": None, "gap": None, "elapsed": 0.0, "nodes": 0}
+        self.incumbents = 0
+        self.events = 0
+        self.dirty = True
+        self.last_render_time = None
+
+    def push(self, event, payload):
+        if event not in ("incumbent", "progress"):
+            return
+        self.state.update(payload)
+        self.incumbents += event == "incumbent"
+        self.events += 1
+        self.dirty = True
+
+    def finish(self):
+        self.state = None
+        self.dirty = True
+
+    def render_due(self):
+        if not self.dirty:
+            return False
+        # the end of a run is shown right away
+        return (not self.active or self.last_render_time is None
+                or self.clock() - self.last_render_time >= self.RENDER_INTERVAL)
+
+    def rendered(self):
+        self.dirty = False
+        self.last_render_time = self.clock()
+
+    def progress(self):
+        # fraction of the time limit elapsed, None without a time limit
+        if not self.active or not self.timeout:
+            return None
+        return min(self.state["elapsed"] / self.timeout, 1.0)
+
+    def text(self):
+        if not self.active:
+            return "Nessuna pianificazione in corso"
+        if self.state["cost"] is None:
+            return "Ricerca del primo piano..."
+        return "Costo: {0}\nBound: {1:.0f}\nGap: {2:.2%}\nTempo: {3:.1f} s\nNodi: {4}\nPiani trovati: {5}".format(
+            self.state["cost"],
+            self.state["bound"],
+            self.state["gap"],
+            self.state["elapsed"],
+            self.state["nodes"],
+            self.incumbents)
+
+
+class BatchedWriter:
+    # Stream writing into a Tk text widget, for sys.stdout. Writes are only buffered, and may come from any thread:
+    # the Tk thread drains the buffer every FLUSH_INTERVAL, inserting what was written meanwhile at once and
+    # scrolling once, so that bursts of prints cost one insertion; the widget keeps MAX_LINES lines.
+
+    FLUSH_INTERVAL = 100  # ms
+    MAX_LINES = 2000
+
+    def __init__(self, text_widget):
+        # must be created on the Tk thread, which drains the buffer from then on
+        self.text_widget = text_widget
+        self.buffer = []
+        self.lock = threading.Lock()  # prints may come from worker threads
+        self.text_widget.after(self.FLUSH_INTERVAL, self.drain)
+
+    def write(self, string):
+        with self.lock:
+            self.buffer.append(string)
+
+    def flush(self):
+        # writes always reach the widget through flush_buffer, on the Tk thread
+        pass
+
+    def drain(self):
+        self.flush_buffer()
+        self.text_widget.after(self.FLUSH_INTERVAL, self.drain)
+
+    def flush_buffer(self):
+        with self.lock:
+            text = "".join(self.buffer)
+            self.buffer.clear()
+        if not text:
+            return
+
+        self.text_widget.insert("end", text)
+        lines = int(self.text_widget.index("end-1c").split(".")[0])
+        if lines > self.MAX_LINES:
+            self.text_widget.delete("1.0", "{0}.0".format(lines - self.MAX_LINES + 1))
+        self.text_widget.see("end")
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from math import ceil
+
+import numpy as np
+
+
+def font_key(font) -> tuple:
+    # fonts are told apart by their attributes, not by their Tk names: every Font object gets a name of its own,
+    # even when it is the same family, size and weight as another one
+    return tuple(sorted(font.actual().items()))
+
+
+class TextTruncator:
+    # Fits texts into a given width, appending an ellipsis when they had to be cut.
+    # The longest fitting prefix is found by binary search over prefix widths, i.e. with O(log n) measures,
+    # and results are kept in an LRU cache keyed by (text, font attributes, width).
+
+    def __init__(self, ellipsis="…", cache_size=8192):
+        self.ellipsis = ellipsis
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.measures = 0  # fonts measured since creation, for profiling purposes
+
+    def measure(self, font, text):
+        self.measures += 1
+        return font.measure(text)
+
+    def longest_fitting_prefix(self, text, font, max_width, suffix):
+        # the whole text is known not to fit: the empty prefix is checked by the caller
+        low, high = 0, len(text)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.measure(font, text[:middle] + suffix) <= max_width:
+                low = middle
+            else:
+                high = middle
+        return text[:low]
+
+    def truncate(self, text, font, max_width):
+        text = str(text)
+        key = (text, font_key(font), max_width)
+
+        truncated_text = self.cache.get(key)
+        if truncated_text is not None:
+            self.cache.move_to_end(key)
+            return truncated_text
+
+        if self.measure(font, text) <= max_width:
+            truncated_text = text
+        elif self.ellipsis and self.measure(font, self.ellipsis) <= max_width:
+            truncated_text = self.longest_fitting_prefix(text, font, max_width, self.ellipsis) + self.ellipsis
+        else:  # not even the ellipsis fits
+            truncated_text = self.longest_fitting_prefix(text, font, max_width, "")
+
+        self.cache[key] = truncated_text
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)  # least recently used
+
+        return truncated_text
+
+    def clear(self):
+        self.cache.clear()
+
+
+class GlyphWidthCache:
+    # Estimates text widths from per-char advance widths: each char is measured once per font,
+    # after which the widths of a whole column come from vectorized lookups and sums.
+    # Kerning is ignored, so estimates are only used to pick the candidates worth an exact measure.
+
+    def __init__(self):
+        self.advances = {}  # font attributes -> advance widths indexed by code point, NaN when not measured yet
+
+    def get_advances(self, font, code_points):
+        key = font_key(font)
+        advances = self.advances.get(key, np.zeros(1))  # code point 0 pads shorter strings
+        needed_size = int(code_points.max()) + 1
+        if needed_size > len(advances):
+            advances = np.concatenate((advances, np.full(needed_size - len(advances), np.nan)))
+
+        used_code_points = np.unique(code_points)
+        for code_point in used_code_points[np.isnan(advances[used_code_points])]:
+            advances[code_point] = font.measure(chr(code_point))
+
+        self.advances[key] = advances
+        return advances
+
+    def estimate_widths(self, font, texts):
+        if len(texts) == 0:
+            return np.zeros(0)
+
+        # fixed-width unicode strings are rows of UTF-32 code points, zero-padded
+        texts = np.asarray(texts, dtype=str)
+        max_length = texts.dtype.itemsize // 4
+        if max_length == 0:
+            return np.zeros(len(texts))
+
+        code_points = texts.view(np.uint32).reshape(len(texts), max_length)
+        return self.get_advances(font, code_points)[code_points].sum(axis=1)
+
+    def max_width(self, font, values, top_k=16, sample_size=None, seed=0):
+        """Width of the widest value once displayed.
+
+        Args:
+            font: Font the values are displayed with.
+            values: Values to be displayed, converted with str().
+            top_k (int, optional): Values with the widest estimates measured exactly; None to trust estimates. Defaults to 16.
+            sample_size (int, optional): Distinct values considered at most, chosen at random; None for all of them. Defaults to None.
+            seed (int, optional): Seed of the sampling. Defaults to 0.
+        """
+        texts = list(dict.fromkeys(map(str, values)))
+        if len(texts) == 0:
+            return 0
+
+        if sample_size is not None and len(texts) > sample_size:
+            sample = np.random.default_rng(seed).choice(len(texts), size=sample_size, replace=False)
+            texts = [texts[index] for index in sample]
+
+        estimated_widths = self.estimate_widths(font, texts)
+        if top_k is None:
+            return int(ceil(estimated_widths.max()))
+
+        candidates = np.argsort(estimated_widths)[-top_k:]
+        return max(font.measure(texts[candidate]) for candidate in candidates)
@@ -0,0 +1,13 @@
+import numpy as np
+
+from src.planning import PlanningInstance
+
+
+def random_instance(rng, size, resources, durations=(45, 90, 135), anesthesia=0.3, infectious=0.1,
+                    max_waiting_days=400):
+    # patients drawn at random: durations among the given ones, flags with the given probabilities
+    return PlanningInstance(durations=rng.choice(np.asarray(durations), size),
+                            anesthesia=rng.random(size) < anesthesia,
+                            infectious=rng.random(size) < infectious,
+                            waiting_days=rng.integers(0, max_waiting_days, size),
+                            resources=resources)
@@ -0,0 +1,99 @@
+import threading
+import unittest
+
+from src import background
+
+
+class FakeWidget:
+    # stands in for the Tk main loop: scheduled callbacks are run by hand
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+
+    def run_pending(self):
+        scheduled = self.scheduled
+        self.scheduled = []
+        for callback in scheduled:
+            callback()
+
+
+class TestBackgroundTask(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.calls = []
+
+    def start(self, work):
+        return background.BackgroundTask(widget=self.widget,
+                                         work=work,
+                                         on_progress=lambda *progress: self.calls.append(("progress", progress)),
+                                         on_done=lambda result: self.calls.append(("done", result)),
+                                         on_error=lambda exception: self.calls.append(("error", exception)),
+                                         on_cancel=lambda: self.calls.append(("cancel",))).start()
+
+    def wait(self, task):
+        task.future.result(timeout=5)
+        while not task.finished:
+            self.widget.run_pending()
+
+    def test_result_is_delivered_on_poll(self):
+        task = self.start(lambda task: 42)
+        task.future.result(timeout=5)
+
+        # nothing reaches the callbacks until the main loop polls
+        self.assertEqual(self.calls, [])
+
+        self.wait(task)
+        self.assertEqual(self.calls, [("done", 42)])
+        self.assertEqual(self.widget.scheduled, [])
+
+    def test_only_latest_progress_is_shown(self):
+        release = threading.Event()
+
+        def work(task):
+            for rows in range(1, 4):
+                task.report_progress(rows, 3)
+            release.wait(timeout=5)
+            return "finished"
+
+        task = self.start(work)
+        while not task.events.qsize() >= 3:
+            pass
+        self.widget.run_pending()
+        self.assertEqual(self.calls, [("progress", (3, 3))])
+
+        release.set()
+        self.wait(task)
+        self.assertEqual(self.calls[-1], ("done", "finished"))
+
+    def test_error(self):
+        def work(task):
+            raise ValueError("broken file")
+
+        task = self.start(work)
+        self.wait(task)
+
+        self.assertEqual(self.calls[0][0], "error")
+        self.assertEqual(str(self.calls[0][1]), "broken file")
+
+    def test_cancel(self):
+        started = threading.Event()
+
+        def work(task):
+            started.set()
+            while True:
+                task.check_cancelled()
+
+        task = self.start(work)
+        started.wait(timeout=5)
+        task.cancel()
+        self.wait(task)
+
+        self.assertEqual(self.calls, [("cancel",)])
+
+
+if __name__ == '__main__':
+    unittest.main()
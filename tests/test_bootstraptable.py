@@ -0,0 +1,151 @@
+import types
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import bootstraptable
+
+
+class TestSortedView(unittest.TestCase):
+
+    def test_sort_permutation(self):
+        surnames = pd.Series(["b", "A", "c", "a", "B"])
+        np.testing.assert_array_equal(bootstraptable.sort_permutation(surnames), [1, 3, 0, 4, 2])
+        # ties keep the order of the rows in both directions
+        np.testing.assert_array_equal(bootstraptable.sort_permutation(surnames, ascending=False), [2, 0, 4, 1, 3])
+
+        dates = pd.Series(pd.to_datetime(["2023-01-05", "2023-01-01", "2023-01-03"]))
+        np.testing.assert_array_equal(bootstraptable.sort_permutation(dates), [1, 2, 0])
+        np.testing.assert_array_equal(bootstraptable.sort_permutation(pd.Series([3, 1, 2]), ascending=False),
+                                      [0, 2, 1])
+
+    def test_compose_view(self):
+        permutation = np.array([4, 2, 0, 3, 1])
+        np.testing.assert_array_equal(bootstraptable.compose_view(permutation, np.array([0, 1, 2]), 5), [2, 0, 1])
+        np.testing.assert_array_equal(bootstraptable.compose_view(permutation, None, 5), permutation)
+        np.testing.assert_array_equal(bootstraptable.compose_view(None, np.array([1, 3]), 5), [1, 3])
+        self.assertIsNone(bootstraptable.compose_view(None, None, 5))
+        self.assertEqual(len(bootstraptable.compose_view(permutation, np.array([], dtype=np.int64), 5)), 0)
+
+
+class ScrolledCanvas:
+    # canvasx and canvasy of a canvas scrolled by the given offsets
+
+    def __init__(self, x_offset=0, y_offset=0):
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+
+    def canvasx(self, x):
+        return x + self.x_offset
+
+    def canvasy(self, y):
+        return y + self.y_offset
+
+
+class TestCellLocator(unittest.TestCase):
+
+    def setUp(self):
+        self.row_pitch = 61
+        self.column_widths = [120, 80, 200, 45]
+        self.locator = bootstraptable.CellLocator(self.row_pitch, self.column_widths)
+
+    @staticmethod
+    def reference_cell(x, y, row_pitch, column_widths):
+        # the cell whose rectangle holds the point
+        row = y // row_pitch
+        left = 0
+        for column, width in enumerate(column_widths):
+            if left <= x < left + width:
+                return row, column
+            left += width
+        return row, None
+
+    def assert_cells(self, column_widths):
+        for y in range(0, 10 * self.row_pitch, 7):
+            for x in range(0, sum(column_widths) + 30, 5):
+                self.assertEqual(self.locator.locate(x, y), self.reference_cell(x, y, self.row_pitch, column_widths))
+
+    def test_locate(self):
+        self.assert_cells(self.column_widths)
+        # edges belong to the following row and column
+        self.assertEqual(self.locator.locate(119, 60), (0, 0))
+        self.assertEqual(self.locator.locate(120, 61), (1, 1))
+        self.assertEqual(self.locator.locate(-1, -1), (0, None))
+
+    def test_uneven_widths(self):
+        column_widths = [60, 300, 10, 100]
+        self.locator = bootstraptable.CellLocator(self.row_pitch, column_widths)
+        self.assert_cells(column_widths)
+        self.assertEqual(self.locator.column_at(65), 1)
+
+    def test_scrolled(self):
+        # the same point of the window is another cell once the canvas is scrolled
+        table = types.SimpleNamespace(cell_locator=self.locator, table_canvas=ScrolledCanvas())
+        event = types.SimpleNamespace(x=130, y=70)
+        self.assertEqual(bootstraptable.Table.get_cell(table, event), (1, 1))
+
+        table.table_canvas = ScrolledCanvas(x_offset=100, y_offset=5 * self.row_pitch + 10)
+        self.assertEqual(bootstraptable.Table.get_cell(table, event), (6, 2))
+
+        table.table_canvas = ScrolledCanvas(x_offset=400, y_offset=1000 * self.row_pitch)
+        self.assertEqual(bootstraptable.Table.get_cell(table, event), (1001, None))
+
+
+class FakeWidget:
+    # runs the callbacks scheduled with after only when asked to
+
+    def __init__(self):
+        self.jobs = {}
+
+    def after(self, interval, callback):
+        job = "after#" + str(len(self.jobs))
+        self.jobs[job] = callback
+        return job
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+    def run_jobs(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+class TestEventCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.events = []
+        self.coalescer = bootstraptable.EventCoalescer(self.widget, self.events.append, interval=16)
+
+    def test_burst(self):
+        for x in range(100):
+            self.coalescer(types.SimpleNamespace(x=x, y=0))
+        self.assertEqual(len(self.widget.jobs), 1)
+
+        self.widget.run_jobs()
+        self.assertEqual([event.x for event in self.events], [99])
+
+        # the next burst is scheduled again
+        self.coalescer(types.SimpleNamespace(x=5, y=0))
+        self.widget.run_jobs()
+        self.assertEqual([event.x for event in self.events], [99, 5])
+        self.widget.run_jobs()
+        self.assertEqual(len(self.events), 2)
+
+    def test_cancel(self):
+        self.coalescer(types.SimpleNamespace(x=1, y=0))
+        self.coalescer.cancel()
+        self.assertEqual(len(self.widget.jobs), 0)
+        self.widget.run_jobs()
+        self.assertEqual(self.events, [])
+
+        self.coalescer.cancel()
+        self.coalescer(types.SimpleNamespace(x=2, y=0))
+        self.widget.run_jobs()
+        self.assertEqual([event.x for event in self.events], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
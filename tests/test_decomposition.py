@@ -0,0 +1,132 @@
+import queue
+import threading
+import types
+import unittest
+
+import numpy as np
+
+from src import decomposition
+from src.heuristics import GreedyScheduler
+from src.planning import Plan, PlanningInstance, Resources
+from src.solver import SolverStatus
+from tests.instances import random_instance
+
+
+class TestWeeks(unittest.TestCase):
+
+    def test_split_weeks(self):
+        self.assertEqual(decomposition.split_weeks(12, 5), [(0, 5), (5, 5), (10, 2)])
+        self.assertEqual(decomposition.split_weeks(5, 5), [(0, 5)])
+
+    def test_assign_weeks(self):
+        # one room of 90 minutes a day, two days a week: 180 minutes a week
+        resources = Resources(rooms=1, days=4, session_duration=90, max_anesthesia_patients=1)
+        instance = PlanningInstance(durations=[90, 90, 90, 45, 90, 135],
+                                    anesthesia=[False, False, False, True, True, False],
+                                    infectious=np.zeros(6, dtype=np.bool_),
+                                    waiting_days=[50, 40, 30, 20, 10, 60],
+                                    resources=resources)
+        weeks = decomposition.split_weeks(resources.days, 2)
+
+        # oldest first; the patient longer than a session fits no week
+        self.assertEqual(decomposition.assign_weeks(instance, weeks).tolist(), [0, 0, 1, 1, -1, -1])
+
+    def test_assign_weeks_with_fixed_patients(self):
+        resources = Resources(rooms=1, days=4, session_duration=90)
+        instance = PlanningInstance(durations=[90, 90, 90],
+                                    anesthesia=np.zeros(3, dtype=np.bool_),
+                                    infectious=np.zeros(3, dtype=np.bool_),
+                                    waiting_days=[50, 40, 30],
+                                    resources=resources)
+        weeks = decomposition.split_weeks(resources.days, 2)
+        initial_plan = Plan([-1, -1, 1], [-1, -1, 0])
+        fixed = np.array([False, False, True])
+
+        self.assertEqual(decomposition.assign_weeks(instance, weeks, initial_plan, fixed).tolist(), [0, 1, 0])
+
+    def test_week_instance_costs(self):
+        rng = np.random.default_rng(4)
+        instance = random_instance(rng, 40, Resources(days=12))
+        patients = np.arange(10, 30)
+        week = decomposition.week_instance(instance, patients, first_day=5, days=5)
+
+        # any plan of the week costs what it costs on the horizon, less the same constant
+        constant = 5 * int(instance.priorities[patients].sum())
+        for _ in range(10):
+            week_plan = Plan(rng.integers(-1, 5, len(patients)), rng.integers(0, 2, len(patients)))
+            plan = Plan.empty(len(instance))
+            plan.day[patients] = np.where(week_plan.scheduled, week_plan.day + 5, -1)
+            plan.room[patients] = week_plan.room
+            horizon_cost = instance.cost(plan) - (instance.unscheduled_day
+                                                  * int(np.delete(instance.priorities, patients).sum()))
+            self.assertEqual(week.cost(week_plan), horizon_cost - constant)
+
+
+class TestRollingHorizonPlanner(unittest.TestCase):
+
+    def test_plan(self):
+        rng = np.random.default_rng(0)
+        instance = random_instance(rng, 150, Resources(days=12))
+        events = []
+
+        result = decomposition.RollingHorizonPlanner(instance, callback=lambda event, data: events.append(data)).solve()
+
+        self.assertTrue(instance.is_feasible(result.plan))
+        self.assertEqual(result.cost, instance.cost(result.plan))
+        self.assertLessEqual(result.bound, result.cost)
+        self.assertLess(result.cost, instance.cost(GreedyScheduler(instance).schedule()))
+        # one incumbent per week fixed, after the empty plan
+        self.assertEqual(len(events), 1 + 3)
+        self.assertEqual([data["cost"] for data in events], sorted((data["cost"] for data in events), reverse=True))
+
+    def test_fixed_patients(self):
+        rng = np.random.default_rng(1)
+        instance = random_instance(rng, 60, Resources(days=10))
+        initial_plan = GreedyScheduler(instance).schedule()
+        fixed = initial_plan.scheduled & (rng.random(len(instance)) < 0.5)
+
+        result = decomposition.RollingHorizonPlanner(instance, initial_plan=initial_plan, fixed=fixed).solve()
+
+        self.assertTrue(instance.is_feasible(result.plan))
+        self.assertEqual(result.plan.day[fixed].tolist(), initial_plan.day[fixed].tolist())
+        self.assertEqual(result.plan.room[fixed].tolist(), initial_plan.room[fixed].tolist())
+
+    def test_parallel_weeks(self):
+        # small weeks are solved to optimality, whichever process solves them
+        rng = np.random.default_rng(2)
+        instance = random_instance(rng, 24, Resources(rooms=1, days=10, session_duration=180))
+
+        sequential = decomposition.RollingHorizonPlanner(instance, gap=0).solve()
+        parallel = decomposition.RollingHorizonPlanner(instance, gap=0, workers=2).solve()
+
+        self.assertEqual(parallel.cost, sequential.cost)
+        self.assertEqual(parallel.plan.day.tolist(), sequential.plan.day.tolist())
+
+    def test_week_queue(self):
+        rng = np.random.default_rng(2)
+        instance = random_instance(rng, 24, Resources(rooms=1, days=10, session_duration=180))
+        week_queue = decomposition.WeekQueue(types.SimpleNamespace(Queue=queue.Queue), helpers=1)
+        helper = threading.Thread(target=week_queue.serve, args=(lambda: False,))
+        helper.start()
+
+        sequential = decomposition.RollingHorizonPlanner(instance, gap=0).solve()
+        shared = decomposition.RollingHorizonPlanner(instance, gap=0, week_queue=week_queue).solve()
+        helper.join(timeout=10)
+
+        # the helper is released once the weeks are solved
+        self.assertFalse(helper.is_alive())
+        self.assertEqual(shared.cost, sequential.cost)
+        self.assertEqual(shared.plan.day.tolist(), sequential.plan.day.tolist())
+
+    def test_stop(self):
+        rng = np.random.default_rng(3)
+        instance = random_instance(rng, 100, Resources(days=10))
+
+        result = decomposition.RollingHorizonPlanner(instance, should_stop=lambda: True).solve()
+
+        self.assertEqual(result.status, SolverStatus.STOPPED)
+        self.assertTrue(instance.is_feasible(result.plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from src import evaluation
+from src.heuristics import GreedyScheduler
+from src.planning import Plan, PlanningInstance, Resources
+from tests.instances import random_instance
+
+
+class TestPlanEvaluator(unittest.TestCase):
+
+    def test_violations(self):
+        resources = Resources(rooms=1, days=2, session_duration=100, max_anesthesia_patients=1)
+        instance = PlanningInstance(durations=[60, 60, 30, 30],
+                                    anesthesia=[True, True, False, False],
+                                    infectious=[False, True, False, False],
+                                    waiting_days=[0, 1, 2, 3],
+                                    resources=resources)
+        # day 0 holds 150 minutes and two anesthesia patients, the infectious one first
+        plan = Plan(day=[0, 0, 0, -1], room=[0, 0, 0, -1], order=[1, 0, 2, 0])
+
+        result = evaluation.PlanEvaluator(instance).evaluate(plan)
+
+        self.assertEqual(result.cost, instance.cost(plan))
+        self.assertEqual(result.overtime, 50)
+        self.assertEqual(result.anesthesia_excess, 1)
+        self.assertEqual(result.infectious_violations, 2)
+        self.assertEqual(result.unscheduled, 1)
+        self.assertFalse(result.feasible)
+
+        result = evaluation.PlanEvaluator(instance).evaluate(instance.sequence(Plan([0, 1, 0, 1], [0, 0, 0, 0])))
+        self.assertTrue(result.feasible)
+        self.assertEqual(result.infectious_violations, 0)
+
+    def test_batch(self):
+        rng = np.random.default_rng(0)
+        instance = random_instance(rng, 200, Resources(rooms=3, days=5), durations=range(15, 135, 15), infectious=0.2)
+        plans = [instance.sequence(Plan(rng.integers(-1, 5, len(instance)), rng.integers(0, 3, len(instance))))
+                 for _ in range(8)]
+        plans.append(GreedyScheduler(instance).schedule())
+
+        evaluator = evaluation.PlanEvaluator(instance)
+        batch = evaluator.evaluate_batch(np.stack([plan.day for plan in plans]),
+                                         np.stack([plan.room for plan in plans]),
+                                         np.stack([plan.order for plan in plans]))
+
+        for index, plan in enumerate(plans):
+            single = evaluator.evaluate(plan)
+            self.assertEqual(batch.cost[index], single.cost)
+            self.assertEqual(batch.cost[index], instance.cost(plan))
+            self.assertEqual(batch.overtime[index], single.overtime)
+            self.assertEqual(batch.anesthesia_excess[index], single.anesthesia_excess)
+            self.assertEqual(batch.infectious_violations[index], 0)  # sequenced plans
+            self.assertEqual(bool(batch.feasible[index]), instance.is_feasible(plan))
+        self.assertTrue(batch.feasible[-1])
+
+
+class TestIncrementalPlan(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.instance = random_instance(rng, 500, Resources(rooms=3, days=10), durations=range(15, 135, 15),
+                                        infectious=0.2)
+        self.initial_plan = GreedyScheduler(self.instance).schedule()
+
+    def test_delta_costs(self):
+        state = evaluation.PlanEvaluator(self.instance).incremental(self.initial_plan)
+        rng = np.random.default_rng(1)
+
+        for first, second in rng.integers(0, len(self.instance), size=(100, 2)).tolist():
+            expected_cost = state.cost + state.swap_delta(first, second)
+            state.swap(first, second)
+            self.assertEqual(state.cost, expected_cost)
+
+            session = int(rng.integers(-1, len(state.session_days)))
+            expected_cost = state.cost + state.move_delta(first, session)
+            state.move(first, session)
+            self.assertEqual(state.cost, expected_cost)
+
+        plan = state.plan()
+        self.assertEqual(self.instance.cost(plan), state.cost)
+        minutes, anesthesia_patients = self.instance.session_loads(plan)
+        np.testing.assert_array_equal(state.residual, self.instance.resources.session_duration - minutes)
+        np.testing.assert_array_equal(state.anesthesia_left,
+                                      self.instance.resources.max_anesthesia_patients - anesthesia_patients)
+
+    def test_copy(self):
+        state = evaluation.PlanEvaluator(self.instance).incremental(self.initial_plan)
+        copied = state.copy()
+        patient = int(np.flatnonzero(self.initial_plan.scheduled)[0])
+        state.move(patient, -1)
+
+        self.assertNotEqual(copied.session[patient], -1)
+        self.assertEqual(copied.cost, self.instance.cost(self.initial_plan))
+        self.assertNotEqual(state.cost, copied.cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
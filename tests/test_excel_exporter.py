@@ -0,0 +1,82 @@
+import datetime
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from src import excel_exporter
+from src import excel_loader
+
+
+class TestExcelExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.exporter = excel_exporter.ExcelExporter()
+        self.patients = pd.DataFrame(data={
+            "Nome": ["Silvia", "Mario"],
+            "Cognome": ["Verdi", "Rossi"],
+            "Prestazioni": ["7253|7724", "4455|6442|8353"],
+            "Anestesia": ["true", "true"],
+            "Infezioni": ["true", "false"],
+            "Data inserimento in lista": [datetime.datetime(2022, 10, 15), datetime.datetime(2022, 11, 12)],
+        })
+        self.planning = pd.DataFrame(data={"Sala": [1, 2], "Note": ["", None]})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_xlsx_round_trip(self):
+        file_name = os.path.join(self.directory, "export.xlsx")
+        self.exporter.export(file_name, {"Lista pazienti 0": self.patients})
+
+        patients = excel_loader.ExcelLoader().load_patients(file_name)
+
+        self.assertEqual(len(patients), 2)
+        self.assertEqual(patients[1].surname, "Rossi")
+        self.assertEqual(patients[1].infectious, False)
+        self.assertEqual(patients[1].list_insertion_date, datetime.datetime(2022, 11, 12))
+
+    def test_xlsx_several_sheets(self):
+        file_name = os.path.join(self.directory, "export.xlsx")
+        reported_progress = []
+        self.exporter.export(file_name,
+                             {"Lista pazienti 0": self.patients, "Pianificazione [1/2]": self.planning},
+                             progress=lambda *progress: reported_progress.append(progress))
+
+        workbook = load_workbook(file_name)
+        self.assertEqual(workbook.sheetnames, ["Lista pazienti 0", "Pianificazione  1 2 "])
+        self.assertEqual(list(workbook.worksheets[1].values), [("Sala", "Note"), (1, None), (2, None)])
+        self.assertEqual(reported_progress[-1], (4, 4))
+
+    @unittest.skipIf(importlib.util.find_spec("odf") is None, "odfpy is not installed")
+    def test_ods(self):
+        file_name = os.path.join(self.directory, "export.ods")
+        self.exporter.export(file_name, {"Lista pazienti 0": self.patients, "Pianificazione": self.planning})
+
+        sheets = pd.read_excel(file_name, sheet_name=None, engine="odf")
+        self.assertEqual(list(sheets), ["Lista pazienti 0", "Pianificazione"])
+        self.assertEqual(list(sheets["Lista pazienti 0"]["Cognome"]), ["Verdi", "Rossi"])
+
+    @unittest.skipIf(importlib.util.find_spec("odf") is None, "odfpy is not installed")
+    def test_aborted_export_leaves_no_file(self):
+        file_name = os.path.join(self.directory, "export.ods")
+
+        def abort(written_rows, total_rows):
+            raise RuntimeError("cancelled")
+
+        self.assertRaises(RuntimeError, self.exporter.export, file_name, {"Lista": self.patients}, abort)
+        self.assertFalse(os.path.exists(file_name))
+
+    def test_unsupported_format(self):
+        file_name = os.path.join(self.directory, "export.csv")
+
+        self.assertRaises(excel_exporter.UnsupportedFormat, self.exporter.export, file_name, {"Lista": self.patients})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
 import datetime
+import os
+import shutil
+import tempfile
+import types
 import unittest
 
+from openpyxl import Workbook
+
 from src import excel_loader
 
 
@@ -44,6 +50,129 @@ class TestExcelLoader(unittest.TestCase):
         # first pass the exception, then the callable and after that all of its needed parameters
         self.assertRaises(excel_loader.InvalidRow, loader.load_patients, "./tests/test_files/empty_test_list.xlsx")
 
+    def test_parse_typed_cells(self):
+        # a single service code is a number, and flags may be real booleans
+        row = ("Mario", "Rossi", 7253, True, False, datetime.datetime(2022, 11, 12))
+        self.assertEqual(excel_loader.ExcelLoader.parse_row(row),
+                         ("Mario", "Rossi", "7253", True, False, datetime.datetime(2022, 11, 12)))
+
+        row = (" Maria ", "Neri", 7253.0, "TRUE", "false", datetime.datetime(2022, 11, 12))
+        self.assertEqual(excel_loader.ExcelLoader.parse_row(row)[:5], ("Maria", "Neri", "7253", True, False))
+
+    def test_loading_table(self):
+        loader = excel_loader.ExcelLoader()
+        table = loader.load_patient_table("./tests/test_files/test_list.xlsx")
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table[2].name, "Maria")
+        self.assertEqual(table[2].services, "8553|4035|5534")
+        self.assertEqual(table.anesthesia.tolist(), [True, True, False, False])
+        self.assertEqual(table.infectious.tolist(), [True, False, True, False])
+        self.assertEqual(table[3].list_insertion_date, datetime.datetime(2022, 10, 14))
+
+    def test_loading_table_progress(self):
+        loader = excel_loader.ExcelLoader()
+        reported_rows = []
+        loader.load_patient_table("./tests/test_files/test_list.xlsx", progress=reported_rows.append)
+
+        self.assertEqual(loader.count_patients("./tests/test_files/test_list.xlsx"), 4)
+        self.assertEqual(reported_rows[-1], 4)
+
+    def test_streaming(self):
+        loader = excel_loader.ExcelLoader()
+        patients = loader.iter_patients("./tests/test_files/test_list.xlsx")
+
+        # patients are produced lazily, one row at a time
+        self.assertIsInstance(patients, types.GeneratorType)
+
+        first_patient = next(patients)
+        self.assertEqual(first_patient.name, "Silvia")
+        self.assertEqual(first_patient.list_insertion_date, datetime.datetime(2022, 10, 15))
+
+        remaining_patients = list(patients)
+        self.assertEqual(len(remaining_patients), 3)
+        self.assertEqual(remaining_patients[-1].surname, "Neri")
+        self.assertEqual(remaining_patients[-1].services, "7724|3324")
+
+    def test_streaming_empty_file(self):
+        loader = excel_loader.ExcelLoader()
+        patients = loader.iter_patients("./tests/test_files/empty_test_list.xlsx")
+
+        self.assertRaises(excel_loader.InvalidRow, next, patients)
+
+
+class TestMainSheetDetection(unittest.TestCase):
+
+    def setUp(self):
+        excel_loader.ExcelLoader.main_sheet_cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "archive.xlsx")
+
+        workbook = Workbook()
+        workbook.active.title = "Archivio 2021"
+        workbook.active.append(["Codice", "Data"])
+        workbook.active.append(["A12", datetime.datetime(2021, 3, 2)])
+        main_sheet = workbook.create_sheet("Lista")
+        main_sheet.append(["Nome", "Cognome", "Prestazioni", "Anestesia", "Infezioni", "Data inserimento in lista"])
+        main_sheet.append(["Silvia", "Verdi", "7253|7724", "true", "true", datetime.datetime(2022, 10, 15)])
+        workbook.create_sheet("Vuoto")
+        workbook.save(self.file_name)
+
+        self.probes = 0
+        self.loader = excel_loader.ExcelLoader()
+        find_main_sheet = self.loader.find_main_sheet
+
+        def counting_find_main_sheet(workbook):
+            self.probes += 1
+            return find_main_sheet(workbook)
+
+        self.loader.find_main_sheet = counting_find_main_sheet
+
+    def tearDown(self):
+        excel_loader.ExcelLoader.main_sheet_cache.clear()
+        shutil.rmtree(self.directory)
+
+    def test_main_sheet_not_first(self):
+        patients = self.loader.load_patients(self.file_name)
+
+        self.assertEqual(len(patients), 1)
+        self.assertEqual(patients[0].surname, "Verdi")
+
+    def test_main_sheet_not_found(self):
+        workbook = Workbook()
+        workbook.active.append(["Codice", "Data"])
+        workbook.save(self.file_name)
+
+        self.assertRaises(excel_loader.MainSheetNotFound, self.loader.load_patients, self.file_name)
+
+    def test_reimport_skips_scan(self):
+        self.loader.load_patients(self.file_name)
+        self.loader.load_patients(self.file_name)
+
+        self.assertEqual(self.probes, 1)
+
+    def test_modified_file_is_scanned_again(self):
+        self.loader.load_patients(self.file_name)
+
+        stat = os.stat(self.file_name)
+        os.utime(self.file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.loader.load_patients(self.file_name)
+
+        self.assertEqual(self.probes, 2)
+
+    def test_cache_is_bounded(self):
+        self.loader.load_patients(self.file_name)
+        self.assertEqual(len(excel_loader.ExcelLoader.main_sheet_cache), 1)
+
+        # every modification is a new file: the oldest one is evicted
+        stat = os.stat(self.file_name)
+        for second in range(1, excel_loader.ExcelLoader.MAIN_SHEET_CACHE_SIZE + 1):
+            os.utime(self.file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + second * 1_000_000_000))
+            self.loader.load_patients(self.file_name)
+
+        self.assertEqual(len(excel_loader.ExcelLoader.main_sheet_cache), excel_loader.ExcelLoader.MAIN_SHEET_CACHE_SIZE)
+        self.assertNotIn(stat.st_mtime_ns, [fingerprint[2] for fingerprint in excel_loader.ExcelLoader.main_sheet_cache])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import time
+import unittest
+
+import numpy as np
+
+from src import heuristics
+from src.planning import Plan, PlanningInstance, Resources
+from src.solver import BranchAndBound, SolverStatus
+from tests.instances import random_instance
+
+
+class TestMaxSegmentTree(unittest.TestCase):
+
+    def test_first_at_least(self):
+        tree = heuristics.MaxSegmentTree([30, 90, 60, 120, 10])
+        self.assertEqual(tree.first_at_least(60), 1)
+        self.assertEqual(tree.first_at_least(100), 3)
+        self.assertIsNone(tree.first_at_least(121))
+
+        tree.update(1, 0)
+        self.assertEqual(tree.first_at_least(60), 2)
+
+
+class TestGreedyScheduler(unittest.TestCase):
+
+    def test_oldest_patients_first(self):
+        resources = Resources(rooms=1, days=2, session_duration=120, max_anesthesia_patients=1)
+        instance = PlanningInstance(durations=[60, 60, 60, 60, 60],
+                                    anesthesia=[False, True, True, False, False],
+                                    infectious=[True, False, False, False, False],
+                                    waiting_days=[50, 40, 30, 20, 10],
+                                    resources=resources)
+
+        plan = heuristics.GreedyScheduler(instance).schedule()
+
+        # the second anesthesia patient cannot share the first session
+        np.testing.assert_array_equal(plan.day, [0, 0, 1, 1, -1])
+        # the infectious patient is moved to the end of the session
+        np.testing.assert_array_equal(plan.order[:2], [1, 0])
+        self.assertTrue(instance.is_feasible(plan))
+
+    def test_completes_partial_plans(self):
+        resources = Resources(rooms=1, days=2, session_duration=120)
+        instance = PlanningInstance(durations=[120, 60, 60],
+                                    anesthesia=[False] * 3,
+                                    infectious=[False] * 3,
+                                    waiting_days=[0, 10, 5],
+                                    resources=resources)
+        partial_plan = Plan(day=[0, -1, -1], room=[0, -1, -1])
+
+        plan = heuristics.GreedyScheduler(instance).schedule(partial_plan)
+
+        np.testing.assert_array_equal(plan.day, [0, 1, 1])
+        np.testing.assert_array_equal(partial_plan.day, [0, -1, -1])
+
+    def test_large_lists(self):
+        instance = random_instance(np.random.default_rng(0), 10000, Resources(rooms=4, days=60))
+
+        start = time.perf_counter()
+        plan = heuristics.GreedyScheduler(instance).schedule()
+        self.assertLess(time.perf_counter() - start, 1)
+
+        self.assertTrue(instance.is_feasible(plan))
+        self.assertGreater(plan.scheduled.sum(), 0)
+
+    def test_warm_start(self):
+        instance = random_instance(np.random.default_rng(0), 200, Resources())
+        plan = heuristics.GreedyScheduler(instance).schedule()
+
+        result = BranchAndBound(instance, gap=1, initial_plan=plan).solve()
+
+        self.assertEqual(result.status, SolverStatus.GAP_REACHED)
+        self.assertEqual(result.nodes, 0)
+        self.assertEqual(result.cost, instance.cost(plan))
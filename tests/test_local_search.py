@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from src import local_search
+from src.heuristics import GreedyScheduler
+from src.planning import Resources
+from src.solver import SolverStatus
+from tests.instances import random_instance
+
+
+class TestLargeNeighborhoodSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.instance = random_instance(np.random.default_rng(0), 500, Resources(rooms=3, days=10),
+                                        durations=range(15, 135, 15))
+        self.initial_plan = GreedyScheduler(self.instance).schedule()
+
+    def test_improves_feasible_plans(self):
+        events = []
+        result = local_search.LargeNeighborhoodSearch(self.instance,
+                                                      self.initial_plan,
+                                                      max_iterations=50,
+                                                      callback=lambda *event: events.append(event)).solve()
+
+        self.assertTrue(self.instance.is_feasible(result.plan))
+        self.assertEqual(result.cost, self.instance.cost(result.plan))
+        self.assertLess(result.cost, self.instance.cost(self.initial_plan))
+        self.assertLessEqual(result.bound, result.cost)
+        self.assertEqual(events[-1][1]["cost"], result.cost)
+
+    def test_fixed_patients_stay(self):
+        fixed = self.initial_plan.scheduled & (self.initial_plan.day < 5)
+
+        result = local_search.LargeNeighborhoodSearch(self.instance,
+                                                      self.initial_plan,
+                                                      fixed=fixed,
+                                                      max_iterations=20).solve()
+
+        np.testing.assert_array_equal(result.plan.day[fixed], self.initial_plan.day[fixed])
+        np.testing.assert_array_equal(result.plan.room[fixed], self.initial_plan.room[fixed])
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_stop(self):
+        result = local_search.LargeNeighborhoodSearch(self.instance,
+                                                      self.initial_plan,
+                                                      should_stop=lambda: True).solve()
+
+        self.assertEqual(result.status, SolverStatus.STOPPED)
+        self.assertEqual(result.cost, self.instance.cost(self.initial_plan))
@@ -0,0 +1,89 @@
+import datetime
+import unittest
+
+import numpy as np
+
+from src import model
+
+
+class TestPatientTable(unittest.TestCase):
+
+    def setUp(self):
+        self.patients = [
+            model.Patient("Silvia", "Verdi", "7253|7724", True, True, datetime.datetime(2022, 10, 15)),
+            model.Patient("Mario", "Rossi", "4455|6442|8353", True, False, datetime.datetime(2022, 11, 12)),
+            model.Patient("Mario", "Verdi", "7253|7724", False, False, datetime.datetime(2022, 9, 6)),
+        ]
+
+    def test_rows_behave_like_patients(self):
+        table = model.PatientTable.from_patients(self.patients)
+
+        self.assertEqual(len(table), 3)
+        for patient, row in zip(self.patients, table):
+            self.assertIsInstance(row, model.Patient)
+            self.assertEqual(row.name, patient.name)
+            self.assertEqual(row.surname, patient.surname)
+            self.assertEqual(row.services, patient.services)
+            self.assertIs(row.anesthesia, patient.anesthesia)
+            self.assertIs(row.infectious, patient.infectious)
+            self.assertEqual(row.list_insertion_date, patient.list_insertion_date)
+
+        self.assertEqual(table[-1].name, "Mario")
+        self.assertRaises(IndexError, table.__getitem__, 3)
+
+    def test_strings_are_interned(self):
+        table = model.PatientTable.from_patients(self.patients)
+
+        self.assertEqual(len(table.name_pool), 2)
+        self.assertEqual(len(table.surname_pool), 2)
+        self.assertEqual(len(table.services_pool), 2)
+        self.assertEqual(table.column("name").tolist(), [0, 1, 1])
+
+    def test_columns_are_views(self):
+        table = model.PatientTable.from_patients(self.patients)
+
+        self.assertEqual(table.anesthesia.tolist(), [True, True, False])
+        self.assertEqual(table.infectious.tolist(), [True, False, False])
+        self.assertEqual(table.list_insertion_date.min(), np.datetime64("2022-09-06"))
+        self.assertTrue(np.shares_memory(table.anesthesia, table.columns["anesthesia"]))
+
+    def test_growth(self):
+        table = model.PatientTable(capacity=2)
+        for day in range(1, 11):
+            table.append("Marco", "Neri", "7724|3324", day % 2 == 0, False, datetime.datetime(2022, 10, day))
+
+        self.assertEqual(len(table), 10)
+        self.assertGreaterEqual(table.capacity, 10)
+        self.assertEqual(table.anesthesia.sum(), 5)
+        self.assertEqual(table[9].list_insertion_date, datetime.datetime(2022, 10, 10))
+
+    def test_service_codes(self):
+        table = model.PatientTable.from_patients(self.patients)
+
+        self.assertEqual(table[0].service_codes, [7253, 7724])
+        self.assertEqual(table[1].service_codes, [4455, 6442, 8353])
+        self.assertEqual(table.flat_service_codes.tolist(), [7253, 7724, 4455, 6442, 8353, 7253, 7724])
+        self.assertEqual(table.service_offsets.tolist(), [0, 2, 5, 7])
+        self.assertEqual(self.patients[1].service_codes, [4455, 6442, 8353])
+        # rows and patients give the same lists
+        self.assertEqual(table[1].service_codes, self.patients[1].service_codes)
+
+    def test_service_index(self):
+        table = model.PatientTable.from_patients(self.patients)
+
+        self.assertEqual(table.patients_needing(7724).tolist(), [0, 2])
+        self.assertEqual(table.patients_needing(8353).tolist(), [1])
+        self.assertEqual(table.patients_needing(1111).tolist(), [])
+        self.assertEqual(table.service_index.count(7253), 2)
+        self.assertEqual(table.service_index.service_codes(), [4455, 6442, 7253, 7724, 8353])
+
+    def test_invalid_services(self):
+        table = model.PatientTable()
+
+        self.assertRaises(ValueError, table.append, "Marco", "Neri", "77A4", False, False, datetime.datetime(2022, 10, 14))
+        self.assertEqual(len(table), 0)
+        self.assertEqual(len(table.flat_service_codes), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src import model_cache
+from src.excel_loader import ExcelLoader
+from src.model import PatientTable
+from src.planning import Resources
+
+
+def patient_data_frame(size):
+    return pd.DataFrame(data={
+        "Nome": ["Nome" + str(patient) for patient in range(size)],
+        "Cognome": ["Cognome" + str(patient) for patient in range(size)],
+        "Prestazioni": ["7253|7724" if patient % 2 else "4455" for patient in range(size)],
+        "Anestesia": ["true" if patient % 3 == 0 else "false" for patient in range(size)],
+        "Infezioni": ["false"] * size,
+        "Data inserimento in lista": [pd.Timestamp(2022, 10, 1) + pd.Timedelta(days=patient) for patient in range(size)],
+    })
+
+
+def planning_model(data_frame, resources):
+    patient_table = PatientTable(capacity=data_frame.shape[0])
+    patient_table.extend(ExcelLoader.parse_row(row) for row in data_frame.itertuples(index=False, name=None))
+    return model_cache.PlanningModel(patient_table, resources)
+
+
+class TestModelFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.resources = Resources(start_date=datetime.date(2023, 1, 2))
+
+    def test_same_data_same_fingerprint(self):
+        self.assertEqual(model_cache.model_fingerprint(patient_data_frame(5), self.resources),
+                         model_cache.model_fingerprint(patient_data_frame(5), self.resources))
+
+    def test_changes(self):
+        data_frame = patient_data_frame(5)
+        fingerprint = model_cache.model_fingerprint(data_frame, self.resources)
+
+        edited = data_frame.copy()
+        edited.iloc[3, 2] = "4455|7253"
+        self.assertNotEqual(model_cache.model_fingerprint(edited, self.resources), fingerprint)
+
+        resources = Resources(rooms=3, start_date=datetime.date(2023, 1, 2))
+        self.assertNotEqual(model_cache.model_fingerprint(data_frame, resources), fingerprint)
+
+
+class TestModelCache(unittest.TestCase):
+
+    def setUp(self):
+        self.resources = Resources(start_date=datetime.date(2023, 1, 2))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_model(self):
+        model = planning_model(patient_data_frame(6), self.resources)
+
+        self.assertEqual(len(model.instance), 6)
+        self.assertEqual(model.instance.durations.tolist(), [45, 90] * 3)
+        self.assertTrue(model.greedy_plan.scheduled.all())
+        # later edits of the resources do not reach the cached instance
+        self.resources.rooms = 5
+        self.assertEqual(model.instance.resources.rooms, 2)
+
+    def test_memory_lru(self):
+        cache = model_cache.ModelCache(size=2)
+        builds = []
+
+        def build(name):
+            builds.append(name)
+            return name
+
+        cache.get_or_build("a", lambda: build("a"))
+        cache.get_or_build("b", lambda: build("b"))
+        self.assertEqual(cache.get_or_build("a", lambda: build("a")), "a")
+        cache.get_or_build("c", lambda: build("c"))  # evicts b, used least recently
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(builds, ["a", "b", "c"])
+        self.assertEqual(len(cache), 2)
+
+    def test_disk(self):
+        data_frame = patient_data_frame(4)
+        fingerprint = model_cache.model_fingerprint(data_frame, self.resources)
+        cache = model_cache.ModelCache(directory=self.directory)
+        cache.put(fingerprint, planning_model(data_frame, self.resources))
+
+        # another session finds the model on disk
+        model = model_cache.ModelCache(directory=self.directory).get(fingerprint)
+        self.assertEqual(model.keys[1][:2], ("Nome1", "Cognome1"))
+        self.assertEqual(model.greedy_plan.day.tolist(), cache.get(fingerprint).greedy_plan.day.tolist())
+
+    def test_disk_lru(self):
+        cache = model_cache.ModelCache(size=1, directory=self.directory, disk_size=2)
+        for name in ("a", "b"):
+            cache.put(name, name)
+            os.utime(cache.path(name), (0, 1 if name == "a" else 2))
+        cache.put("c", "c")
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["b.model", "c.model"])
+        self.assertIsNone(model_cache.ModelCache(directory=self.directory).get("a"))
+
+    def test_corrupted_file(self):
+        cache = model_cache.ModelCache(directory=self.directory)
+        with open(cache.path("a"), "wb") as model_file:
+            model_file.write(b"not a model")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(os.path.exists(cache.path("a")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import datetime
+import random
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import patient_summary
+from src.model import PatientTable
+
+
+def random_rows(rng, size):
+    return [("Nome" + str(index),
+             "Cognome" + str(index),
+             "|".join(str(code) for code in rng.sample(range(7250, 7260), rng.randint(1, 3))),
+             rng.choice(["true", "false"]),
+             rng.choice([True, False]),
+             pd.Timestamp(2022, 1, 1) + pd.Timedelta(days=rng.randint(0, 700)))
+            for index in range(size)]
+
+
+class TestFenwickTree(unittest.TestCase):
+
+    def test_prefix_sums_and_ranks(self):
+        rng = random.Random(0)
+        counts = [rng.randint(0, 3) for _ in range(300)]
+        tree = patient_summary.FenwickTree(len(counts), counts)
+
+        built = patient_summary.FenwickTree(len(counts))
+        for index, count in enumerate(counts):
+            built.add(index, count)
+        self.assertEqual(tree.tree, built.tree)
+        self.assertEqual(tree.total, sum(counts))
+
+        items = sorted(index for index, count in enumerate(counts) for _ in range(count))
+        for end in range(len(counts) + 1):
+            self.assertEqual(tree.prefix_sum(end), sum(counts[:end]))
+        for rank, item in enumerate(items):
+            self.assertEqual(tree.find(rank), item)
+
+
+class TestPatientSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.today = datetime.date(2024, 1, 1)
+
+    def assert_summary(self, summary, rows):
+        data_frame = pd.DataFrame(rows)
+        self.assertEqual(summary.total, len(rows))
+        self.assertEqual(summary.anesthesia, sum(row[3] == "true" for row in rows))
+        self.assertEqual(summary.infectious, sum(row[4] for row in rows))
+
+        services = {}
+        for row in rows:
+            for code in row[2].split("|"):
+                services[int(code)] = services.get(int(code), 0) + 1
+        self.assertEqual(dict(summary.services), services)
+
+        # nearest rank percentiles of the waiting times
+        waiting = np.sort((pd.Timestamp(self.today) - data_frame[5]).dt.days.to_numpy())
+        for fraction in (0.1, 0.5, 0.9, 1.0):
+            rank = max(int(np.ceil(fraction * len(rows))), 1)
+            self.assertEqual(summary.waiting_days(fraction, self.today), waiting[rank - 1])
+
+    def test_incremental_updates(self):
+        rows = random_rows(self.rng, 200)
+        summary = patient_summary.PatientSummary()
+        for row in rows:
+            summary.add(row)
+        self.assert_summary(summary, rows)
+
+        for index in self.rng.sample(range(len(rows)), 50):
+            edited = random_rows(self.rng, 1)[0]
+            summary.replace(rows[index], edited)
+            rows[index] = edited
+        for _ in range(30):
+            summary.remove(rows.pop(self.rng.randrange(len(rows))))
+        self.assert_summary(summary, rows)
+
+    def test_from_patient_table(self):
+        rows = random_rows(self.rng, 100)
+        patient_table = PatientTable()
+        patient_table.extend((name, surname, services, anesthesia == "true", infectious, date)
+                             for name, surname, services, anesthesia, infectious, date in rows)
+
+        summary = patient_summary.PatientSummary.from_patient_table(patient_table)
+
+        self.assert_summary(summary, rows)
+        self.assertEqual(summary.insertion_days.tree,
+                         patient_summary.PatientSummary.from_data_frame(pd.DataFrame(rows)).insertion_days.tree)
+
+    def test_empty(self):
+        summary = patient_summary.PatientSummary()
+        self.assertIsNone(summary.waiting_days(0.5, self.today))
+        self.assertEqual(summary.top_services(), [])
+
+        row = ("Mario", "Rossi", "7253|7724", "true", "false", pd.Timestamp(2023, 12, 1))
+        summary.add(row)
+        summary.remove(row)
+        self.assertEqual(summary.total, 0)
+        self.assertEqual(len(summary.services), 0)
+        self.assertEqual(summary.insertion_days.total, 0)
+
+    def test_top_services(self):
+        summary = patient_summary.PatientSummary()
+        for services in ("1|2", "2|3", "2", "3"):
+            summary.add(("Mario", "Rossi", services, "false", "false", pd.Timestamp(2023, 12, 1)))
+        self.assertEqual(summary.top_services(2), [(2, 3), (3, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import datetime
+import unittest
+
+import numpy as np
+
+from src import planning
+from src.model import PatientTable
+from src.service_catalog import DEFAULT_SERVICE_DURATION, ServiceCatalog
+
+
+class TestPlanningInstance(unittest.TestCase):
+
+    def setUp(self):
+        self.resources = planning.Resources(rooms=2, days=3, session_duration=120, max_anesthesia_patients=1)
+        self.instance = planning.PlanningInstance(durations=[60, 60, 45, 90],
+                                                  anesthesia=[True, True, False, False],
+                                                  infectious=[True, False, False, False],
+                                                  waiting_days=[10, 0, 5, 2],
+                                                  resources=self.resources)
+
+    def test_from_patient_table(self):
+        table = PatientTable()
+        table.append("Mario", "Rossi", "7253|7724", True, False, datetime.datetime(2024, 1, 1))
+        table.append("Anna", "Bianchi", "7253", False, True, datetime.datetime(2024, 1, 31, 12))
+        resources = planning.Resources(start_date=datetime.date(2024, 2, 1))
+
+        instance = planning.PlanningInstance.from_patient_table(table, resources)
+
+        np.testing.assert_array_equal(instance.durations, [2 * DEFAULT_SERVICE_DURATION, DEFAULT_SERVICE_DURATION])
+        np.testing.assert_array_equal(instance.waiting_days, [31, 1])
+        np.testing.assert_array_equal(instance.priorities, [32, 2])
+
+    def test_from_patient_table_with_catalog(self):
+        table = PatientTable(catalog=ServiceCatalog(codes=[7253, 7724], durations=[30, 90], anesthesia=[False, True]))
+        table.append("Mario", "Rossi", "7253|7724", False, False, datetime.datetime(2024, 1, 1))
+        table.append("Anna", "Bianchi", "7253|1000", False, True, datetime.datetime(2024, 1, 31))
+
+        instance = planning.PlanningInstance.from_patient_table(table, planning.Resources())
+
+        np.testing.assert_array_equal(instance.durations, [120, 30 + DEFAULT_SERVICE_DURATION])
+        # 7724 needs anesthesia, even if the list does not say so
+        np.testing.assert_array_equal(instance.anesthesia, [True, False])
+
+    def test_cost(self):
+        plan = planning.Plan(day=[0, 2, -1, 1], room=[0, 1, -1, 0])
+        unscheduled_day = self.resources.days + planning.UNSCHEDULED_PENALTY_DAYS
+        self.assertEqual(self.instance.cost(plan), 11 * 0 + 1 * 2 + 6 * unscheduled_day + 3 * 1)
+
+    def test_feasibility(self):
+        self.assertTrue(self.instance.is_feasible(planning.Plan(day=[0, 0, 0, 1], room=[0, 1, 0, 1])))
+        # two anesthesia patients in the same session
+        self.assertFalse(self.instance.is_feasible(planning.Plan(day=[0, 0, -1, -1], room=[0, 0, -1, -1])))
+        # 60 + 90 minutes in a 120 minutes session
+        self.assertFalse(self.instance.is_feasible(planning.Plan(day=[1, -1, -1, 1], room=[1, -1, -1, 1])))
+
+    def test_infectious_patients_go_last(self):
+        plan = self.instance.sequence(planning.Plan(day=[0, -1, 0, -1], room=[0, -1, 0, -1]))
+        np.testing.assert_array_equal(plan.order, [1, 0, 0, 0])
+
+        plan = self.instance.sequence(planning.Plan(day=[1, 1, 2, 2], room=[0, 1, 1, 1]))
+        np.testing.assert_array_equal(plan.order, [0, 0, 0, 1])
+
+    def test_day_dates_skip_weekends(self):
+        resources = planning.Resources(start_date=datetime.date(2024, 2, 2))  # a friday
+        self.assertEqual(resources.day_date(0), datetime.date(2024, 2, 2))
+        self.assertEqual(resources.day_date(1), datetime.date(2024, 2, 5))
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from src.planning import Plan
+from src.portfolio import SharedIncumbent, combine_results
+from src.solver import SolverResult, SolverStatus
+
+
+class TestSharedIncumbent(unittest.TestCase):
+
+    def test_offer_and_fetch(self):
+        shared = SharedIncumbent(3)
+        self.assertIsNone(shared.fetch(0))
+
+        self.assertTrue(shared.offer(10, np.array([0, 1, -1])))
+        version, cost, sessions = shared.fetch(0)
+        self.assertEqual(cost, 10)
+        self.assertEqual(sessions.tolist(), [0, 1, -1])
+        self.assertIsNone(shared.fetch(version))
+
+        # only improvements replace the shared plan
+        self.assertFalse(shared.offer(10, np.array([2, 2, 2])))
+        self.assertTrue(shared.offer(4, np.array([0, 0, 1])))
+        self.assertEqual(shared.fetch(version)[1:2], (4,))
+
+
+class TestCombineResults(unittest.TestCase):
+
+    def result(self, cost, bound, status):
+        return SolverResult(Plan.empty(1), cost, bound, status, 10, 1.0)
+
+    def test_best_plan_and_bound(self):
+        result = combine_results([self.result(100, 90, SolverStatus.TIMEOUT),
+                                  self.result(95, 80, SolverStatus.TIMEOUT)], gap=0.01, stopped=False)
+        self.assertEqual(result.cost, 95)
+        self.assertEqual(result.bound, 90)
+        self.assertEqual(result.status, SolverStatus.TIMEOUT)
+        self.assertEqual(result.nodes, 20)
+
+    def test_gap_of_the_portfolio(self):
+        # the worker stopped by the other one holds the best plan
+        result = combine_results([self.result(100, 99, SolverStatus.GAP_REACHED),
+                                  self.result(99, 90, SolverStatus.STOPPED)], gap=0.01, stopped=False)
+        self.assertEqual(result.status, SolverStatus.OPTIMAL)
+
+        result = combine_results([self.result(100, 50, SolverStatus.STOPPED)], gap=0.01, stopped=True)
+        self.assertEqual(result.status, SolverStatus.STOPPED)
@@ -0,0 +1,87 @@
+import datetime
+import unittest
+
+import numpy as np
+
+from src import replanning
+from src.heuristics import GreedyScheduler
+from src.model import PatientTable
+from src.planning import PlanningInstance, Resources
+from src.solver import BranchAndBound
+
+
+class TestPatchPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.resources = Resources(rooms=2, days=5, start_date=datetime.date(2024, 3, 4))  # a monday
+        self.rows = [("Patient" + str(index), "Rossi", "7253|7724", index % 3 == 0, index % 7 == 0,
+                      datetime.datetime(2023, 1, 1) + datetime.timedelta(days=index))
+                     for index in range(60)]
+
+        self.table = PatientTable()
+        self.table.extend(self.rows)
+        instance = PlanningInstance.from_patient_table(self.table, self.resources)
+        self.plan = BranchAndBound(instance, gap=0.01, timeout=1,
+                                   initial_plan=GreedyScheduler(instance).schedule()).solve().plan
+        self.snapshot = replanning.PlanningSnapshot(replanning.patient_keys(self.table),
+                                                    self.plan,
+                                                    self.resources.start_date)
+
+    def patch(self, rows, resources=None):
+        table = PatientTable()
+        table.extend(rows)
+        instance = PlanningInstance.from_patient_table(table, resources or self.resources)
+        plan, free = replanning.patch_plan(self.snapshot, replanning.patient_keys(table), instance)
+        self.assertTrue(instance.is_feasible(plan))
+        return instance, plan, free
+
+    def test_unchanged_list(self):
+        instance, plan, free = self.patch(self.rows)
+
+        np.testing.assert_array_equal(plan.day, self.plan.day)
+        np.testing.assert_array_equal(free, ~self.plan.scheduled)
+
+    def test_removed_patient_releases_its_session(self):
+        removed = int(np.flatnonzero(self.plan.scheduled)[0])
+        session = (self.plan.day[removed], self.plan.room[removed])
+
+        instance, plan, free = self.patch(self.rows[:removed] + self.rows[removed + 1:])
+
+        kept = np.delete(np.arange(len(self.rows)), removed)
+        same_session = (self.plan.day[kept] == session[0]) & (self.plan.room[kept] == session[1])
+        np.testing.assert_array_equal(free, same_session | ~self.plan.scheduled[kept])
+        np.testing.assert_array_equal(plan.day[~free], self.plan.day[kept][~free])
+
+    def test_added_and_edited_patients_are_free(self):
+        rows = list(self.rows)
+        rows[1] = rows[1][:2] + ("7253",) + rows[1][3:]
+        rows.append(("New", "Patient", "7253", False, False, datetime.datetime(2022, 1, 1)))
+
+        instance, plan, free = self.patch(rows)
+
+        self.assertTrue(free[1])
+        self.assertTrue(free[-1])
+        self.assertFalse(plan.scheduled[-1])
+
+    def test_days_shift_with_the_start_date(self):
+        resources = Resources(rooms=2, days=5, start_date=datetime.date(2024, 3, 5))
+
+        instance, plan, free = self.patch(self.rows, resources)
+
+        previously_on_first_day = self.plan.day == 0
+        self.assertTrue(np.all(free[previously_on_first_day]))
+        np.testing.assert_array_equal(plan.day[~free], self.plan.day[~free] - 1)
+
+    def test_warm_started_replanning(self):
+        rows = self.rows[1:] + [("New", "Patient", "7253", True, False, datetime.datetime(2022, 1, 1))]
+        instance, plan, free = self.patch(rows)
+
+        result = BranchAndBound(instance,
+                                gap=0.01,
+                                timeout=1,
+                                initial_plan=GreedyScheduler(instance).schedule(plan),
+                                fixed=~free).solve()
+
+        self.assertTrue(instance.is_feasible(result.plan))
+        np.testing.assert_array_equal(result.plan.day[~free], plan.day[~free])
+        self.assertTrue(result.plan.scheduled[-1])
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from openpyxl import Workbook
+
+from src import service_catalog
+
+
+class TestServiceCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookup(self):
+        catalog = service_catalog.ServiceCatalog(codes=[7253, 7724, 4455], durations=[30, 90, 60],
+                                                 anesthesia=[False, True, False])
+
+        self.assertEqual(len(catalog), 3)
+        self.assertIn(7724, catalog)
+        self.assertNotIn(7000, catalog)
+        self.assertNotIn(99999, catalog)
+
+        durations, anesthesia = catalog.lookup([4455, 7724, 99999, 1])
+        self.assertEqual(durations.tolist(), [60, 90] + 2 * [service_catalog.DEFAULT_SERVICE_DURATION])
+        self.assertEqual(anesthesia.tolist(), [False, True, False, False])
+
+        self.assertEqual(catalog.patient_requirements([7253, 7724]), (120, True))
+        self.assertEqual(catalog.patient_requirements([7253, 99999]), (30 + service_catalog.DEFAULT_SERVICE_DURATION,
+                                                                       False))
+        self.assertEqual(catalog.patient_requirements([]), (0, False))
+
+        empty = service_catalog.ServiceCatalog()
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.lookup([7253])[0].tolist(), [service_catalog.DEFAULT_SERVICE_DURATION])
+
+    def test_large_codes(self):
+        # codes are not array positions: huge ones take no more memory than small ones
+        catalog = service_catalog.ServiceCatalog(codes=[10 ** 15, 7253], durations=[30, 90], anesthesia=[True, False])
+
+        self.assertIn(10 ** 15, catalog)
+        self.assertNotIn(10 ** 15 + 1, catalog)
+        durations, anesthesia = catalog.lookup([10 ** 15 + 1, 10 ** 15, 7253, 0])
+        self.assertEqual(durations.tolist(), [service_catalog.DEFAULT_SERVICE_DURATION, 30, 90,
+                                              service_catalog.DEFAULT_SERVICE_DURATION])
+        self.assertEqual(anesthesia.tolist(), [False, True, False, False])
+        self.assertEqual(catalog.patient_requirements([10 ** 15, 7253]), (120, True))
+
+    def test_invalid(self):
+        self.assertRaises(service_catalog.InvalidCatalog, service_catalog.ServiceCatalog, [1, 1], [30, 30])
+        self.assertRaises(service_catalog.InvalidCatalog, service_catalog.ServiceCatalog, [1], [-30])
+        self.assertRaises(service_catalog.InvalidCatalog, service_catalog.ServiceCatalog, [1, 2], [30])
+
+    def test_load_csv(self):
+        file_name = os.path.join(self.directory, "catalog.csv")
+        with open(file_name, "w") as catalog_file:
+            catalog_file.write("Codice,Durata,Anestesia\n7253,30,false\n7724,90,true\n")
+
+        catalog = service_catalog.ServiceCatalog.load(file_name)
+
+        self.assertEqual(catalog.patient_requirements([7253, 7724]), (120, True))
+
+    def test_load_spreadsheet(self):
+        file_name = os.path.join(self.directory, "catalog.xlsx")
+        workbook = Workbook()
+        workbook.active.append(["Codice", "Durata"])
+        workbook.active.append([7253, 30])
+        workbook.save(file_name)
+
+        catalog = service_catalog.ServiceCatalog.load(file_name)
+
+        self.assertEqual(catalog.lookup([7253])[0].tolist(), [30])
+        self.assertFalse(np.any(catalog.anesthesia))
+
+    def test_load_invalid(self):
+        file_name = os.path.join(self.directory, "catalog.csv")
+        with open(file_name, "w") as catalog_file:
+            catalog_file.write("Codice,Minuti\n7253,30\n")
+        self.assertRaises(service_catalog.InvalidCatalog, service_catalog.ServiceCatalog.load, file_name)
+
+        with open(file_name, "w") as catalog_file:
+            catalog_file.write("Codice,Durata\n7253,mezz'ora\n")
+        self.assertRaises(service_catalog.InvalidCatalog, service_catalog.ServiceCatalog.load, file_name)
+
+    def test_fingerprint(self):
+        catalog = service_catalog.ServiceCatalog(codes=[7253], durations=[30])
+        self.assertEqual(catalog.fingerprint(), service_catalog.ServiceCatalog(codes=[7253], durations=[30]).fingerprint())
+        self.assertNotEqual(catalog.fingerprint(), service_catalog.ServiceCatalog(codes=[7253], durations=[45]).fingerprint())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from src import solver
+from src.planning import Plan, Resources
+from tests.instances import random_instance
+
+# zero length services and frequent flags, to exercise every constraint on a few patients
+SMALL_INSTANCES = dict(durations=(0, 45, 90, 135), anesthesia=0.4, infectious=0.3, max_waiting_days=50)
+
+
+def brute_force_cost(instance):
+    resources = instance.resources
+    sessions = [None] + [(day, room) for day in range(resources.days) for room in range(resources.rooms)]
+
+    best_cost = None
+    for assignment in itertools.product(sessions, repeat=len(instance)):
+        plan = Plan.empty(len(instance))
+        for patient, session in enumerate(assignment):
+            if session is not None:
+                plan.day[patient], plan.room[patient] = session
+        if instance.is_feasible(plan) and (best_cost is None or instance.cost(plan) < best_cost):
+            best_cost = instance.cost(plan)
+    return best_cost
+
+
+class TestBranchAndBound(unittest.TestCase):
+
+    def test_fractional_bound(self):
+        # 60 minutes a day: the first patient fills day 0, the second is split between days 1 and 2
+        bound = solver.fractional_bound(np.array([60, 90]), np.array([6, 3]), [60, 60, 60], unscheduled_day=5)
+        self.assertAlmostEqual(bound, 6 * 0 + 3 * (60 / 90 * 1 + 30 / 90 * 2))
+
+        # no capacity left at all
+        bound = solver.fractional_bound(np.array([60]), np.array([6]), [0, 0], unscheduled_day=5)
+        self.assertAlmostEqual(bound, 30)
+
+    def test_optimal_on_small_instances(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            resources = Resources(rooms=int(rng.integers(1, 3)),
+                                  days=int(rng.integers(1, 3)),
+                                  session_duration=90,
+                                  max_anesthesia_patients=int(rng.integers(0, 2)))
+            instance = random_instance(rng, int(rng.integers(1, 6)), resources, **SMALL_INSTANCES)
+
+            result = solver.BranchAndBound(instance).solve()
+
+            self.assertEqual(result.status, solver.SolverStatus.OPTIMAL)
+            self.assertEqual(result.cost, brute_force_cost(instance))
+            self.assertEqual(result.cost, instance.cost(result.plan))
+            self.assertTrue(instance.is_feasible(result.plan))
+
+    def test_gap_and_incumbents(self):
+        rng = np.random.default_rng(1)
+        instance = random_instance(rng, 200, Resources(rooms=2, days=5), **SMALL_INSTANCES)
+        events = []
+
+        result = solver.BranchAndBound(instance, gap=0.5, callback=lambda *event: events.append(event)).solve()
+
+        self.assertEqual(result.status, solver.SolverStatus.GAP_REACHED)
+        self.assertLessEqual(result.gap, 0.5)
+        self.assertTrue(instance.is_feasible(result.plan))
+        self.assertEqual(events[-1][0], "incumbent")
+        self.assertEqual(events[-1][1]["cost"], result.cost)
+
+    def test_stop(self):
+        rng = np.random.default_rng(2)
+        instance = random_instance(rng, 200, Resources(rooms=2, days=5), **SMALL_INSTANCES)
+
+        result = solver.BranchAndBound(instance, should_stop=lambda: True).solve()
+
+        self.assertEqual(result.status, solver.SolverStatus.STOPPED)
+        self.assertEqual(result.cost, instance.cost(result.plan))
@@ -0,0 +1,133 @@
+import time
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from src import solver_engine
+from src.planning import PlanningInstance, Resources
+from src.solver import SolverStatus
+from tests.instances import random_instance
+
+
+class TestSolverEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.instance = random_instance(np.random.default_rng(0), 200, Resources(session_duration=450))
+        self.engine = solver_engine.SolverEngine()
+
+    def tearDown(self):
+        for process in self.engine.processes + [process for process, deadline in self.engine.exiting]:
+            process.kill()
+            process.join()
+
+    def wait(self, timeout=30):
+        events = []
+        deadline = time.monotonic() + timeout
+        while self.engine.busy and time.monotonic() < deadline:
+            events += self.engine.poll()
+            time.sleep(0.05)
+        return events
+
+    def test_run_to_timeout(self):
+        self.engine.start(self.instance, solver_engine.SolverSettings(gap=0, timeout=1))
+        events = self.wait()
+
+        self.assertFalse(self.engine.running)
+        self.assertIn("incumbent", [event for event, payload in events])
+        event, result = events[-1]
+        self.assertEqual(event, "done")
+        self.assertEqual(result.status, SolverStatus.TIMEOUT)
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_local_search(self):
+        settings = solver_engine.SolverSettings(gap=0, timeout=1, method=solver_engine.SolverSettings.LOCAL_SEARCH)
+        self.engine.start(self.instance, settings)
+        event, result = self.wait()[-1]
+
+        self.assertEqual(event, "done")
+        self.assertEqual(result.status, SolverStatus.TIMEOUT)
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_rolling_horizon(self):
+        settings = solver_engine.SolverSettings(gap=0, timeout=4, method=solver_engine.SolverSettings.ROLLING_HORIZON)
+        self.engine.start(self.instance, settings)
+        event, result = self.wait()[-1]
+
+        self.assertEqual(event, "done")
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_parallel_rolling_horizon(self):
+        # long horizons are planned week by week, the other worker solving weeks before searching locally
+        instance = PlanningInstance(durations=self.instance.durations,
+                                    anesthesia=self.instance.anesthesia,
+                                    infectious=self.instance.infectious,
+                                    waiting_days=self.instance.waiting_days,
+                                    resources=Resources(days=15))
+        settings = solver_engine.SolverSettings(gap=0, timeout=5, workers=2)
+        self.assertEqual(settings.portfolio(instance),
+                         [(solver_engine.SolverSettings.ROLLING_HORIZON, 0),
+                          (solver_engine.SolverSettings.LOCAL_SEARCH, 1)])
+
+        self.engine.start(instance, settings)
+        self.assertIsNotNone(self.engine.week_queue)
+        event, result = self.wait()[-1]
+
+        self.assertEqual(event, "done")
+        self.assertTrue(instance.is_feasible(result.plan))
+        self.assertIsNone(self.engine.week_queue)
+
+    def test_portfolio(self):
+        settings = solver_engine.SolverSettings(gap=0.05, timeout=10, workers=2)
+        self.assertEqual(settings.portfolio(self.instance),
+                         [(solver_engine.SolverSettings.EXACT, 0), (solver_engine.SolverSettings.LOCAL_SEARCH, 1)])
+        # too many patients to place for branch and bound
+        fixed = np.zeros(len(self.instance), dtype=np.bool_)
+        with unittest.mock.patch.object(solver_engine.SolverSettings, "EXACT_SIZE_LIMIT", 100):
+            self.assertEqual(settings.portfolio(self.instance, fixed),
+                             [(solver_engine.SolverSettings.LOCAL_SEARCH, 0),
+                              (solver_engine.SolverSettings.LOCAL_SEARCH, 1)])
+            self.assertEqual(settings.portfolio(self.instance, ~fixed)[0][0], solver_engine.SolverSettings.EXACT)
+
+        self.engine.start(self.instance, settings)
+        self.assertEqual(len(self.engine.processes), 2)
+        events = self.wait()
+
+        costs = [payload["cost"] for event, payload in events if event == "incumbent"]
+        self.assertEqual(costs, sorted(costs, reverse=True))
+        event, result = events[-1]
+        self.assertEqual(event, "done")
+        self.assertIn(result.status, (SolverStatus.OPTIMAL, SolverStatus.GAP_REACHED))
+        self.assertLessEqual(result.gap, 0.05)
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_default_workers(self):
+        settings = solver_engine.SolverSettings(gap=0, timeout=1)
+        fixed = np.ones(len(self.instance), dtype=np.bool_)
+        fixed[0] = False
+        with unittest.mock.patch("os.cpu_count", return_value=16):
+            # a small replanning is not worth more than one process
+            self.assertEqual(settings.worker_count(self.instance, fixed), 1)
+            self.assertEqual(settings.worker_count(self.instance), 16)
+
+        # branch and bound sized lists get local searches alongside on a multi-core machine
+        with unittest.mock.patch("os.cpu_count", return_value=3):
+            self.engine.start(self.instance, settings)
+        self.assertEqual(len(self.engine.processes), 3)
+        event, result = self.wait()[-1]
+        self.assertEqual(event, "done")
+        self.assertTrue(self.instance.is_feasible(result.plan))
+
+    def test_stop(self):
+        self.engine.start(self.instance, solver_engine.SolverSettings(gap=0, timeout=60))
+        while "incumbent" not in [event for event, payload in self.engine.poll()]:
+            time.sleep(0.05)
+
+        stop_time = time.monotonic()
+        self.engine.stop()
+        events = self.wait()
+
+        self.assertLess(time.monotonic() - stop_time, solver_engine.SolverEngine.STOP_GRACE_PERIOD + 1)
+        event, result = events[-1]
+        self.assertEqual(event, "done")
+        self.assertEqual(result.status, SolverStatus.STOPPED)
@@ -0,0 +1,82 @@
+import datetime
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import table_filter
+
+
+class TestTableIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_frame = pd.DataFrame(data={
+            "Nome": ["Mario", "Marco", "Niccolò", "Anna", "Maria Luisa"],
+            "Cognome": ["Rossi", "De Luca", "Rossini", "Mariani", "Verdi"],
+            "Prestazioni": ["7253", "7724", "7253|7724", "7253", "7724"],
+            "Anestesia": ["true", "false", "TRUE", "false", "true"],
+            "Infezioni": [False, True, True, False, False],
+            "Data inserimento in lista": pd.to_datetime(["2023-01-01", "2023-03-15", "2023-02-01",
+                                                         "2022-12-01", None]),
+        })
+        self.index = table_filter.TableIndex(self.data_frame,
+                                             text_columns=("Nome", "Cognome"),
+                                             date_column="Data inserimento in lista",
+                                             flag_columns=("Anestesia", "Infezioni"))
+
+    def test_prefixes(self):
+        np.testing.assert_array_equal(self.index.search("mar"), [0, 1, 3, 4])
+        np.testing.assert_array_equal(self.index.search("ROSS"), [0, 2])
+        # every word must match, accents and case aside
+        np.testing.assert_array_equal(self.index.search("nicco ross"), [2])
+        np.testing.assert_array_equal(self.index.search("luca"), [1])
+        np.testing.assert_array_equal(self.index.search("luisa mar"), [4])
+        np.testing.assert_array_equal(self.index.search("x"), [])
+
+    def test_dates_and_flags(self):
+        np.testing.assert_array_equal(self.index.search(start=datetime.date(2023, 1, 1)), [0, 1, 2])
+        np.testing.assert_array_equal(self.index.search(end=datetime.date(2023, 1, 1)), [0, 3])
+        np.testing.assert_array_equal(self.index.search(start=datetime.date(2023, 1, 2),
+                                                        end=datetime.date(2023, 2, 1)), [2])
+        np.testing.assert_array_equal(self.index.search(flags=("Anestesia",)), [0, 2, 4])
+        np.testing.assert_array_equal(self.index.search("ma", start=datetime.date(2023, 1, 1),
+                                                        flags=("Infezioni",)), [1])
+        np.testing.assert_array_equal(self.index.search(), np.arange(5))
+
+    def test_missing_columns(self):
+        index = table_filter.TableIndex(self.data_frame[["Nome"]],
+                                        text_columns=("Nome", "Cognome"),
+                                        date_column="Data",
+                                        flag_columns=("Anestesia",))
+        np.testing.assert_array_equal(index.search("mar", start=datetime.date(2023, 1, 1), flags=("Anestesia",)),
+                                      [0, 1, 4])
+
+        # without text columns, words match every row
+        index = table_filter.TableIndex(self.data_frame[["Anestesia"]], ("Nome", "Cognome"), None, ("Anestesia",))
+        np.testing.assert_array_equal(index.search("mar", flags=("Anestesia",)), [0, 2, 4])
+
+        empty = table_filter.TableIndex(self.data_frame.iloc[:0], ("Nome", "Cognome"), "Data inserimento in lista")
+        self.assertEqual(len(empty.search("mar", end=datetime.date(2023, 1, 1))), 0)
+
+    def test_large_table(self):
+        rng = np.random.default_rng(0)
+        size = 100000
+        names = np.array(["Mario", "Luca", "Giulia", "Anna"] + ["N" + str(code) for code in range(3000)])
+        data_frame = pd.DataFrame(data={
+            "Nome": names[rng.integers(0, len(names), size)],
+            "Cognome": names[rng.integers(0, len(names), size)],
+            "Anestesia": rng.random(size) < 0.3,
+            "Data inserimento in lista": pd.Timestamp(2022, 1, 1) + pd.to_timedelta(rng.integers(0, 700, size), "D"),
+        })
+        index = table_filter.TableIndex(data_frame, ("Nome", "Cognome"), "Data inserimento in lista", ("Anestesia",))
+
+        rows = index.search("giu", start=datetime.date(2022, 6, 1), flags=("Anestesia",))
+
+        expected = data_frame[(data_frame["Nome"].str.startswith("Giu") | data_frame["Cognome"].str.startswith("Giu"))
+                              & (data_frame["Data inserimento in lista"] >= pd.Timestamp(2022, 6, 1))
+                              & data_frame["Anestesia"]]
+        np.testing.assert_array_equal(rows, expected.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
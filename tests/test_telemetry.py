@@ -0,0 +1,148 @@
+import threading
+import unittest
+
+from src import telemetry
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTextWidget:
+
+    def __init__(self):
+        self.text = ""
+        self.inserts = 0
+        self.scrolls = 0
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def run_callbacks(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def insert(self, index, text):
+        self.text += text
+        self.inserts += 1
+
+    def index(self, index):
+        # "end-1c" of a Tk text: the last line and column
+        return "{0}.0".format(self.text.count("\n") + 1)
+
+    def delete(self, first, last):
+        lines = int(last.split(".")[0]) - 1
+        self.text = "".join(self.text.splitlines(keepends=True)[lines:])
+
+    def see(self, index):
+        self.scrolls += 1
+
+
+def incumbent(cost, elapsed):
+    return {"cost": cost, "bound": 90, "gap": (cost - 90) / cost, "elapsed": elapsed, "nodes": 10}
+
+
+class TestSolverTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.telemetry = telemetry.SolverTelemetry(clock=self.clock)
+
+    def test_rate_limit(self):
+        self.telemetry.start(timeout=10)
+        self.assertTrue(self.telemetry.render_due())
+        self.telemetry.rendered()
+
+        # a burst of incumbents is rendered once, with the last one
+        for cost in range(200, 100, -1):
+            self.telemetry.push("incumbent", incumbent(cost, 1.0))
+        self.assertFalse(self.telemetry.render_due())
+        self.clock.now += telemetry.SolverTelemetry.RENDER_INTERVAL
+        self.assertTrue(self.telemetry.render_due())
+        self.assertIn("Costo: 101", self.telemetry.text())
+        self.assertIn("Piani trovati: 100", self.telemetry.text())
+        self.assertEqual(self.telemetry.progress(), 0.1)
+        self.telemetry.rendered()
+
+        # nothing new, nothing to render
+        self.clock.now += telemetry.SolverTelemetry.RENDER_INTERVAL
+        self.assertFalse(self.telemetry.render_due())
+
+    def test_finish_is_rendered_at_once(self):
+        self.telemetry.start()
+        self.telemetry.rendered()
+        self.telemetry.push("progress", incumbent(100, 2.0))
+        self.assertIsNone(self.telemetry.progress())
+
+        self.telemetry.finish()
+        self.assertTrue(self.telemetry.render_due())
+        self.assertEqual(self.telemetry.text(), "Nessuna pianificazione in corso")
+
+
+class TestBatchedWriter(unittest.TestCase):
+
+    def test_batches(self):
+        widget = FakeTextWidget()
+        writer = telemetry.BatchedWriter(widget)
+
+        # the drain is scheduled once, at construction
+        self.assertEqual(len(widget.callbacks), 1)
+        for line in range(100):
+            print("line", line, file=writer)
+        self.assertEqual(widget.text, "")
+        self.assertEqual(len(widget.callbacks), 1)
+
+        widget.run_callbacks()
+        self.assertEqual(widget.inserts, 1)
+        self.assertEqual(widget.scrolls, 1)
+        self.assertTrue(widget.text.startswith("line 0\nline 1\n"))
+
+        # nothing written, nothing inserted, but draining goes on
+        widget.run_callbacks()
+        self.assertEqual(widget.inserts, 1)
+        self.assertEqual(len(widget.callbacks), 1)
+
+        print("again", file=writer)
+        widget.run_callbacks()
+        self.assertEqual(widget.inserts, 2)
+        self.assertTrue(widget.text.endswith("line 99\nagain\n"))
+
+    def test_writes_from_other_threads(self):
+        widget = FakeTextWidget()
+        writer = telemetry.BatchedWriter(widget)
+
+        # writing threads only fill the buffer: the widget is left to the Tk thread
+        threads = [threading.Thread(target=lambda: [print("line", file=writer) for _ in range(100)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(widget.inserts, 0)
+        self.assertEqual(len(widget.callbacks), 1)
+
+        widget.run_callbacks()
+        self.assertEqual(widget.text.count("line\n"), 400)
+
+    def test_bounded_lines(self):
+        widget = FakeTextWidget()
+        writer = telemetry.BatchedWriter(widget)
+        writer.MAX_LINES = 10
+
+        for line in range(25):
+            print(line, file=writer)
+        widget.run_callbacks()
+
+        self.assertLessEqual(widget.text.count("\n"), 10)
+        self.assertTrue(widget.text.endswith("24\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+
+from src import text_metrics
+
+
+class MonospacedFont:
+    # every char is 7px wide, like a fixed-width font
+
+    def __init__(self, family="Source Sans Pro"):
+        self.family = family
+        self.measures = 0
+
+    def measure(self, text):
+        self.measures += 1
+        return 7 * len(text)
+
+    def actual(self):
+        return {"family": self.family, "size": 12, "weight": "normal", "slant": "roman"}
+
+    def __str__(self):
+        # like Tk names, unique to each font object
+        return "font" + str(id(self))
+
+
+class TestTextTruncator(unittest.TestCase):
+
+    def setUp(self):
+        self.font = MonospacedFont()
+        self.truncator = text_metrics.TextTruncator()
+
+    def test_fitting_text_is_untouched(self):
+        self.assertEqual(self.truncator.truncate("7253|7724", self.font, 63), "7253|7724")
+        self.assertEqual(self.truncator.truncate(7253, self.font, 28), "7253")
+
+    def test_ellipsis(self):
+        # 5 chars + ellipsis = 42px
+        self.assertEqual(self.truncator.truncate("4455|6442|8353", self.font, 45), "4455|…")
+        self.assertEqual(self.truncator.truncate("4455|6442|8353", self.font, 7), "…")
+
+    def test_no_room_for_ellipsis(self):
+        self.assertEqual(self.truncator.truncate("4455|6442|8353", self.font, 6), "")
+
+        truncator = text_metrics.TextTruncator(ellipsis=None)
+        self.assertEqual(truncator.truncate("4455|6442|8353", self.font, 45), "4455|6")
+
+    def test_logarithmic_measures(self):
+        self.truncator.truncate("7253|" * 200, self.font, 100)
+
+        # a char by char search would need about a thousand measures
+        self.assertLess(self.font.measures, 20)
+
+    def test_cache(self):
+        self.truncator.truncate("4455|6442|8353", self.font, 45)
+        measures = self.font.measures
+
+        self.assertEqual(self.truncator.truncate("4455|6442|8353", self.font, 45), "4455|…")
+        self.assertEqual(self.font.measures, measures)
+
+        # a different font or width is a different entry
+        self.truncator.truncate("4455|6442|8353", MonospacedFont("Source Sans Pro Bold"), 45)
+        self.truncator.truncate("4455|6442|8353", self.font, 50)
+        self.assertEqual(len(self.truncator.cache), 3)
+
+        # while another font object with the same attributes shares the entries
+        font = MonospacedFont()
+        self.assertEqual(self.truncator.truncate("4455|6442|8353", font, 45), "4455|…")
+        self.assertEqual(font.measures, 0)
+
+        self.truncator.clear()
+        self.assertEqual(len(self.truncator.cache), 0)
+
+    def test_least_recently_used_eviction(self):
+        truncator = text_metrics.TextTruncator(cache_size=2)
+        truncator.truncate("Verdi", self.font, 100)
+        truncator.truncate("Rossi", self.font, 100)
+        truncator.truncate("Verdi", self.font, 100)
+        truncator.truncate("Neri", self.font, 100)
+
+        self.assertEqual([key[0] for key in truncator.cache], ["Verdi", "Neri"])
+
+
+class KernedFont(MonospacedFont):
+    # "AV" pairs are kerned, so that per-char estimates overrate texts containing them
+
+    def measure(self, text):
+        return super().measure(text) - 5 * text.count("AV")
+
+
+class TestGlyphWidthCache(unittest.TestCase):
+
+    def setUp(self):
+        self.font = MonospacedFont()
+        self.glyph_widths = text_metrics.GlyphWidthCache()
+
+    def test_estimates(self):
+        widths = self.glyph_widths.estimate_widths(self.font, ["Silvia", "Verdi", "", "7253|7724"])
+
+        self.assertEqual(widths.tolist(), [42, 35, 0, 63])
+
+    def test_chars_are_measured_once(self):
+        self.glyph_widths.estimate_widths(self.font, ["Mario", "Maria", "Marco"])
+        self.assertEqual(self.font.measures, 6)  # M, a, r, i, o, c
+
+        self.glyph_widths.estimate_widths(self.font, ["Rossi", "Mario"])
+        self.assertEqual(self.font.measures, 8)  # R, s
+
+        # advance widths are per font
+        self.glyph_widths.estimate_widths(MonospacedFont("Source Sans Pro Bold"), ["Mario"])
+        self.assertEqual(len(self.glyph_widths.advances), 2)
+
+        # but shared by font objects with the same attributes, as the fonts of different tables
+        font = MonospacedFont()
+        self.glyph_widths.estimate_widths(font, ["Rossi", "Mario"])
+        self.assertEqual(font.measures, 0)
+        self.assertEqual(len(self.glyph_widths.advances), 2)
+
+    def test_max_width(self):
+        values = ["Mario", "Arancioni", "Neri", "Arancioni", 7253]
+
+        self.assertEqual(self.glyph_widths.max_width(self.font, values), 63)
+        self.assertEqual(self.glyph_widths.max_width(self.font, values, top_k=None), 63)
+        self.assertEqual(self.glyph_widths.max_width(self.font, []), 0)
+
+    def test_top_k_corrects_estimates(self):
+        font = KernedFont()
+        values = ["AVAVAVAV", "ABCDEFGH"]
+
+        # both are estimated 56px wide, but the first one is only 36px
+        self.assertEqual(self.glyph_widths.max_width(font, values, top_k=2), 56)
+        self.assertEqual(self.glyph_widths.max_width(font, ["AVAVAVAV", "ABCDEF"], top_k=2), 42)
+
+    def test_sampling(self):
+        values = ["Paziente " + str(number) for number in range(1000)]
+
+        width = self.glyph_widths.max_width(self.font, values, sample_size=100)
+        self.assertLessEqual(width, 7 * len("Paziente 999"))
+        self.assertGreaterEqual(width, 7 * len("Paziente 99"))
+
+
+if __name__ == '__main__':
+    unittest.main()